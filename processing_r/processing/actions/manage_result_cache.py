@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    manage_result_cache.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from datetime import datetime
+
+from processing.gui.ToolboxAction import ToolboxAction
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtWidgets import QMessageBox
+
+from processing_r.processing.cache import ResultCache
+
+
+class ManageResultCacheAction(ToolboxAction):
+    """
+    Action for inspecting and purging the cache of R script results
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.name = QCoreApplication.translate("RAlgorithmProvider", "R Result Cache…")
+        self.group = self.tr("Tools")
+
+    def execute(self):
+        """
+        Called whenever the action is triggered
+        """
+        cache = ResultCache()
+        entries = cache.entries()
+        total = sum(entry["size"] for entry in entries)
+
+        box = QMessageBox(QMessageBox.Information, self.tr("R Result Cache"), "")
+        box.setText(
+            self.tr("The cache holds {0} results using {1:.1f} MB of {2:.1f} MB.\nCache folder: {3}").format(
+                len(entries), total / 1024 / 1024, cache.max_size / 1024 / 1024, cache.folder
+            )
+        )
+        if entries:
+            box.setDetailedText(
+                "\n".join(
+                    self.tr("{0}: {1:.1f} MB, last used {2}").format(
+                        entry.get("algorithm_id", entry["key"]),
+                        entry["size"] / 1024 / 1024,
+                        datetime.fromtimestamp(entry["last_used"]).strftime("%Y-%m-%d %H:%M:%S"),
+                    )
+                    for entry in entries
+                )
+            )
+        purge_button = box.addButton(self.tr("Purge Cache"), QMessageBox.DestructiveRole)
+        purge_button.setEnabled(bool(entries))
+        box.addButton(QMessageBox.Close)
+        box.exec_()
+
+        if box.clickedButton() == purge_button:
+            cache.clear()
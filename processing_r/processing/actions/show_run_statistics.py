@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    show_run_statistics.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from html import escape
+
+from processing.gui.ToolboxAction import ToolboxAction
+from qgis.core import QgsMessageOutput
+from qgis.PyQt.QtCore import QCoreApplication
+
+from processing_r.processing.run_history import RunHistory
+
+
+class ShowRunStatisticsAction(ToolboxAction):
+    """
+    Action for showing duration statistics of past R script executions
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.name = QCoreApplication.translate("RAlgorithmProvider", "R Script Run Statistics…")
+        self.group = self.tr("Tools")
+
+    def execute(self):
+        """
+        Called whenever the action is triggered
+        """
+        statistics = RunHistory().statistics()
+
+        html = "<h2>{}</h2>\n".format(self.tr("R Script Run Statistics"))
+        if not statistics:
+            html += "<p>{}</p>".format(self.tr("No R script executions were recorded yet."))
+        else:
+            html += "<table>\n<tr><th>{}</th><th>{}</th><th>{}</th><th>{}</th><th>{}</th><th>{}</th></tr>\n".format(
+                self.tr("Script"),
+                self.tr("Runs"),
+                self.tr("Failed"),
+                self.tr("p50 (s)"),
+                self.tr("p95 (s)"),
+                self.tr("Last run"),
+            )
+            for alg_id, stats in sorted(statistics.items()):
+                html += "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>\n".format(
+                    escape(alg_id),
+                    stats["runs"],
+                    stats["failed"],
+                    "{:.2f}".format(stats["p50"]) if stats["p50"] is not None else "",
+                    "{:.2f}".format(stats["p95"]) if stats["p95"] is not None else "",
+                    escape(stats["last_run"] or ""),
+                )
+            html += "</table>"
+
+        output = QgsMessageOutput.createMessageOutput()
+        output.setTitle(self.tr("R Script Run Statistics"))
+        output.setMessage(html, QgsMessageOutput.MessageHtml)
+        output.showMessage()
@@ -19,12 +19,12 @@
 
 import json
 import os
+import time
 from pathlib import Path
 
 from qgis.core import (
     Qgis,
     QgsCoordinateReferenceSystem,
-    QgsExpression,
     QgsExpressionContext,
     QgsGeometry,
     QgsPointXY,
@@ -33,6 +33,7 @@ from qgis.core import (
     QgsProcessingContext,
     QgsProcessingException,
     QgsProcessingOutputDefinition,
+    QgsProcessingOutputFile,
     QgsProcessingParameterBand,
     QgsProcessingParameterBoolean,
     QgsProcessingParameterCrs,
@@ -54,14 +55,15 @@ from qgis.core import (
     QgsProcessingParameterVectorDestination,
     QgsProcessingParameterVectorLayer,
     QgsProcessingUtils,
-    QgsProviderRegistry,
-    QgsVectorFileWriter,
-    QgsVectorLayer,
 )
-from qgis.PyQt.QtCore import QCoreApplication, QDate, QDateTime, QDir, QTime, QUrl
+from qgis.PyQt.QtCore import QCoreApplication, QDate, QDateTime, QDir, QTime
 from qgis.PyQt.QtGui import QColor
 
 from processing_r.gui.gui_utils import GuiUtils
+from processing_r.processing import interchange, run_reports
+from processing_r.processing.cached_results import CachedResults
+from processing_r.processing.expression_cache import compiled_expression
+from processing_r.processing.layer_inputs import LayerInputs, parse_input_metadata
 from processing_r.processing.outputs import create_output_from_string
 from processing_r.processing.parameters import create_parameter_from_string
 from processing_r.processing.r_templates import RTemplates
@@ -80,6 +82,8 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
 
     R_CONSOLE_OUTPUT = "R_CONSOLE_OUTPUT"
     RPLOTS = "RPLOTS"
+    R_PROFILE_REPORT = "R_PROFILE_REPORT"
+    R_RESOURCE_USAGE = "R_RESOURCE_USAGE"
 
     def __init__(self, description_file, script=None):
         super().__init__()
@@ -92,6 +96,7 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         self.description_file = os.path.realpath(description_file) if description_file else None
         self.error = None
         self.commands = []
+        self.command_line_numbers = []
         self.is_user_script = False
         if description_file:
             self.is_user_script = not description_file.startswith(RUtils.builtin_scripts_folder())
@@ -100,9 +105,27 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         self.pass_file_names = False
         self.show_console_output = False
         self.save_output_values = False
+        self.profile_script = False
+        self.cacheable = False
+        self.lazy_inputs = False
+        self.stack_multiple_rasters = False
+        self.raster_backend = None
+        self.raster_output_options = {}
+        self.clip_inputs_to = None
+        self.input_fields = {}
+        self.input_resolutions = {}
+        self.no_geometry_inputs = set()
+        self.selected_bands_inputs = set()
         self.plots_filename = ""
         self.output_values_filename = ""
+        self.profile_summary_filename = ""
+        self.profile_body_filename = ""
         self.results = {}
+        self.phase_durations = {}
+        self.r_exit_status = None
+        self.r_peak_rss = None
+        self.cache_hit = False
+        self.resource_monitor = None
         self.descriptions = None
         self.inline_help = None
         if self.script is not None:
@@ -210,32 +233,52 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         lines_header = []
         lines_r = []
 
-        for line in lines:
+        for line_number, line in enumerate(lines, start=1):
             line = line.strip()
             if line.startswith("#'"):
-                lines_help.append(line)
+                lines_help.append((line_number, line))
             elif line.startswith("##"):
-                lines_header.append(line)
+                lines_header.append((line_number, line))
             else:
-                lines_r.append(line)
+                lines_r.append((line_number, line))
 
-        lines = lines_help + lines_header + lines_r
+        numbered_lines = lines_help + lines_header + lines_r
+        lines = [line for _, line in numbered_lines]
+        line_numbers = [line_number for line_number, _ in numbered_lines]
 
-        self.parse_script(iter(lines))
+        self.parse_script(iter(lines), line_numbers)
 
-    def parse_script(self, lines):
+    def parse_script(self, lines, line_numbers=None):
         """
         Parse the lines from an R script, initializing parameters and outputs as encountered
+
+        :param lines: iterator over the script lines
+        :param line_numbers: optional list with the line number in the source file of each line,
+            if not set the lines are numbered in the order they are read
         """
         self.script = ""
         self.commands = []
+        self.command_line_numbers = []
         self.error = None
         self.show_plots = False
         self.show_console_output = False
         self.pass_file_names = False
+        self.profile_script = False
+        self.cacheable = False
+        self.lazy_inputs = False
+        self.stack_multiple_rasters = False
+        self.raster_backend = None
+        self.raster_output_options = {}
+        self.clip_inputs_to = None
+        self.input_fields = {}
+        self.input_resolutions = {}
+        self.no_geometry_inputs = set()
+        self.selected_bands_inputs = set()
         ender = 0
+        index = 0
         line = next(lines).strip("\n").strip("\r")
         while ender < 10:
+            line_number = line_numbers[index] if line_numbers is not None else index + 1
             if line.startswith("##"):
                 try:
                     self.process_metadata_line(line)
@@ -254,6 +297,7 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                     )
             elif line.startswith(">"):
                 self.commands.append(line[1:])
+                self.command_line_numbers.append(line_number)
                 if not self.show_console_output:
                     self.addParameter(
                         QgsProcessingParameterFileDestination(
@@ -270,12 +314,20 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                 else:
                     ender = 0
                 self.commands.append(line)
+                self.command_line_numbers.append(line_number)
             self.script += line + "\n"
             try:
                 line = next(lines).strip("\n").strip("\r")
+                index += 1
             except StopIteration:
                 break
 
+        if RUtils.profile_scripts() and not self.profile_script:
+            run_reports.add_profile_report_parameter(self)
+
+        if RUtils.monitor_interval() > 0 and self.outputDefinition(RAlgorithm.R_RESOURCE_USAGE) is None:
+            self.addOutput(QgsProcessingOutputFile(RAlgorithm.R_RESOURCE_USAGE, self.tr("R Resource Usage")))
+
     def process_metadata_line(self, line):  # pylint: disable=too-many-return-statements
         """
         Processes a "metadata" (##) line
@@ -310,7 +362,60 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
             self.r_templates.auto_load_packages = False
             return
 
+        if line.lower().strip() == "profile":
+            run_reports.add_profile_report_parameter(self)
+            return
+
+        if line.lower().strip() == "cacheable":
+            self.cacheable = True
+            return
+
+        if line.lower().strip() == "stack_multiple_rasters":
+            self.stack_multiple_rasters = True
+            return
+
+        if line.lower().strip() == "lazy_inputs":
+            self.lazy_inputs = True
+            self.r_templates.lazy_inputs = True
+            return
+
         value, type_ = self.split_tokens(line)
+        if type_.lower().rstrip().endswith(" nogeometry"):
+            # vector input read without geometries
+            self.no_geometry_inputs.add(value.strip())
+            line = line.rstrip()[: -len("nogeometry")].rstrip()
+            value, type_ = self.split_tokens(line)
+        if type_.lower().rstrip().endswith(" selectedbands"):
+            # raster input read with only the bands chosen by its band parameters
+            self.selected_bands_inputs.add(value.strip())
+            line = line.rstrip()[: -len("selectedbands")].rstrip()
+            value, type_ = self.split_tokens(line)
+        output_tokens = line.split("=", 1)[1].split() if "=" in line else []
+        if [token.lower() for token in output_tokens[:2]] == ["output", "raster"]:
+            # raster output with writing options, which may contain "=" themselves
+            options = [token for token in output_tokens[2:] if token.lower() != "noprompt"]
+            if options:
+                try:
+                    self.raster_output_options[value.strip()] = RUtils.parse_raster_output_options(options)
+                except ValueError as e:
+                    raise QgsProcessingException(str(e)) from e
+                line = "{0}=output raster".format(value)
+                if len(options) < len(output_tokens) - 2:
+                    line += " noprompt"
+                value, type_ = self.split_tokens(line)
+        if value.lower().strip() == "clip_inputs_to":
+            self.clip_inputs_to = type_.strip()
+            return
+        if value.lower().strip() == "raster_backend":
+            if type_.lower().strip() not in RUtils.RASTER_BACKENDS:
+                raise QgsProcessingException(
+                    self.tr("Unknown raster backend {0}, use one of {1}.").format(
+                        type_.strip(), ", ".join(RUtils.RASTER_BACKENDS)
+                    )
+                )
+            self.raster_backend = type_.lower().strip()
+            self.r_templates.raster_backend = self.raster_backend
+            return
         if type_.lower().strip() == "group":
             self._group = value
             return
@@ -334,6 +439,9 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
             self.r_templates.expressions.append(line)
             return
 
+        if parse_input_metadata(self, line, value, type_):
+            return
+
         self.process_parameter_line(line)
 
     def process_help_line(self, line):  # pylint: disable=too-many-return-statements
@@ -426,7 +534,24 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         Executes the algorithm
         """
         self.results = {}
+        self.phase_durations = {}
+        self.r_exit_status = None
+        self.r_peak_rss = None
+        self.cache_hit = False
+        self.resource_monitor = None
+
+        start = time.perf_counter()
+        try:
+            return self.execute_r_script(parameters, context, feedback)
+        finally:
+            self.phase_durations["total"] = time.perf_counter() - start
+            if RUtils.record_run_history():
+                run_reports.record_run(self, parameters, context)
 
+    def execute_r_script(self, parameters, context: QgsProcessingContext, feedback):
+        """
+        Runs the script in R and collects the results
+        """
         self.alg_context = self.createExpressionContext(parameters, context)
 
         if RUtils.is_windows():
@@ -436,22 +561,24 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                     self.tr("R folder is not configured.\nPlease configure it " "before running R scripts.")
                 )
 
+        cached_results = CachedResults(self, parameters, context, feedback)
+        if cached_results.lookup():
+            return self.results
+
         feedback.pushInfo(self.tr("R execution commands"))
 
         output = RUtils.execute_r_algorithm(self, parameters, context, feedback)
+        interchange.use_fallback_outputs(self.results, context, feedback)
 
+        start = time.perf_counter()
         if self.show_plots:
-            html_filename = self.parameterAsFileOutput(parameters, RAlgorithm.RPLOTS, context)
-            if html_filename:
-                with open(html_filename, "w", encoding="utf8") as f:
-                    f.write('<html><img src="{}"/></html>'.format(QUrl.fromLocalFile(self.plots_filename).toString()))
-                self.results[RAlgorithm.RPLOTS] = html_filename
+            run_reports.write_plots_html(self, parameters, context)
         if self.show_console_output:
-            html_filename = self.parameterAsFileOutput(parameters, RAlgorithm.R_CONSOLE_OUTPUT, context)
-            if html_filename:
-                with open(html_filename, "w", encoding="utf8") as f:
-                    f.write(RUtils.html_formatted_console_output(output))
-                self.results[RAlgorithm.R_CONSOLE_OUTPUT] = html_filename
+            run_reports.write_console_output_html(self, parameters, context, output)
+        if self.profile_script:
+            run_reports.write_profile_report(self, parameters, context, feedback)
+        if self.resource_monitor is not None:
+            run_reports.write_resource_usage(self, feedback)
 
         if self.save_output_values and self.output_values_filename:
             with open(self.output_values_filename, "r", encoding="utf8") as f:
@@ -463,6 +590,9 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                 if k not in self.results:
                     self.results[k] = v
 
+        self.phase_durations["outputs"] = time.perf_counter() - start
+
+        cached_results.store(output)
         return self.results
 
     def parse_output_values(self, lines):
@@ -508,15 +638,35 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         """
         Builds up the set of R commands to run for the script
         """
+        self.r_templates.bundle_threshold = RUtils.parameter_bundle_threshold()
+        self.r_templates.parameter_bundle = {}
+        self.r_templates.lazy_inputs = self.lazy_inputs or RUtils.lazy_inputs()
+        self.r_templates.raster_backend = self.raster_backend or RUtils.raster_backend()
+
         commands = []
         commands += self.build_script_header_commands(parameters, context, feedback)
-        commands += self.build_expressions(parameters, context, feedback)
-        commands += self.build_import_commands(parameters, context, feedback)
-        commands += self.build_r_commands(parameters, context, feedback)
+        value_commands = self.build_expressions(parameters, context, feedback)
+        value_commands += self.build_import_commands(parameters, context, feedback)
+        if self.r_templates.parameter_bundle:
+            commands += self.build_parameter_bundle_commands()
+        commands += value_commands
+        if self.profile_script:
+            commands += run_reports.profiled_r_commands(self, parameters, context, feedback)
+        else:
+            commands += self.build_r_commands(parameters, context, feedback)
         commands += self.build_export_commands(parameters, context, feedback)
 
         return commands
 
+    def build_parameter_bundle_commands(self):
+        """
+        Writes the values collected in the parameter bundle to a JSON file and returns the R commands reading it
+        """
+        bundle_filename = QgsProcessingUtils.generateTempFilename("processing_parameters.json")
+        with open(bundle_filename, "w", encoding="utf8") as f:
+            json.dump(self.r_templates.parameter_bundle, f)
+        return self.r_templates.load_parameter_bundle(QDir.fromNativeSeparators(bundle_filename))
+
     def build_export_commands(self, parameters, context, _):
         """
         Builds up the set of R commands for exporting results
@@ -526,7 +676,10 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
             if isinstance(out, QgsProcessingParameterRasterDestination):
                 dest = self.parameterAsOutputLayer(parameters, out.name(), context)
                 dest = dest.replace("\\", "/")
-                commands.append(self.r_templates.write_raster_output(out.name(), dest))
+                options = RUtils.merge_raster_output_options(
+                    RUtils.default_raster_output_options(), self.raster_output_options.get(out.name())
+                )
+                commands.append(self.r_templates.write_raster_output(out.name(), dest, options))
                 self.results[out.name()] = dest
             elif isinstance(out, QgsProcessingParameterVectorDestination):
                 dest = self.parameterAsOutputLayer(parameters, out.name(), context)
@@ -536,15 +689,34 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                 if ext.lower() == ".csv":
                     # CSV table export
                     commands.append(self.r_templates.write_csv_output(out.name(), dest))
+                elif ext.lower() == ".parquet" and out.dataType() == QgsProcessing.TypeVector:
+                    # Parquet table export, keeps the column types, CSV if R lacks the arrow package
+                    fallback = interchange.fallback_output(dest, table=True)
+                    commands.append(self.r_templates.write_parquet_output(out.name(), dest, fallback))
                 else:
-                    commands.append(self.r_templates.write_vector_output(out.name(), dest, filename))
+                    file_format = ext.lower()[1:]
+                    layer_options, config_options = interchange.vector_output_options(
+                        out.name(), parameters.get(out.name()), dest
+                    )
+                    commands.append(
+                        self.r_templates.write_vector_output(
+                            out.name(),
+                            dest,
+                            filename,
+                            # sf does not guess the drivers of all interchange formats from the extension
+                            interchange.DRIVERS[file_format] if file_format in ("fgb", "parquet") else None,
+                            layer_options=layer_options,
+                            config_options=config_options,
+                            fallback_path=interchange.fallback_output(dest),
+                        )
+                    )
                 self.results[out.name()] = dest
 
         if self.save_output_values:
             for out in self.outputDefinitions():
                 name = out.name()
                 # write values only if output is not already in results
-                if name in (self.R_CONSOLE_OUTPUT, self.RPLOTS):
+                if name in (self.R_CONSOLE_OUTPUT, self.RPLOTS, self.R_PROFILE_REPORT, self.R_RESOURCE_USAGE):
                     continue
                 if name in self.results:
                     continue
@@ -559,117 +731,12 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
 
         return commands
 
-    def load_vector_layer_from_parameter(self, name, parameters, context, feedback):
-        """
-        Creates a dedicated command to load a vector into the workspace.
-        :param name: name of the parameter
-        :param parameters: Parameters of the algorithm.
-        :param context: Processing context
-        """
-        if Qgis.QGIS_VERSION_INT >= 30900 and hasattr(self, "parameterAsCompatibleSourceLayerPathAndLayerName"):
-            # requires qgis 3.10 or later!
-            ogr_data_path, layer_name = self.parameterAsCompatibleSourceLayerPathAndLayerName(
-                parameters,
-                name,
-                context,
-                QgsVectorFileWriter.supportedFormatExtensions(),
-                feedback=feedback,
-                preferredFormat="gpkg",
-            )
-            if layer_name:
-                return self.r_templates.set_variable_vector(name, QDir.fromNativeSeparators(ogr_data_path), layer_name)
-
-            return self.r_templates.set_variable_vector(name, QDir.fromNativeSeparators(ogr_data_path))
-
-        ogr_data_path = self.parameterAsCompatibleSourceLayerPath(
-            parameters,
-            name,
-            context,
-            QgsVectorFileWriter.supportedFormatExtensions(),
-            feedback=feedback,
-            preferredFormat="gpkg",
-        )
-        ogr_layer = QgsVectorLayer(ogr_data_path, "", "ogr")
-        return self.load_vector_layer_command(name, ogr_layer, feedback)
-
-    def build_vector_layer_import_command(self, variable_name, layer, context, feedback):
-        """
-        Returns an import command for the specified vector layer, storing it in a variable
-        """
-        if layer is None:
-            return self.r_templates.set_variable_null(variable_name)
-
-        is_ogr_disk_based_layer = layer is not None and layer.dataProvider().name() == "ogr"
-        if is_ogr_disk_based_layer:
-            # we only support direct reading of disk based ogr layers -- not ogr postgres layers, etc
-            source_parts = QgsProviderRegistry.instance().decodeUri("ogr", layer.source())
-            if not source_parts.get("path"):
-                is_ogr_disk_based_layer = False
-            elif source_parts.get("layerId"):
-                # no support for directly reading layers by id in R
-                is_ogr_disk_based_layer = False
-
-        if not is_ogr_disk_based_layer:
-            # parameter is not a vector layer or not an OGR layer - try to convert to a source compatible with
-            # R OGR inputs and extract selection if required
-            path = QgsProcessingUtils.convertToCompatibleFormat(
-                layer,
-                False,
-                variable_name,
-                compatibleFormats=QgsVectorFileWriter.supportedFormatExtensions(),
-                preferredFormat="gpkg",
-                context=context,
-                feedback=feedback,
-            )
-            ogr_layer = QgsVectorLayer(path, "", "ogr")
-            return self.load_vector_layer_command(variable_name, ogr_layer, None)
-
-        # already an ogr disk based layer source
-        return self.load_vector_layer_command(variable_name, layer, None)
-
-    def load_vector_layer_command(self, name, layer, _):
-        """
-        Creates a command to load a vector layer into the workspace
-        """
-        source_parts = QgsProviderRegistry.instance().decodeUri("ogr", layer.source())
-        file_path = source_parts.get("path")
-        if self.pass_file_names:
-            return self.r_templates.set_variable_string(name, QDir.fromNativeSeparators(file_path))
-
-        layer_name = source_parts.get("layerName")
-        if layer_name:
-            return self.r_templates.set_variable_vector(name, QDir.fromNativeSeparators(file_path), layer=layer_name)
-
-        # no layer name -- readOGR expects the folder, with the filename as layer
-        return self.r_templates.set_variable_vector(name, QDir.fromNativeSeparators(file_path))
-
     def build_script_header_commands(self, _, __, ___):
         """
         Builds the set of script startup commands for the algorithm
         """
         return self.r_templates.build_script_header_commands(self.script)
 
-    def build_raster_layer_import_command(self, variable_name, layer):
-        """
-        Returns an import command for the specified raster layer, storing it in a variable
-        """
-        if layer is None:
-            return self.r_templates.set_variable_null(variable_name)
-
-        if layer.dataProvider().name() != "gdal":
-            raise QgsProcessingException(
-                self.tr("Layer {} is not a GDAL layer. Currently only GDAL based raster layers are supported.").format(
-                    variable_name
-                )
-            )
-
-        path = QgsProviderRegistry.instance().decodeUri(layer.dataProvider().name(), layer.source())["path"]
-        value = QDir.fromNativeSeparators(path)
-        if self.pass_file_names:
-            return self.r_templates.set_variable_string(variable_name, value)
-
-        return self.r_templates.set_variable_raster(variable_name, value)
-
     def build_expressions(self, parameters, context, feedback):  # pylint: disable=unused-argument
         """
         Builds set of R input data commands based on QGIS Expression variables.
@@ -677,16 +744,19 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         commands = []
 
         for line in self.r_templates.expressions:
-            param = create_parameter_from_string(line)
+            compiled = compiled_expression(line)
+            if not isinstance(compiled.parameter, QgsProcessingParameterExpression):
+                continue
 
-            if isinstance(param, QgsProcessingParameterExpression):
-                exp = QgsExpression(param.defaultValue())
+            cached, exp_result = compiled.cached_result(self.alg_context)
+            if not cached:
+                exp = compiled.copy_expression()
 
                 if not exp.prepare(self.alg_context):
                     raise QgsProcessingException(
                         self.tr(
                             "Expression with name `{0}` and value `{1}` is malformed. "
-                            "Error: {2}.".format(param.name(), param.defaultValue(), exp.parserErrorString())
+                            "Error: {2}.".format(compiled.name, exp.expression(), exp.parserErrorString())
                         )
                     )
 
@@ -696,10 +766,12 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                     raise QgsProcessingException(
                         self.tr(
                             "Expression with name `{0}` and value `{1}` can not be evaluated. " "Error: {2}."
-                        ).format(param.name(), param.defaultValue(), exp.evalErrorString())
+                        ).format(compiled.name, exp.expression(), exp.evalErrorString())
                     )
 
-                commands.append(self.expression_as_r_command(param, exp_result))
+                compiled.store_result(self.alg_context, exp_result)
+
+            commands.append(self.expression_as_r_command(compiled.parameter, exp_result))
 
         return commands
 
@@ -710,6 +782,7 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
         Builds the set of input commands for the algorithm
         """
         commands = []
+        layer_inputs = LayerInputs(self, parameters, context, feedback)
 
         for param in self.parameterDefinitions():
             if param.isDestination():
@@ -720,15 +793,14 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                 continue
 
             if isinstance(param, QgsProcessingParameterRasterLayer):
-                rl = self.parameterAsRasterLayer(parameters, param.name(), context)
-                commands.append(self.build_raster_layer_import_command(param.name(), rl))
+                commands.append(layer_inputs.raster_parameter_command(param.name()))
             elif isinstance(param, QgsProcessingParameterBand):
-                value = self.parameterAsInt(parameters, param.name(), context)
+                value = layer_inputs.band_number(param, self.parameterAsInt(parameters, param.name(), context))
                 commands.append(self.r_templates.set_variable_directly(param.name(), value))
             elif isinstance(param, QgsProcessingParameterVectorLayer):
-                commands.append(self.load_vector_layer_from_parameter(param.name(), parameters, context, feedback))
+                commands.append(layer_inputs.vector_parameter_command(param.name()))
             elif isinstance(param, QgsProcessingParameterFeatureSource):
-                commands.append(self.load_vector_layer_from_parameter(param.name(), parameters, context, feedback))
+                commands.append(layer_inputs.vector_parameter_command(param.name()))
             elif isinstance(param, QgsProcessingParameterExtent):
                 extent = self.parameterAsExtent(parameters, param.name(), context)
                 # Extent from raster package is "xmin, xmax, ymin, ymax" like in Processing
@@ -781,30 +853,7 @@ class RAlgorithm(QgsProcessingAlgorithm):  # pylint: disable=too-many-public-met
                 rgn: list = self.parameterAsRange(parameters, param.name(), context)
                 commands.extend(self.r_templates.set_range(param.name(), rgn))
             elif isinstance(param, QgsProcessingParameterMultipleLayers):
-                layer_idx = 0
-                layers = self.parameterAsLayerList(parameters, param.name(), context)
-                if param.layerType() == QgsProcessing.TypeRaster:
-                    for layer in layers:
-                        variable_name = "tempvar{}".format(layer_idx)
-                        commands.append(self.build_raster_layer_import_command(variable_name, layer))
-                        layer_idx += 1
-                else:
-                    for layer in layers:
-                        variable_name = "tempvar{}".format(layer_idx)
-                        commands.append(self.build_vector_layer_import_command(variable_name, layer, context, feedback))
-                        layer_idx += 1
-
-                s = ""
-                s += param.name()
-                s += " = list("
-                layer_idx = 0
-                for _ in layers:
-                    if layer_idx != 0:
-                        s += ","
-                    s += "tempvar{}".format(layer_idx)
-                    layer_idx += 1
-                s += ")"
-                commands.append(s)
+                commands.extend(layer_inputs.multiple_layers_commands(param))
 
             if Qgis.QGIS_VERSION_INT >= 31000:
                 if isinstance(param, QgsProcessingParameterColor):
@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    cache.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional
+
+from processing.tools.system import userFolder
+from qgis.core import QgsMapLayer, QgsProviderRegistry, QgsRasterLayer, QgsRectangle, QgsVectorLayer
+from qgis.PyQt.QtCore import QObject, Qt
+
+from processing_r.processing.utils import RUtils, log
+
+
+class DiskCache:
+    """
+    Size bounded cache of files on disk, the least recently used entries are evicted first
+
+    Each entry is a folder named by the entry key, holding the cached files and an entry.json
+    file with the entry details, its size and the times it was created and last used. Entries
+    are assembled in a staging folder and moved in place when complete, so concurrent runs never
+    see partial entries. Entries with an "expires" time in their details are removed once expired.
+    """
+
+    ENTRY_FILE = "entry.json"
+    STAGING_PREFIX = ".staging-"
+
+    def __init__(self, folder: str, max_size: int):
+        self.folder = folder
+        self.max_size = max_size
+
+    @staticmethod
+    def hash_key(values) -> str:
+        """
+        Returns a key for JSON serializable values
+        """
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode("utf8")).hexdigest()
+
+    def entry_folder(self, key: str) -> str:
+        """
+        Returns the folder of the entry with the given key
+        """
+        return os.path.join(self.folder, key)
+
+    def read_entry(self, key: str) -> Optional[Dict]:
+        """
+        Returns the details of an entry, or None if there is no entry for the key
+        """
+        try:
+            with open(os.path.join(self.entry_folder(key), DiskCache.ENTRY_FILE), encoding="utf8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_entry_file(folder: str, entry: Dict):
+        """
+        Writes the details of an entry, replacing the previous file atomically
+        """
+        path = os.path.join(folder, DiskCache.ENTRY_FILE)
+        with open(path + ".tmp", "w", encoding="utf8") as f:
+            json.dump(entry, f)
+        os.replace(path + ".tmp", path)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Returns the details of an entry and marks it as used, or None if there is no entry for the key
+        """
+        entry = self.read_entry(key)
+        if entry is None:
+            return None
+
+        if entry.get("expires") is not None and entry["expires"] < time.time():
+            self.remove(key)
+            return None
+
+        entry["last_used"] = time.time()
+        try:
+            DiskCache._write_entry_file(self.entry_folder(key), entry)
+        except OSError:
+            # evicted meanwhile
+            return None
+        return entry
+
+    def put(self, key: str, files: Dict[str, str], details: Dict) -> Optional[Dict]:
+        """
+        Stores files in a new entry and evicts old entries if the cache gets too large
+
+        :param key: entry key
+        :param files: dict of names of the files inside the entry to paths of the files to store,
+            folders are stored with all their content
+        :param details: JSON serializable details stored with the entry
+        :return: the stored entry details, or None if the entry does not fit in the cache or could not be stored
+        """
+        try:
+            return self._put(key, files, details)
+        except (OSError, shutil.Error) as e:
+            # a failing cache must never break the execution of a script
+            log("Could not store entry in the cache {0}: {1}".format(self.folder, e))
+            return None
+
+    def _put(self, key: str, files: Dict[str, str], details: Dict) -> Optional[Dict]:
+        """
+        Stores files in a new entry, see put
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=DiskCache.STAGING_PREFIX, dir=self.folder)
+        try:
+            for name, source in files.items():
+                target = os.path.join(staging, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if os.path.isdir(source):
+                    shutil.copytree(source, target)
+                else:
+                    shutil.copy2(source, target)
+
+            now = time.time()
+            entry = dict(details)
+            entry.update({"key": key, "size": RUtils.file_size(staging), "created": now, "last_used": now})
+            if entry["size"] > self.max_size:
+                shutil.rmtree(staging, ignore_errors=True)
+                return None
+            DiskCache._write_entry_file(staging, entry)
+
+            try:
+                os.rename(staging, self.entry_folder(key))
+            except OSError:
+                # the same entry was stored meanwhile by another run
+                shutil.rmtree(staging, ignore_errors=True)
+                return self.read_entry(key)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.evict()
+        return entry
+
+    def link_files(self, key: str, folder: str):
+        """
+        Makes the files of an entry available in a folder, as hard links if possible so that they are not
+        copied and stay valid even if the entry gets evicted, or as copies otherwise
+        """
+        source = self.entry_folder(key)
+        os.makedirs(folder, exist_ok=True)
+        for name in os.listdir(source):
+            if name == DiskCache.ENTRY_FILE:
+                continue
+            try:
+                os.link(os.path.join(source, name), os.path.join(folder, name))
+            except OSError:
+                shutil.copy2(os.path.join(source, name), os.path.join(folder, name))
+
+    def entries(self) -> List[Dict]:
+        """
+        Returns the details of all entries, most recently used first
+        """
+        if not os.path.isdir(self.folder):
+            return []
+
+        entries = []
+        for key in os.listdir(self.folder):
+            if key.startswith(DiskCache.STAGING_PREFIX):
+                continue
+            entry = self.read_entry(key)
+            if entry is not None:
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["last_used"], reverse=True)
+
+    def total_size(self) -> int:
+        """
+        Returns the size of all entries in bytes
+        """
+        return sum(entry["size"] for entry in self.entries())
+
+    def remove(self, key: str):
+        """
+        Removes an entry
+        """
+        shutil.rmtree(self.entry_folder(key), ignore_errors=True)
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in its maximum size
+        """
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        while entries and total > self.max_size:
+            entry = entries.pop()
+            self.remove(entry["key"])
+            total -= entry["size"]
+
+    def clear(self):
+        """
+        Removes all entries
+        """
+        if os.path.isdir(self.folder):
+            for key in os.listdir(self.folder):
+                self.remove(key)
+
+
+class ResultCache(DiskCache):
+    """
+    Cache of the results of R scripts, keyed by the script, its parameter values and its inputs
+    """
+
+    def __init__(self, folder: Optional[str] = None, max_size: Optional[int] = None):
+        super().__init__(
+            folder if folder else ResultCache.default_folder(),
+            max_size if max_size is not None else RUtils.result_cache_size(),
+        )
+
+    @staticmethod
+    def default_folder() -> str:
+        """
+        Returns the folder of the result cache in the user profile folder
+        """
+        return os.path.join(userFolder(), "r_result_cache")
+
+
+class ConversionCache(DiskCache):
+    """
+    Cache of layers exported to a format readable by R, keyed by the layer source and its modification state
+
+    Changes of layers which are not files are tracked by counting data changes signalled by the layers. As
+    changes made outside of QGIS can not be detected, such layers are only cached if a maximum age is set,
+    and their entries expire after it.
+    """
+
+    _generations = {}
+    _connections = {}
+    _generations_lock = threading.Lock()
+
+    def __init__(self, folder: Optional[str] = None, max_size: Optional[int] = None, max_age: Optional[int] = None):
+        super().__init__(
+            folder if folder else ConversionCache.default_folder(),
+            max_size if max_size is not None else RUtils.conversion_cache_size(),
+        )
+        self.max_age = max_age if max_age is not None else RUtils.conversion_cache_max_age()
+
+    def caches(self, layer: QgsMapLayer) -> bool:
+        """
+        Returns True if exports of the layer are cached: the cache is enabled, and the layer is stored in a file
+        or a maximum age is set for layers which are not
+        """
+        return self.max_size > 0 and (self.max_age > 0 or ConversionCache.layer_file(layer) is not None)
+
+    @staticmethod
+    def default_folder() -> str:
+        """
+        Returns the folder of the conversion cache in the user profile folder
+        """
+        return os.path.join(userFolder(), "r_conversion_cache")
+
+    @staticmethod
+    def layer_generation(layer: QgsMapLayer) -> int:
+        """
+        Returns the number of data changes of a layer since the layer was first seen by the cache. The count is
+        released when the layer is deleted, which includes its removal from the project.
+        """
+        with ConversionCache._generations_lock:
+            if layer.id() not in ConversionCache._generations:
+                ConversionCache._generations[layer.id()] = 0
+                # layers are usually first seen from a task thread, a queued connection would never be delivered
+                ConversionCache._connections[layer.id()] = [
+                    layer.dataChanged.connect(partial(ConversionCache._layer_changed, layer.id()), Qt.DirectConnection),
+                    layer.willBeDeleted.connect(
+                        partial(ConversionCache._layer_deleted, layer.id()), Qt.DirectConnection
+                    ),
+                ]
+            return ConversionCache._generations[layer.id()]
+
+    @staticmethod
+    def _layer_changed(layer_id: str):
+        """
+        Counts a data change of a layer
+        """
+        with ConversionCache._generations_lock:
+            if layer_id in ConversionCache._generations:
+                ConversionCache._generations[layer_id] += 1
+
+    @staticmethod
+    def _layer_deleted(layer_id: str):
+        """
+        Forgets the data changes of a deleted layer and disconnects from its signals
+        """
+        with ConversionCache._generations_lock:
+            ConversionCache._generations.pop(layer_id, None)
+            connections = ConversionCache._connections.pop(layer_id, [])
+        for connection in connections:
+            QObject.disconnect(connection)
+
+    @staticmethod
+    def layer_key(
+        layer: QgsVectorLayer,
+        selected_only: bool,
+        fields: Optional[List[str]] = None,
+        geometry: bool = True,
+        file_format: str = "gpkg",
+    ) -> Optional[str]:
+        """
+        Returns the key of the exported layer, or None if the layer has uncommitted edits and can not be cached
+        """
+        if layer.isModified():
+            return None
+
+        path = ConversionCache.layer_file(layer)
+        values = {
+            "provider": layer.providerType(),
+            "source": layer.source(),
+            "subset": layer.subsetString(),
+            "selection": sorted(layer.selectedFeatureIds()) if selected_only else None,
+            "generation": ConversionCache.layer_generation(layer),
+            "fields": fields,
+            "geometry": geometry,
+            "format": file_format,
+        }
+        if path:
+            values["files"] = RUtils.file_fingerprint(path)
+        else:
+            values["features"] = layer.dataProvider().featureCount()
+            values["extent"] = layer.dataProvider().extent().toString()
+        return DiskCache.hash_key(values)
+
+    @staticmethod
+    def raster_layer_key(layer: QgsRasterLayer, extent: QgsRectangle, width: int, height: int) -> str:
+        """
+        Returns the key of a window of a raster layer exported at the given size
+        """
+        return DiskCache.hash_key(
+            {
+                "provider": layer.providerType(),
+                "source": layer.source(),
+                "generation": ConversionCache.layer_generation(layer),
+                "extent": extent.toString(17),
+                "width": width,
+                "height": height,
+            }
+        )
+
+    @staticmethod
+    def layer_file(layer: QgsMapLayer) -> Optional[str]:
+        """
+        Returns the path of the file of a layer, or None if the layer is not stored in a file
+        """
+        path = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source()).get("path")
+        return path if path and os.path.exists(path) else None
+
+    def store(self, key: str, layer: QgsMapLayer, path: str, files: Optional[List[str]] = None):
+        """
+        Stores an exported layer, with the files of the export if they are not all named after the exported file.
+        Entries of layers which are not files expire after the maximum age, see caches().
+        """
+        self.put(
+            key,
+            {os.path.basename(file): file for file in (files if files is not None else RUtils.dataset_files(path))},
+            {
+                "file": os.path.basename(path),
+                "source": layer.publicSource(),
+                "expires": None if ConversionCache.layer_file(layer) else time.time() + self.max_age,
+            },
+        )
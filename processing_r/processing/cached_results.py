@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    cached_results.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from qgis.core import (
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterFolderDestination,
+    QgsProcessingParameterRasterDestination,
+    QgsProcessingParameterVectorDestination,
+    QgsProviderRegistry,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication
+
+from processing_r.processing import run_reports
+from processing_r.processing.cache import DiskCache, ResultCache
+from processing_r.processing.utils import RUtils
+
+
+class CachedResults:
+    """
+    Stores the results of successful executions of an R script algorithm in the result cache, and restores
+    them instead of running R when the script is run again with the same inputs
+    """
+
+    def __init__(self, alg, parameters, context, feedback):
+        self.alg = alg
+        self.parameters = parameters
+        self.context = context
+        self.feedback = feedback
+        self.cache_key = None
+
+    def lookup(self) -> bool:
+        """
+        Restores the results of the algorithm from the result cache if caching is enabled for it, returns
+        True if R does not need to be run
+        """
+        if not (self.alg.cacheable or RUtils.cache_results()) or self.alg.profile_script:
+            return False
+        start = time.perf_counter()
+        self.cache_key = self.key()
+        restored = self.cache_key is not None and self.restore(self.cache_key)
+        self.alg.phase_durations["result_cache"] = time.perf_counter() - start
+        return restored
+
+    def key(self) -> Optional[str]:
+        """
+        Returns the key of the results in the result cache. The key combines the script, the parameter values,
+        the values of the expressions and names, sizes and modification times of the input files.
+
+        Returns None if an input is not file based, as the cache can not tell whether it changed.
+        """
+        inputs = {}
+        for param in self.alg.parameterDefinitions():
+            if param.isDestination() or self.parameters.get(param.name()) is None:
+                continue
+            if isinstance(param, QgsProcessingParameterFile):
+                path = self.alg.parameterAsFile(self.parameters, param.name(), self.context)
+                inputs[param.name()] = RUtils.file_fingerprint(path) if path else []
+                continue
+            layers = run_reports.parameter_layers(self.alg, param, self.parameters, self.context)
+            if layers is None:
+                continue
+            inputs[param.name()] = []
+            for layer in layers:
+                path = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source()).get("path")
+                if not path or not os.path.exists(path):
+                    self.feedback.pushInfo(
+                        self.tr("Input {} is not a file, results of the script are not cached.").format(param.name())
+                    )
+                    return None
+                subset = layer.subsetString() if isinstance(layer, QgsVectorLayer) else ""
+                inputs[param.name()].append([subset, RUtils.file_fingerprint(path)])
+
+        # values passed in the parameter bundle are not part of the expression commands
+        self.alg.r_templates.bundle_threshold = RUtils.parameter_bundle_threshold()
+        self.alg.r_templates.parameter_bundle = {}
+        expressions = self.alg.build_expressions(self.parameters, self.context, self.feedback)
+
+        return DiskCache.hash_key(
+            {
+                "script": hashlib.sha256(self.alg.script.encode("utf8")).hexdigest(),
+                "parameters": run_reports.parameters_fingerprint(self.alg, self.parameters, self.context),
+                "expressions": expressions,
+                "bundled_values": self.alg.r_templates.parameter_bundle,
+                "inputs": inputs,
+                "raster_backend": self.alg.raster_backend or RUtils.raster_backend(),
+                "raster_output_options": RUtils.default_raster_output_options(),
+            }
+        )
+
+    def destination(self, param: QgsProcessingParameterDefinition) -> str:
+        """
+        Returns the path requested for a destination parameter
+        """
+        if isinstance(param, (QgsProcessingParameterRasterDestination, QgsProcessingParameterVectorDestination)):
+            return self.alg.parameterAsOutputLayer(self.parameters, param.name(), self.context).replace("\\", "/")
+        if isinstance(param, QgsProcessingParameterFileDestination):
+            return self.alg.parameterAsFileOutput(self.parameters, param.name(), self.context)
+        return self.alg.parameterAsString(self.parameters, param.name(), self.context)
+
+    def destination_parameters(self) -> List[QgsProcessingParameterDefinition]:
+        """
+        Returns the destination parameters whose outputs are stored in the result cache
+        """
+        return [
+            param
+            for param in self.alg.destinationParameterDefinitions()
+            if param.name() not in (self.alg.R_CONSOLE_OUTPUT, self.alg.RPLOTS, self.alg.R_PROFILE_REPORT)
+        ]
+
+    def store(self, console_output: List[str]):
+        """
+        Stores the outputs of a finished successful execution in the result cache, if it was looked up
+        """
+        if self.cache_key is None or self.alg.r_exit_status != 0:
+            return
+        files = {}
+        outputs = {}
+        for param in self.destination_parameters():
+            path = self.alg.results.get(param.name())
+            if not path or not os.path.exists(path):
+                # incomplete results are not cached
+                return
+            if isinstance(param, QgsProcessingParameterFolderDestination):
+                files[param.name()] = path
+            else:
+                for file in RUtils.dataset_files(path):
+                    files["{}/{}".format(param.name(), os.path.basename(file))] = file
+            outputs[param.name()] = os.path.basename(path)
+
+        if self.alg.show_plots and os.path.exists(self.alg.plots_filename):
+            files["{}/plots.png".format(self.alg.RPLOTS)] = self.alg.plots_filename
+
+        values = {
+            name: value
+            for name, value in self.alg.results.items()
+            if name not in outputs and self.alg.parameterDefinition(name) is None and name != self.alg.R_RESOURCE_USAGE
+        }
+
+        ResultCache().put(
+            self.cache_key,
+            files,
+            {"algorithm_id": self.alg.id(), "outputs": outputs, "values": values, "console": console_output},
+        )
+
+    def restore(self, key: str) -> bool:
+        """
+        Copies cached outputs to the requested destinations, returns False if the results are not cached
+        """
+        cache = ResultCache()
+        entry = cache.get(key)
+        if entry is None:
+            return False
+
+        destinations = {}
+        for param in self.destination_parameters():
+            stored = entry["outputs"].get(param.name())
+            destination = self.destination(param)
+            if stored is None or os.path.splitext(stored)[1].lower() != os.path.splitext(destination)[1].lower():
+                # cached in a different format
+                return False
+            destinations[param.name()] = destination
+
+        folder = cache.entry_folder(key)
+        try:
+            for name, destination in destinations.items():
+                source = os.path.join(folder, name)
+                if isinstance(self.alg.parameterDefinition(name), QgsProcessingParameterFolderDestination):
+                    shutil.copytree(source, destination, dirs_exist_ok=True)
+                    continue
+                Path(destination).parent.mkdir(parents=True, exist_ok=True)
+                stored_stem = os.path.splitext(entry["outputs"][name])[0]
+                destination_stem = os.path.splitext(os.path.basename(destination))[0]
+                for file in os.listdir(source):
+                    # sidecar files are renamed along with the main file
+                    target = os.path.join(os.path.dirname(destination), destination_stem + file[len(stored_stem) :])
+                    shutil.copy2(os.path.join(source, file), target)
+        except (OSError, shutil.Error):
+            # evicted while copying
+            return False
+
+        self.feedback.pushInfo(self.tr("Results restored from the result cache, R was not run."))
+        # only results of successful runs are cached
+        self.alg.r_exit_status = 0
+        self.alg.cache_hit = True
+        for line in entry["console"]:
+            self.feedback.pushConsoleInfo(line)
+
+        self.alg.results.update(destinations)
+        for name, value in entry["values"].items():
+            self.alg.results.setdefault(name, value)
+
+        if self.alg.show_plots:
+            html_filename = self.alg.parameterAsFileOutput(self.parameters, self.alg.RPLOTS, self.context)
+            plots = os.path.join(folder, self.alg.RPLOTS, "plots.png")
+            if html_filename and os.path.exists(plots):
+                self.alg.plots_filename = os.path.splitext(html_filename)[0] + ".png"
+                shutil.copy2(plots, self.alg.plots_filename)
+                run_reports.write_plots_html(self.alg, self.parameters, self.context)
+        if self.alg.show_console_output:
+            run_reports.write_console_output_html(self.alg, self.parameters, self.context, entry["console"])
+        return True
+
+    def tr(self, string, context=""):
+        """
+        Translates a string
+        """
+        if context == "":
+            context = "RAlgorithmProvider"
+        return QCoreApplication.translate(context, string)
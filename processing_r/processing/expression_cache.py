@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    expression_cache.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import threading
+from typing import Optional, Tuple
+
+from qgis.core import QgsExpression, QgsExpressionContext, QgsGeometry, QgsProcessingParameterExpression
+from qgis.PyQt.QtCore import QDate, QDateTime, Qt, QTime
+
+from processing_r.processing.parameters import create_parameter_from_string
+
+# built-in functions whose results only depend on their arguments. Results of expressions calling any other
+# function, such as now(), parameter() or custom @qgsfunction functions, are never reused
+PURE_FUNCTIONS = {
+    # conditionals
+    "coalesce",
+    "if",
+    "nullif",
+    "try",
+    # math
+    "abs",
+    "acos",
+    "asin",
+    "atan",
+    "atan2",
+    "ceil",
+    "clamp",
+    "cos",
+    "degrees",
+    "exp",
+    "floor",
+    "ln",
+    "log",
+    "log10",
+    "max",
+    "min",
+    "pi",
+    "radians",
+    "round",
+    "scale_exp",
+    "scale_exponential",
+    "scale_linear",
+    "sin",
+    "sqrt",
+    "tan",
+    # conversions
+    "to_date",
+    "to_datetime",
+    "to_decimal",
+    "to_dm",
+    "to_dms",
+    "to_int",
+    "to_interval",
+    "to_real",
+    "to_string",
+    "to_time",
+    # dates and times, now() is volatile
+    "age",
+    "datetime_from_epoch",
+    "day",
+    "day_of_week",
+    "epoch",
+    "format_date",
+    "hour",
+    "make_date",
+    "make_datetime",
+    "make_interval",
+    "make_time",
+    "minute",
+    "month",
+    "second",
+    "week",
+    "year",
+    # strings
+    "ascii",
+    "base64_decode",
+    "base64_encode",
+    "char",
+    "concat",
+    "format",
+    "format_number",
+    "hamming_distance",
+    "hash",
+    "left",
+    "length",
+    "levenshtein",
+    "longest_common_substring",
+    "lower",
+    "lpad",
+    "ltrim",
+    "md5",
+    "regexp_match",
+    "regexp_matches",
+    "regexp_replace",
+    "regexp_substr",
+    "replace",
+    "right",
+    "rpad",
+    "rtrim",
+    "sha256",
+    "soundex",
+    "strpos",
+    "substr",
+    "title",
+    "trim",
+    "upper",
+    "wordwrap",
+    # arrays and maps
+    "array",
+    "array_all",
+    "array_append",
+    "array_cat",
+    "array_contains",
+    "array_count",
+    "array_distinct",
+    "array_find",
+    "array_first",
+    "array_get",
+    "array_insert",
+    "array_last",
+    "array_length",
+    "array_majority",
+    "array_max",
+    "array_mean",
+    "array_median",
+    "array_min",
+    "array_minority",
+    "array_prepend",
+    "array_remove_all",
+    "array_remove_at",
+    "array_replace",
+    "array_reverse",
+    "array_slice",
+    "array_sort",
+    "array_sum",
+    "array_to_string",
+    "from_json",
+    "generate_series",
+    "hstore_to_map",
+    "map",
+    "map_akeys",
+    "map_avals",
+    "map_concat",
+    "map_delete",
+    "map_exist",
+    "map_get",
+    "map_insert",
+    "map_to_hstore",
+    "string_to_array",
+    "to_json",
+    # colors
+    "color_cmyk",
+    "color_cmyka",
+    "color_hsl",
+    "color_hsla",
+    "color_hsv",
+    "color_hsva",
+    "color_part",
+    "color_rgb",
+    "color_rgba",
+    "darker",
+    "lighter",
+    "set_color_part",
+    # geometries given as values, functions of the feature geometry such as $area are not pure
+    "area",
+    "azimuth",
+    "boundary",
+    "bounds",
+    "bounds_height",
+    "bounds_width",
+    "buffer",
+    "centroid",
+    "combine",
+    "contains",
+    "convex_hull",
+    "crosses",
+    "difference",
+    "disjoint",
+    "distance",
+    "end_point",
+    "equals",
+    "extend",
+    "geom_from_gml",
+    "geom_from_wkb",
+    "geom_from_wkt",
+    "geom_to_wkb",
+    "geom_to_wkt",
+    "geometry_n",
+    "intersection",
+    "intersects",
+    "is_closed",
+    "is_empty",
+    "is_valid",
+    "m",
+    "make_circle",
+    "make_ellipse",
+    "make_line",
+    "make_point",
+    "make_point_m",
+    "make_polygon",
+    "make_rectangle_3points",
+    "make_regular_polygon",
+    "make_square",
+    "make_triangle",
+    "make_valid",
+    "num_geometries",
+    "num_points",
+    "overlaps",
+    "perimeter",
+    "point_n",
+    "point_on_surface",
+    "project",
+    "reverse",
+    "rotate",
+    "simplify",
+    "smooth",
+    "start_point",
+    "sym_difference",
+    "touches",
+    "transform",
+    "translate",
+    "within",
+    "x",
+    "x_max",
+    "x_min",
+    "y",
+    "y_max",
+    "y_min",
+    "z",
+}
+
+
+class CompiledExpression:
+    """
+    Expression parameter parsed once, with its last result kept for reuse while the variables it uses do not change
+    """
+
+    def __init__(self, line: str):
+        self.parameter = create_parameter_from_string(line)
+        self.name = self.parameter.name() if self.parameter is not None else ""
+        self.expression = QgsExpression(
+            self.parameter.defaultValue() if isinstance(self.parameter, QgsProcessingParameterExpression) else ""
+        )
+        self.variables = sorted(self.expression.referencedVariables())
+        self.functions = sorted(self.expression.referencedFunctions())
+        self.volatile = not PURE_FUNCTIONS.issuperset(self.functions)
+        self._result_key = None
+        self._result = None
+        self._lock = threading.Lock()
+
+    def context_key(self, context: QgsExpressionContext) -> Optional[Tuple]:
+        """
+        Returns the values of the variables used by the expression, or None if the result can not be reused
+        """
+        if self.volatile:
+            return None
+
+        values = []
+        for variable in self.variables:
+            value = context.variable(variable)
+            if isinstance(value, QgsGeometry):
+                value = value.asWkt()
+            elif isinstance(value, (QDate, QDateTime, QTime)):
+                value = value.toString(Qt.ISODateWithMs)
+            elif isinstance(value, list):
+                value = repr(value)
+            elif value is not None and not isinstance(value, (str, int, float, bool)):
+                # layers and other objects can not be compared
+                return None
+            values.append((variable, type(value).__name__, value))
+        return tuple(values)
+
+    def cached_result(self, context: QgsExpressionContext) -> Tuple[bool, object]:
+        """
+        Returns a tuple of whether a result for the context is cached and the cached result
+        """
+        key = self.context_key(context)
+        with self._lock:
+            if key is not None and key == self._result_key:
+                return True, self._result
+        return False, None
+
+    def store_result(self, context: QgsExpressionContext, result):
+        """
+        Keeps the result of an evaluation for the context
+        """
+        key = self.context_key(context)
+        with self._lock:
+            self._result_key = key
+            self._result = result
+
+    def copy_expression(self) -> QgsExpression:
+        """
+        Returns a copy of the parsed expression to be prepared and evaluated, copies share the parsed expression
+        """
+        return QgsExpression(self.expression)
+
+
+_compiled_expressions = {}
+_compiled_expressions_lock = threading.Lock()
+
+
+def compiled_expression(line: str) -> CompiledExpression:
+    """
+    Returns the compiled expression parameter for a script header line, parsing the line only the first time
+    """
+    with _compiled_expressions_lock:
+        compiled = _compiled_expressions.get(line)
+        if compiled is None:
+            compiled = CompiledExpression(line)
+            _compiled_expressions[line] = compiled
+        return compiled
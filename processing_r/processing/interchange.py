@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    interchange.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from osgeo import ogr
+from qgis.core import (
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProcessingOutputLayerDefinition,
+    QgsProcessingUtils,
+)
+
+from processing_r.processing.utils import RUtils
+
+# GDAL drivers writing the formats used to exchange layers with R, by file extension
+DRIVERS = {"gpkg": "GPKG", "fgb": "FlatGeobuf", "parquet": "Parquet"}
+
+# formats tried for spatial layers when the format is chosen automatically, fastest round trip first
+VECTOR_FORMATS = ["fgb", "parquet", "gpkg"]
+
+# layer creation options of the formats, exported layers are written once and read once by R
+LAYER_OPTIONS = {"fgb": ["SPATIAL_INDEX=NO"]}
+
+# layer creation and GDAL configuration options used by R writing temporary outputs
+OUTPUT_LAYER_OPTIONS = {"gpkg": ["SPATIAL_INDEX=NO"]}
+OUTPUT_CONFIG_OPTIONS = {"gpkg": {"OGR_SQLITE_SYNCHRONOUS": "OFF", "OGR_SQLITE_CACHE": "512"}}
+
+# formats of outputs which R may not be able to write, R writes them as GeoPackage or CSV instead
+FALLBACK_OUTPUT_FORMATS = ["fgb", "parquet"]
+
+
+def gdal_has_driver(driver_name: str) -> bool:
+    """
+    Returns True if the GDAL library used by QGIS has a vector driver
+    """
+    return ogr.GetDriverByName(driver_name) is not None
+
+
+def parquet_supported() -> bool:
+    """
+    Returns True if attribute tables can be exchanged with R as Parquet files, which needs the GDAL
+    Parquet driver in QGIS and the arrow package in R
+    """
+    return gdal_has_driver(DRIVERS["parquet"]) and RUtils.is_r_package_installed("arrow")
+
+
+def vector_format() -> str:
+    """
+    Returns the extension of the format used to export spatial layers for R. A configured format is used if
+    QGIS can write it, otherwise the first format of VECTOR_FORMATS which both QGIS and sf in R support.
+    """
+    return _choose_vector_format(RUtils.interchange_format())
+
+
+def output_format() -> str:
+    """
+    Returns the extension of the configured format of temporary vector outputs, GeoPackage if QGIS can not write
+    it. R is not asked which formats it supports, as the format is needed by QGIS before any algorithm runs.
+    """
+    configured = RUtils.output_format()
+    if configured in DRIVERS and gdal_has_driver(DRIVERS[configured]):
+        return configured
+    return "gpkg"
+
+
+def output_table_format() -> str:
+    """
+    Returns the extension of the format of temporary table outputs, Parquet if it is the configured output format
+    and QGIS can read it, CSV otherwise
+    """
+    return "parquet" if output_format() == "parquet" else "csv"
+
+
+def is_temporary_output(path: str) -> bool:
+    """
+    Returns True if an output path is in the Processing temporary folder, as temporary outputs are
+    """
+    folder = os.path.normcase(os.path.abspath(QgsProcessingUtils.tempFolder()))
+    return os.path.normcase(os.path.abspath(path)).startswith(folder + os.sep)
+
+
+def vector_output_options(name: str, value, path: str) -> Tuple[Optional[List[str]], Optional[Dict[str, str]]]:
+    """
+    Returns the layer creation and GDAL configuration options R writes a vector output with. Layer creation
+    options given in the "layerOptions" create options of the output layer definition are used as they are,
+    temporary outputs are written for speed otherwise, e.g. without spatial index.
+    """
+    options = value.createOptions.get("layerOptions") if isinstance(value, QgsProcessingOutputLayerDefinition) else None
+    if options:
+        if isinstance(options, str):
+            options = [options]
+        for option in options:
+            if "=" not in option:
+                raise QgsProcessingException(
+                    RUtils.tr("Invalid layer creation option {0} of output {1}, options are KEY=VALUE.").format(
+                        option, name
+                    )
+                )
+        return list(options), None
+
+    if is_temporary_output(path):
+        file_format = os.path.splitext(path)[1].lower()[1:]
+        return OUTPUT_LAYER_OPTIONS.get(file_format), OUTPUT_CONFIG_OPTIONS.get(file_format)
+    return None, None
+
+
+def fallback_output(path: str, table: bool = False) -> str:
+    """
+    Returns the path R writes an output to when it can not write the format of the output, a CSV file for
+    attribute tables and a GeoPackage otherwise, next to the requested path
+    """
+    return os.path.splitext(path)[0] + (".csv" if table else ".gpkg")
+
+
+def use_fallback_outputs(results: Dict, context: QgsProcessingContext, feedback: QgsProcessingFeedback):
+    """
+    Points the results of outputs which R wrote in their fallback format to the written files, and loads
+    these files instead of the requested ones once the algorithm finished
+    """
+    layers = context.layersToLoadOnCompletion()
+    for name, path in results.items():
+        if not isinstance(path, str) or os.path.splitext(path)[1].lower()[1:] not in FALLBACK_OUTPUT_FORMATS:
+            continue
+        fallbacks = [fallback_output(path, table=True), fallback_output(path)]
+        fallback = next((fallback for fallback in fallbacks if os.path.exists(fallback)), None)
+        if os.path.exists(path) or fallback is None:
+            continue
+        feedback.pushInfo(
+            RUtils.tr("R can not write the format of output {0}, it was written to {1} instead.").format(name, fallback)
+        )
+        results[name] = fallback
+        if path in layers:
+            layers[fallback] = layers.pop(path)
+    context.setLayersToLoadOnCompletion(layers)
+
+
+def _choose_vector_format(configured: str) -> str:
+    """
+    Returns the configured format if QGIS supports it, or the first format of VECTOR_FORMATS supported by QGIS
+    and sf if the format is chosen automatically
+    """
+    if configured in DRIVERS:
+        return configured if gdal_has_driver(DRIVERS[configured]) else "gpkg"
+
+    r_drivers = RUtils.r_vector_drivers()
+    for file_format in VECTOR_FORMATS:
+        if gdal_has_driver(DRIVERS[file_format]) and DRIVERS[file_format] in r_drivers:
+            return file_format
+    return "gpkg"
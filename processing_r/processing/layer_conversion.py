@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    layer_conversion.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import math
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from qgis.core import (
+    QgsMapLayer,
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProcessingUtils,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication, QDir
+
+from processing_r.processing import interchange
+from processing_r.processing.cache import ConversionCache
+from processing_r.processing.layer_export import RasterLayerExport, VectorLayerExport, run_exports
+from processing_r.processing.raster_inputs import mosaic_raster_path
+from processing_r.processing.utils import RUtils
+
+
+class LayerConverter:
+    """
+    Exports input layers which R can not read to files, reusing the exports of previous runs from the
+    conversion cache if the layers did not change meanwhile
+    """
+
+    def __init__(self, context: QgsProcessingContext, feedback: QgsProcessingFeedback):
+        self.context = context
+        self.feedback = feedback
+        self.cache = ConversionCache()
+
+    def convert_vector_layer(
+        self,
+        layer: QgsVectorLayer,
+        variable_name: str,
+        *,
+        selected_only: bool = False,
+        fields: Optional[List[str]] = None,
+        geometry: bool = True,
+        file_format: Optional[str] = None,
+    ) -> str:
+        """
+        Exports a vector layer to a file readable by R. If fields are given, only these fields are exported,
+        and geometries are not exported if geometry is False. The file is written in the given interchange
+        format, see interchange.DRIVERS, by default in the format used for spatial layers.
+        """
+        if file_format is None:
+            file_format = interchange.vector_format() if geometry and layer.isSpatial() else "gpkg"
+        key = (
+            ConversionCache.layer_key(layer, selected_only, fields, geometry, file_format)
+            if self.cache.caches(layer)
+            else None
+        )
+        path = self.cached_path(key, variable_name)
+        if path is not None:
+            return path
+
+        if (fields is not None or not geometry or file_format != "gpkg") and VectorLayerExport.is_supported():
+            path = VectorLayerExport(
+                layer,
+                selected_only,
+                QgsProcessingUtils.generateTempFilename("{0}.{1}".format(variable_name, file_format)),
+                self.context,
+                fields=fields,
+                geometry=geometry,
+                driver_name=interchange.DRIVERS[file_format],
+                layer_options=interchange.LAYER_OPTIONS.get(file_format),
+            ).run(self.feedback)
+        else:
+            path = QgsProcessingUtils.convertToCompatibleFormat(
+                layer,
+                selected_only,
+                variable_name,
+                compatibleFormats=QgsVectorFileWriter.supportedFormatExtensions(),
+                preferredFormat=file_format,
+                context=self.context,
+                feedback=self.feedback,
+            )
+        if self.feedback.isCanceled():
+            # the export is incomplete, it must not be read nor cached
+            raise QgsProcessingException(self.tr("Export of layer {} was canceled.").format(variable_name))
+        self.store(key, layer, path)
+        return path
+
+    def convert_vector_layers(self, layers: Dict[str, QgsVectorLayer]) -> Dict[str, str]:
+        """
+        Exports vector layers, by the name of their variable, concurrently on a pool of worker threads, and
+        returns the paths of the files by the name of the variables
+        """
+        threads = RUtils.export_threads()
+        if threads <= 1 or not VectorLayerExport.is_supported():
+            return {
+                variable_name: self.convert_vector_layer(layer, variable_name)
+                for variable_name, layer in layers.items()
+            }
+
+        paths = {}
+        exports = []
+        vector_format = interchange.vector_format()
+        for variable_name, layer in layers.items():
+            file_format = vector_format if layer.isSpatial() else "gpkg"
+            key = ConversionCache.layer_key(layer, False, file_format=file_format) if self.cache.caches(layer) else None
+            path = self.cached_path(key, variable_name)
+            if path is not None:
+                paths[variable_name] = path
+                continue
+            export = VectorLayerExport(
+                layer,
+                False,
+                QgsProcessingUtils.generateTempFilename("{0}.{1}".format(variable_name, file_format)),
+                self.context,
+                driver_name=interchange.DRIVERS[file_format],
+                layer_options=interchange.LAYER_OPTIONS.get(file_format),
+            )
+            exports.append((variable_name, key, layer, export))
+
+        for done, (index, path) in enumerate(
+            run_exports([export for _, _, _, export in exports], threads, self.feedback), start=1
+        ):
+            variable_name, key, layer, _ = exports[index]
+            paths[variable_name] = path
+            if not self.feedback.isCanceled():
+                self.store(key, layer, path)
+            self.feedback.pushInfo(self.tr("Exported layer {0} ({1}/{2}).").format(layer.name(), done, len(exports)))
+
+        if self.feedback.isCanceled():
+            raise QgsProcessingException(self.tr("Export of input layers was canceled."))
+        return paths
+
+    def export_raster_layer(
+        self, layer: QgsRasterLayer, variable_name: str, extent: QgsRectangle, cell_size: Tuple[float, float]
+    ) -> str:
+        """
+        Exports the extent of a raster layer which GDAL can not read at the given cell width and height to
+        GeoTIFF files, in blocks of rows written concurrently, and returns the path of a VRT mosaic of the files
+        """
+        cell_width, cell_height = cell_size
+        width = max(int(math.ceil(extent.width() / cell_width)), 1)
+        height = max(int(math.ceil(extent.height() / cell_height)), 1)
+        extent = QgsRectangle(
+            extent.xMinimum(),
+            extent.yMaximum() - height * cell_height,
+            extent.xMinimum() + width * cell_width,
+            extent.yMaximum(),
+        )
+
+        key = ConversionCache.raster_layer_key(layer, extent, width, height) if self.cache.caches(layer) else None
+        path = self.cached_path(key, variable_name)
+        if path is not None:
+            return QDir.fromNativeSeparators(path)
+
+        self.feedback.pushInfo(self.tr("Exporting layer {0} ({1} x {2} cells)").format(variable_name, width, height))
+        vrt_filename = QgsProcessingUtils.generateTempFilename(variable_name + "_export.vrt")
+        exports = [
+            RasterLayerExport(
+                layer, "{0}.{1}.tif".format(vrt_filename, index), self.context, block_extent, width=width, height=rows
+            )
+            for index, (block_extent, rows) in enumerate(
+                RasterLayerExport.row_blocks(extent, height, RUtils.export_threads())
+            )
+        ]
+        paths = [export.path for export in exports]
+        for _ in run_exports(exports, RUtils.export_threads(), self.feedback):
+            pass
+        if self.feedback.isCanceled():
+            raise QgsProcessingException(self.tr("Export of layer {} was canceled.").format(variable_name))
+
+        path = mosaic_raster_path(variable_name, vrt_filename, paths)
+        self.store(key, layer, vrt_filename, [vrt_filename] + paths)
+        return path
+
+    def cached_path(self, key: Optional[str], variable_name: str) -> Optional[str]:
+        """
+        Returns the path of the export of a previous run stored in the conversion cache, linked to the temporary
+        folder, or None if there is none
+        """
+        entry = self.cache.get(key) if key is not None else None
+        if entry is None:
+            return None
+
+        path = QgsProcessingUtils.generateTempFilename(entry["file"])
+        try:
+            self.cache.link_files(key, os.path.dirname(path))
+        except (OSError, shutil.Error):
+            # evicted meanwhile
+            return None
+        self.feedback.pushInfo(self.tr("Layer {} reused from the conversion cache.").format(variable_name))
+        return path
+
+    def store(self, key: Optional[str], layer: QgsMapLayer, path: str, files: Optional[List[str]] = None):
+        """
+        Stores an exported layer in the conversion cache, unless it can not be cached or it is the layer file itself
+        """
+        if key is None or path == ConversionCache.layer_file(layer):
+            return
+        self.cache.store(key, layer, path, files)
+
+    def tr(self, string, context=""):
+        """
+        Translates a string
+        """
+        if context == "":
+            context = "RAlgorithmProvider"
+        return QCoreApplication.translate(context, string)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    layer_export.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple, Union
+
+from qgis.core import (
+    Qgis,
+    QgsFeatureRequest,
+    QgsFeatureSink,
+    QgsFields,
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsRasterFileWriter,
+    QgsRasterLayer,
+    QgsRasterPipe,
+    QgsRectangle,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+    QgsVectorLayerFeatureSource,
+    QgsWkbTypes,
+)
+
+
+class VectorLayerExport:
+    """
+    Export of a vector layer to a file written by a GDAL driver, a GeoPackage by default, which can run
+    on a worker thread
+
+    Everything needed from the layer is taken when the export is created, on the thread owning the layer.
+    The features are then read from a QgsVectorLayerFeatureSource, which is safe to use from another thread.
+    """
+
+    def __init__(
+        self,
+        layer: QgsVectorLayer,
+        selected_only: bool,
+        path: str,
+        context: QgsProcessingContext,
+        *,
+        fields: Optional[List[str]] = None,
+        geometry: bool = True,
+        driver_name: str = "GPKG",
+        layer_options: Optional[List[str]] = None,
+    ):
+        self.name = layer.name()
+        self.path = path
+        self.driver_name = driver_name
+        self.layer_options = layer_options or []
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.fields = layer.fields()
+        self.wkb_type = layer.wkbType()
+        self.crs = layer.crs()
+        self.transform_context = context.transformContext()
+        self.request = QgsFeatureRequest()
+        if selected_only:
+            self.request.setFilterFids(layer.selectedFeatureIds())
+        self.field_indices = None
+        if fields is not None:
+            # export only the given fields
+            self.field_indices = [layer.fields().lookupField(field) for field in fields]
+            self.fields = QgsFields()
+            for index in self.field_indices:
+                self.fields.append(layer.fields().at(index))
+            self.request.setSubsetOfAttributes(self.field_indices)
+        if not geometry:
+            # export only the attribute table
+            self.wkb_type = QgsWkbTypes.NoGeometry
+            self.request.setFlags(self.request.flags() | QgsFeatureRequest.NoGeometry)
+
+    @staticmethod
+    def is_supported() -> bool:
+        """
+        Returns True if layers can be exported on worker threads, which needs QGIS 3.10 or later
+        """
+        return hasattr(QgsVectorFileWriter, "create")
+
+    def run(self, feedback: QgsProcessingFeedback) -> str:
+        """
+        Writes the features to the file and returns its path
+        """
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = self.driver_name
+        options.layerOptions = self.layer_options
+        options.fileEncoding = "UTF-8"
+        writer = QgsVectorFileWriter.create(
+            self.path, self.fields, self.wkb_type, self.crs, self.transform_context, options
+        )
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            raise QgsProcessingException("Could not export layer {0}: {1}".format(self.name, writer.errorMessage()))
+
+        try:
+            for feature in self.source.getFeatures(self.request):
+                if feedback.isCanceled():
+                    break
+                if self.field_indices is not None:
+                    feature.setAttributes([feature.attribute(index) for index in self.field_indices])
+                if not writer.addFeature(feature, QgsFeatureSink.FastInsert):
+                    raise QgsProcessingException(
+                        "Could not export layer {0}: {1}".format(self.name, writer.errorMessage())
+                    )
+        finally:
+            # closes the file
+            del writer
+        return self.path
+
+
+class RasterLayerExport:
+    """
+    Export of a window of a raster layer to a tiled GeoTIFF, which can run on a worker thread
+
+    The data provider of the layer is cloned when the export is created, on the thread owning the layer,
+    and the clone is only used by the export. Large windows can be split in blocks of rows with row_blocks,
+    exported concurrently.
+    """
+
+    # GeoTIFF creation options of exported blocks, written once and read once by R
+    CREATE_OPTIONS = ["TILED=YES", "COMPRESS=LZW"]
+
+    def __init__(
+        self,
+        layer: QgsRasterLayer,
+        path: str,
+        context: QgsProcessingContext,
+        extent: QgsRectangle,
+        *,
+        width: int,
+        height: int,
+    ):
+        self.name = layer.name()
+        self.path = path
+        self.provider = layer.dataProvider().clone()
+        self.crs = layer.crs()
+        self.transform_context = context.transformContext()
+        self.extent = extent
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def is_supported() -> bool:
+        """
+        Returns True if raster layers can be exported, which needs QGIS 3.8 or later
+        """
+        return Qgis.QGIS_VERSION_INT >= 30800
+
+    @staticmethod
+    def row_blocks(extent: QgsRectangle, height: int, count: int) -> List[Tuple[QgsRectangle, int]]:
+        """
+        Splits a window of height rows in at most count blocks of rows, returns the extent and height of each block
+        """
+        rows = max(-(-height // max(count, 1)), 1)
+        cell_height = extent.height() / height
+        blocks = []
+        for first_row in range(0, height, rows):
+            block_height = min(rows, height - first_row)
+            block_extent = QgsRectangle(
+                extent.xMinimum(),
+                extent.yMaximum() - (first_row + block_height) * cell_height,
+                extent.xMaximum(),
+                extent.yMaximum() - first_row * cell_height,
+            )
+            blocks.append((block_extent, block_height))
+        return blocks
+
+    def run(self, feedback: QgsProcessingFeedback) -> str:
+        """
+        Writes the window of the layer to the file and returns its path
+        """
+        if feedback.isCanceled():
+            return self.path
+
+        pipe = QgsRasterPipe()
+        if not pipe.set(self.provider):
+            raise QgsProcessingException("Could not export layer {}".format(self.name))
+
+        writer = QgsRasterFileWriter(self.path)
+        writer.setOutputFormat("GTiff")
+        writer.setCreateOptions(RasterLayerExport.CREATE_OPTIONS)
+        error = writer.writeRaster(pipe, self.width, self.height, self.extent, self.crs, self.transform_context)
+        if error != QgsRasterFileWriter.NoError:
+            raise QgsProcessingException("Could not export layer {0}: error {1}".format(self.name, error))
+        return self.path
+
+
+def run_exports(
+    exports: List[Union[VectorLayerExport, RasterLayerExport]], threads: int, feedback: QgsProcessingFeedback
+) -> Iterator[Tuple[int, str]]:
+    """
+    Runs the exports on a pool of worker threads, yielding the index and path of each export as it completes
+
+    Feedback is only used from the calling thread, workers only check whether the execution was canceled.
+    """
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as executor:
+        futures = {executor.submit(export.run, feedback): index for index, export in enumerate(exports)}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
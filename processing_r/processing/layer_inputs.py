@@ -0,0 +1,496 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    layer_inputs.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from qgis.core import (
+    Qgis,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsProcessing,
+    QgsProcessingException,
+    QgsProcessingFeatureSourceDefinition,
+    QgsProcessingParameterBand,
+    QgsProcessingParameterExtent,
+    QgsProcessingParameterField,
+    QgsProcessingParameterMultipleLayers,
+    QgsProcessingParameterNumber,
+    QgsProviderRegistry,
+    QgsRasterDataProvider,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsReferencedRectangle,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication, QDir
+
+from processing_r.processing import interchange, raster_inputs
+from processing_r.processing.layer_conversion import LayerConverter
+from processing_r.processing.layer_export import RasterLayerExport, VectorLayerExport
+from processing_r.processing.outputs import create_output_from_string
+from processing_r.processing.parameters import create_parameter_from_string
+from processing_r.processing.utils import RUtils
+from processing_r.processing.vector_inputs import is_ogr_disk_based_layer, ogr_sql_query
+
+
+def parse_input_metadata(alg, line: str, value: str, type_: str) -> bool:
+    """
+    Parses the <name>_fields and <name>_resolution metadata lines of a script, setting how its layer inputs
+    are read. Returns False if the line is not such a metadata line.
+    """
+    if not value.endswith(("_fields", "_resolution")):
+        return False
+    if create_output_from_string(line) is not None or create_parameter_from_string(line) is not None:
+        # a parameter or an output named like the metadata
+        return False
+
+    if value.endswith("_fields"):
+        # fields of a vector input used by the script
+        alg.input_fields[value[: -len("_fields")]] = [token.strip() for token in type_.split(",") if token.strip()]
+        return True
+
+    # cell size a raster input is read at
+    tokens = type_.split()
+    if len(tokens) not in (1, 2) or (len(tokens) == 2 and tokens[1].lower() not in raster_inputs.RESAMPLING):
+        raise QgsProcessingException(
+            RUtils.tr("Invalid resolution {0}, use a number or a number parameter and one of {1}.").format(
+                type_.strip(), ", ".join(raster_inputs.RESAMPLING)
+            )
+        )
+    alg.input_resolutions[value[: -len("_resolution")]] = (
+        tokens[0],
+        tokens[1].lower() if len(tokens) == 2 else raster_inputs.RESAMPLING[0],
+    )
+    return True
+
+
+class LayerInputs:
+    """
+    Builds the R commands reading the layer inputs of an R script algorithm for one execution
+
+    Vector inputs are read with only the fields used by the script, without geometries if not needed, and
+    subsets and selections are read with SQL queries where possible. Raster inputs are read with only their
+    selected bands and at the resolution declared by the script. All inputs are clipped to the extent set
+    by the clip_inputs_to metadata. Layers which R can not read are exported by a LayerConverter.
+    """
+
+    def __init__(self, alg, parameters, context, feedback):
+        self.alg = alg
+        self.parameters = parameters
+        self.context = context
+        self.feedback = feedback
+        self.converter = LayerConverter(context, feedback)
+        self.transform_context = context.transformContext()
+        self.clip_rectangle = self.inputs_clip_rectangle()
+        self.bands = self.inputs_selected_bands()
+
+    def inputs_clip_rectangle(self) -> Optional[QgsReferencedRectangle]:
+        """
+        Returns the extent inputs are clipped to, from the extent parameter named by the clip_inputs_to
+        metadata, or None if inputs are not clipped
+        """
+        if not self.alg.clip_inputs_to:
+            return None
+
+        param = self.alg.parameterDefinition(self.alg.clip_inputs_to)
+        if not isinstance(param, QgsProcessingParameterExtent):
+            raise QgsProcessingException(
+                self.tr("Inputs can not be clipped to {}, it is not an extent parameter.").format(
+                    self.alg.clip_inputs_to
+                )
+            )
+        if self.parameters.get(param.name()) is None:
+            return None
+
+        return QgsReferencedRectangle(
+            self.alg.parameterAsExtent(self.parameters, param.name(), self.context),
+            self.alg.parameterAsExtentCrs(self.parameters, param.name(), self.context),
+        )
+
+    def inputs_selected_bands(self) -> Dict[str, List[int]]:
+        """
+        Returns the bands to read of raster inputs marked with selectedbands, by input name. The bands are the
+        sorted values of the band parameters of the input, inputs without any band parameter set are read whole.
+        """
+        bands = {}
+        for param in self.alg.parameterDefinitions():
+            if not isinstance(param, QgsProcessingParameterBand):
+                continue
+            parent = param.parentLayerParameterName()
+            if parent not in self.alg.selected_bands_inputs or self.parameters.get(param.name()) is None:
+                continue
+            bands.setdefault(parent, set()).add(self.alg.parameterAsInt(self.parameters, param.name(), self.context))
+        return {name: sorted(values) for name, values in bands.items()}
+
+    def band_number(self, param: QgsProcessingParameterBand, band: int) -> int:
+        """
+        Returns the number of a band in the raster read by R, which holds only the selected bands of inputs
+        marked with selectedbands
+        """
+        parent = param.parentLayerParameterName()
+        return self.bands[parent].index(band) + 1 if parent in self.bands else band
+
+    def clip_rectangle_in_crs(self, crs: QgsCoordinateReferenceSystem) -> Optional[QgsRectangle]:
+        """
+        Returns the extent inputs are clipped to transformed to a layer CRS, or None if inputs are not clipped
+        """
+        if self.clip_rectangle is None:
+            return None
+
+        rectangle = QgsRectangle(self.clip_rectangle)
+        if crs.isValid() and self.clip_rectangle.crs().isValid() and crs != self.clip_rectangle.crs():
+            transform = QgsCoordinateTransform(self.clip_rectangle.crs(), crs, self.transform_context)
+            rectangle = transform.transformBoundingBox(rectangle)
+        return rectangle
+
+    def vector_clip_filter(self, crs: QgsCoordinateReferenceSystem) -> Optional[str]:
+        """
+        Returns the WKT of the extent vector inputs in the given CRS are clipped to, or None if inputs are not clipped
+        """
+        rectangle = self.clip_rectangle_in_crs(crs)
+        return rectangle.asWktPolygon() if rectangle is not None else None
+
+    def clipped_raster_path(self, variable_name: str, path: str, crs: QgsCoordinateReferenceSystem) -> str:
+        """
+        Returns the path of a VRT reading only the window of a raster within the extent inputs are clipped to,
+        or the path of the raster if inputs are not clipped
+        """
+        rectangle = self.clip_rectangle_in_crs(crs)
+        if rectangle is None:
+            return path
+        return raster_inputs.clipped_raster_path(variable_name, path, rectangle, self.alg.clip_inputs_to)
+
+    def layer_fields(self, name: str, layer: Optional[QgsVectorLayer]) -> Optional[List[str]]:
+        """
+        Returns the fields of a vector input declared as used by the script with the <name>_fields metadata,
+        or None if all fields are used. Names of Field parameters are replaced with their selected fields.
+        """
+        if name not in self.alg.input_fields:
+            return None
+
+        fields = []
+        for token in self.alg.input_fields[name]:
+            param = self.alg.parameterDefinition(token)
+            if isinstance(param, QgsProcessingParameterField):
+                selected = (
+                    self.alg.parameterAsFields(self.parameters, token, self.context)
+                    if self.parameters.get(token)
+                    else []
+                )
+            else:
+                selected = [token]
+            fields.extend(field for field in selected if field not in fields)
+
+        if layer is not None:
+            for field in fields:
+                if layer.fields().lookupField(field) < 0:
+                    raise QgsProcessingException(
+                        self.tr("Field {0} used by the script is not found in layer {1}.").format(field, name)
+                    )
+        return fields
+
+    def resolution(self, name: str) -> Optional[Tuple[float, str]]:
+        """
+        Returns the cell size and resampling method a raster input is read at, declared with the <name>_resolution
+        metadata as a number or the name of a number parameter, or None if the input is read at its resolution
+        """
+        if name not in self.alg.input_resolutions:
+            return None
+
+        token, resampling = self.alg.input_resolutions[name]
+        param = self.alg.parameterDefinition(token)
+        if isinstance(param, QgsProcessingParameterNumber):
+            if self.parameters.get(token) is None:
+                return None
+            cell_size = self.alg.parameterAsDouble(self.parameters, token, self.context)
+        else:
+            try:
+                cell_size = float(token)
+            except ValueError as e:
+                raise QgsProcessingException(
+                    self.tr("Resolution {0} of layer {1} is not a number or a number parameter.").format(token, name)
+                ) from e
+        return (cell_size, resampling) if cell_size > 0 else None
+
+    def vector_parameter_command(self, name: str) -> str:
+        """
+        Returns the command reading a vector layer or feature source input into the workspace
+        """
+        value = self.parameters.get(name)
+        layer = self.alg.parameterAsVectorLayer(self.parameters, name, self.context)
+        selected_only = isinstance(value, QgsProcessingFeatureSourceDefinition) and value.selectedFeaturesOnly
+        has_source_options = isinstance(value, QgsProcessingFeatureSourceDefinition) and (
+            getattr(value, "featureLimit", -1) != -1 or getattr(value, "filterExpression", "")
+        )
+        fields = self.layer_fields(name, layer)
+        geometry = name not in self.alg.no_geometry_inputs
+        # geometries are needed to clip the layer, they are dropped in R then
+        read_geometry = geometry or self.clip_rectangle is not None
+        reads_source = layer is not None and not has_source_options
+
+        if reads_source and is_ogr_disk_based_layer(layer) and not self.alg.pass_file_names:
+            if selected_only or layer.subsetString() or fields is not None or not read_geometry:
+                # read the subset, selection and fields directly from the file, if they can be expressed in SQL
+                query, reads_geometry = ogr_sql_query(layer, selected_only, fields, read_geometry)
+                if query is not None:
+                    path = QgsProviderRegistry.instance().decodeUri("ogr", layer.source())["path"]
+                    return self.alg.r_templates.set_variable_vector(
+                        name,
+                        QDir.fromNativeSeparators(path),
+                        query=query,
+                        wkt_filter=self.vector_clip_filter(layer.crs()),
+                        drop_geometry=reads_geometry and not geometry,
+                    )
+
+        if reads_source and (selected_only or not is_ogr_disk_based_layer(layer)):
+            if (
+                not self.alg.pass_file_names
+                and (not read_geometry or not layer.isSpatial())
+                and VectorLayerExport.is_supported()
+                and interchange.parquet_supported()
+            ):
+                # attribute tables are exchanged as Parquet, which R reads with arrow without guessing types
+                path = self.converter.convert_vector_layer(
+                    layer, name, selected_only=selected_only, fields=fields, geometry=False, file_format="parquet"
+                )
+                return self.alg.r_templates.set_variable_parquet(name, QDir.fromNativeSeparators(path))
+
+            # the layer needs to be exported, use the conversion cache
+            path = self.converter.convert_vector_layer(
+                layer, name, selected_only=selected_only, fields=fields, geometry=read_geometry
+            )
+            return self.vector_layer_command(
+                name, QgsVectorLayer(path, "", "ogr"), drop_geometry=read_geometry and not geometry
+            )
+
+        if Qgis.QGIS_VERSION_INT >= 30900 and hasattr(self.alg, "parameterAsCompatibleSourceLayerPathAndLayerName"):
+            # requires qgis 3.10 or later!
+            ogr_data_path, layer_name = self.alg.parameterAsCompatibleSourceLayerPathAndLayerName(
+                self.parameters,
+                name,
+                self.context,
+                QgsVectorFileWriter.supportedFormatExtensions(),
+                feedback=self.feedback,
+                preferredFormat=interchange.vector_format(),
+            )
+            wkt_filter = self.vector_clip_filter(layer.crs() if layer is not None else QgsCoordinateReferenceSystem())
+            if layer_name:
+                return self.alg.r_templates.set_variable_vector(
+                    name,
+                    QDir.fromNativeSeparators(ogr_data_path),
+                    layer_name,
+                    wkt_filter=wkt_filter,
+                    drop_geometry=not geometry,
+                )
+
+            return self.alg.r_templates.set_variable_vector(
+                name, QDir.fromNativeSeparators(ogr_data_path), wkt_filter=wkt_filter, drop_geometry=not geometry
+            )
+
+        ogr_data_path = self.alg.parameterAsCompatibleSourceLayerPath(
+            self.parameters,
+            name,
+            self.context,
+            QgsVectorFileWriter.supportedFormatExtensions(),
+            feedback=self.feedback,
+            preferredFormat=interchange.vector_format(),
+        )
+        ogr_layer = QgsVectorLayer(ogr_data_path, "", "ogr")
+        return self.vector_layer_command(name, ogr_layer, drop_geometry=not geometry)
+
+    def vector_layer_command(self, name: str, layer: QgsVectorLayer, drop_geometry: bool = False) -> str:
+        """
+        Returns the command reading a disk based OGR layer into the workspace, with the geometries dropped
+        if drop_geometry is True
+        """
+        source_parts = QgsProviderRegistry.instance().decodeUri("ogr", layer.source())
+        file_path = source_parts.get("path")
+        if self.alg.pass_file_names:
+            return self.alg.r_templates.set_variable_string(name, QDir.fromNativeSeparators(file_path))
+
+        wkt_filter = self.vector_clip_filter(layer.crs())
+        query = ogr_sql_query(layer, False)[0] if layer.subsetString() else None
+        if query is not None:
+            return self.alg.r_templates.set_variable_vector(
+                name,
+                QDir.fromNativeSeparators(file_path),
+                query=query,
+                wkt_filter=wkt_filter,
+                drop_geometry=drop_geometry,
+            )
+
+        layer_name = source_parts.get("layerName")
+        if layer_name:
+            return self.alg.r_templates.set_variable_vector(
+                name,
+                QDir.fromNativeSeparators(file_path),
+                layer=layer_name,
+                wkt_filter=wkt_filter,
+                drop_geometry=drop_geometry,
+            )
+
+        # no layer name -- readOGR expects the folder, with the filename as layer
+        return self.alg.r_templates.set_variable_vector(
+            name, QDir.fromNativeSeparators(file_path), wkt_filter=wkt_filter, drop_geometry=drop_geometry
+        )
+
+    def vector_layers_commands(self, variable_names: List[str], layers: List[QgsVectorLayer]) -> List[str]:
+        """
+        Returns the commands reading vector layers into the workspace. Layers which can not be read directly
+        by R are exported concurrently.
+        """
+        paths = self.converter.convert_vector_layers(
+            {
+                variable_name: layer
+                for variable_name, layer in zip(variable_names, layers)
+                if layer is not None and not is_ogr_disk_based_layer(layer)
+            }
+        )
+
+        commands = []
+        for variable_name, layer in zip(variable_names, layers):
+            if layer is None:
+                commands.append(self.alg.r_templates.set_variable_null(variable_name))
+            elif variable_name in paths:
+                commands.append(
+                    self.vector_layer_command(variable_name, QgsVectorLayer(paths[variable_name], "", "ogr"))
+                )
+            else:
+                commands.append(self.vector_layer_command(variable_name, layer))
+        return commands
+
+    def raster_parameter_command(self, name: str) -> str:
+        """
+        Returns the command reading a raster layer input into the workspace
+        """
+        return self.raster_layer_command(
+            name,
+            self.alg.parameterAsRasterLayer(self.parameters, name, self.context),
+            self.bands.get(name),
+            self.resolution(name),
+        )
+
+    def raster_layer_command(
+        self,
+        variable_name: str,
+        layer: Optional[QgsRasterLayer],
+        bands: Optional[List[int]] = None,
+        resolution: Optional[Tuple[float, str]] = None,
+    ) -> str:
+        """
+        Returns the command reading a raster layer into the workspace. If bands are given, only these bands are
+        read, if a resolution is given as (cell size, resampling method) the layer is read at this cell size if it
+        is coarser than the cell size of the layer. Layers which GDAL can not read are exported to GeoTIFF files.
+        """
+        if layer is None:
+            return self.alg.r_templates.set_variable_null(variable_name)
+
+        if layer.dataProvider().name() == "gdal":
+            path = QgsProviderRegistry.instance().decodeUri(layer.dataProvider().name(), layer.source())["path"]
+            value = self.clipped_raster_path(variable_name, QDir.fromNativeSeparators(path), layer.crs())
+            if resolution is not None and resolution[0] > max(
+                layer.rasterUnitsPerPixelX(), layer.rasterUnitsPerPixelY()
+            ):
+                value = raster_inputs.resampled_raster_path(variable_name, value, *resolution)
+        elif RasterLayerExport.is_supported():
+            value = self.export_raster_layer(variable_name, layer, resolution)
+        else:
+            raise QgsProcessingException(
+                self.tr("Layer {} is not a GDAL layer. Currently only GDAL based raster layers are supported.").format(
+                    variable_name
+                )
+            )
+
+        if bands is not None:
+            value = raster_inputs.band_subset_raster_path(variable_name, value, bands)
+        if self.alg.pass_file_names:
+            return self.alg.r_templates.set_variable_string(variable_name, value)
+
+        return self.alg.r_templates.set_variable_raster(variable_name, value)
+
+    def export_raster_layer(
+        self, variable_name: str, layer: QgsRasterLayer, resolution: Optional[Tuple[float, str]]
+    ) -> str:
+        """
+        Exports the window of a raster layer which GDAL can not read within the extent inputs are clipped to,
+        at the resolution of the input or of the layer, and returns the path of a VRT reading the export
+        """
+        extent = layer.extent()
+        rectangle = self.clip_rectangle_in_crs(layer.crs())
+        if rectangle is not None:
+            extent = extent.intersect(rectangle)
+            if extent.isEmpty():
+                raise QgsProcessingException(
+                    self.tr("Layer {0} does not intersect the extent {1}.").format(
+                        variable_name, self.alg.clip_inputs_to
+                    )
+                )
+
+        if resolution is not None:
+            cell_size = (resolution[0], resolution[0])
+        elif layer.dataProvider().capabilities() & QgsRasterDataProvider.Size:
+            cell_size = (layer.rasterUnitsPerPixelX(), layer.rasterUnitsPerPixelY())
+        else:
+            raise QgsProcessingException(
+                self.tr(
+                    "Layer {0} has no resolution of its own, set the resolution it is read at with {0}_resolution."
+                ).format(variable_name)
+            )
+        return self.converter.export_raster_layer(layer, variable_name, extent, cell_size)
+
+    def multiple_layers_commands(self, param: QgsProcessingParameterMultipleLayers) -> List[str]:
+        """
+        Returns the commands reading the layers of a multiple layers input into a list, or into a single raster
+        with one band per layer if the script stacks multiple rasters and the layers can be stacked
+        """
+        layers = self.alg.parameterAsLayerList(self.parameters, param.name(), self.context)
+        if param.layerType() == QgsProcessing.TypeRaster and self.alg.stack_multiple_rasters:
+            if not layers:
+                return [self.alg.r_templates.set_variable_null(param.name())]
+            if raster_inputs.can_stack_rasters(layers):
+                value = self.clipped_raster_path(
+                    param.name(), raster_inputs.stacked_raster_path(param.name(), layers), layers[0].crs()
+                )
+                if self.alg.pass_file_names:
+                    return [self.alg.r_templates.set_variable_string(param.name(), value)]
+                return [self.alg.r_templates.set_variable_raster(param.name(), value)]
+            self.feedback.pushInfo(
+                self.tr(
+                    "Layers of {} are not single band GDAL rasters on the same grid, "
+                    "they are passed as a list of rasters."
+                ).format(param.name())
+            )
+
+        variable_names = ["tempvar{}".format(layer_idx) for layer_idx in range(len(layers))]
+        if param.layerType() == QgsProcessing.TypeRaster:
+            commands = [
+                self.raster_layer_command(variable_name, layer) for variable_name, layer in zip(variable_names, layers)
+            ]
+        else:
+            commands = self.vector_layers_commands(variable_names, layers)
+        commands.append(self.alg.r_templates.set_variable_layer_list(param.name(), variable_names))
+        return commands
+
+    def tr(self, string, context=""):
+        """
+        Translates a string
+        """
+        if context == "":
+            context = "RAlgorithmProvider"
+        return QCoreApplication.translate(context, string)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    process_monitor.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import csv
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class ProcessMonitor(threading.Thread):
+    """
+    Thread sampling resource usage of a process and all its children from /proc (Linux only)
+
+    Each sample holds the elapsed time in seconds, resident memory in kB, CPU time in seconds,
+    number of threads and bytes read and written by the whole process tree. The high water mark of the
+    resident memory of each process is kept as well, as peaks between samples are missed otherwise.
+    """
+
+    FIELDS = ("elapsed", "rss_kb", "cpu_time", "threads", "read_bytes", "write_bytes")
+    # seconds between samples when only the peak memory is needed
+    PEAK_RSS_INTERVAL = 0.5
+
+    def __init__(self, pid: int, interval: float):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self.high_water_marks: Dict[int, int] = {}
+        self._stop_event = threading.Event()
+        self._start_time = time.perf_counter()
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    @staticmethod
+    def is_supported() -> bool:
+        """
+        Returns True if process information can be read on this platform
+        """
+        return os.path.isdir("/proc/self")
+
+    def run(self):
+        """
+        Samples the process tree until stopped or until the process finishes
+        """
+        while not self._stop_event.is_set():
+            if not self.sample():
+                break
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        """
+        Takes a last sample and stops the sampling
+        """
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+    def process_tree(self) -> List[int]:
+        """
+        Returns the ids of the monitored process and all its descendants
+        """
+        children = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            stat = self._read_stat(int(entry))
+            if stat is not None:
+                children.setdefault(int(stat[1]), []).append(int(entry))
+
+        tree = []
+        pending = [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(children.get(pid, []))
+        return tree
+
+    def sample(self) -> Optional[Dict]:
+        """
+        Takes a single sample of the process tree, returns None if the process does not exist anymore
+        """
+        sample = {field: 0 for field in ProcessMonitor.FIELDS}
+        found = False
+        for pid in self.process_tree():
+            stat = self._read_stat(pid)
+            if stat is None:
+                continue
+            found = True
+            # fields after the command name, utime and stime are fields 14 and 15 of the stat file
+            sample["cpu_time"] += (int(stat[11]) + int(stat[12])) / self._clock_ticks
+            sample["threads"] += int(stat[17])
+            status = self._read_key_values(pid, "status")
+            sample["rss_kb"] += status.get("VmRSS", 0)
+            if "VmHWM" in status:
+                self.high_water_marks[pid] = max(self.high_water_marks.get(pid, 0), status["VmHWM"])
+            io = self._read_key_values(pid, "io")
+            sample["read_bytes"] += io.get("read_bytes", 0)
+            sample["write_bytes"] += io.get("write_bytes", 0)
+
+        if not found:
+            return None
+
+        sample["elapsed"] = round(time.perf_counter() - self._start_time, 3)
+        sample["cpu_time"] = round(sample["cpu_time"], 2)
+        self.samples.append(sample)
+        return sample
+
+    def peaks(self) -> Dict:
+        """
+        Returns the maximum value of each sampled field
+        """
+        return {field: max((sample[field] for sample in self.samples), default=0) for field in ProcessMonitor.FIELDS}
+
+    def peak_rss(self) -> Optional[int]:
+        """
+        Returns the peak resident memory in kB of the process tree, the sum of the high water marks of its
+        processes, or None if no high water mark was read
+        """
+        return sum(self.high_water_marks.values()) if self.high_water_marks else None
+
+    def write_csv(self, path: str):
+        """
+        Writes the samples as a CSV time series
+        """
+        with open(path, "w", encoding="utf8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ProcessMonitor.FIELDS)
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+    @staticmethod
+    def _read_stat(pid: int) -> Optional[List[str]]:
+        """
+        Returns the fields of /proc/<pid>/stat following the command name, starting with the state
+        """
+        try:
+            with open("/proc/{}/stat".format(pid), encoding="utf8") as f:
+                content = f.read()
+        except OSError:
+            return None
+        # the command name is in parentheses and can contain spaces
+        return content[content.rfind(")") + 2 :].split()
+
+    @staticmethod
+    def _read_key_values(pid: int, name: str) -> Dict[str, int]:
+        """
+        Reads a /proc/<pid>/<name> file of "key: value" lines, returning the integer values
+        """
+        values = {}
+        try:
+            with open("/proc/{}/{}".format(pid, name), encoding="utf8") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    tokens = value.split()
+                    if tokens and tokens[0].isdigit():
+                        values[key.strip()] = int(tokens[0])
+        except OSError:
+            pass
+        return values
@@ -25,9 +25,12 @@ from qgis.core import Qgis, QgsMessageLog, QgsProcessingProvider
 from qgis.PyQt.QtCore import QCoreApplication
 
 from processing_r.gui.gui_utils import GuiUtils
+from processing_r.processing import interchange
 from processing_r.processing.actions.create_new_script import CreateNewScriptAction
 from processing_r.processing.actions.delete_script import DeleteScriptAction
 from processing_r.processing.actions.edit_script import EditScriptAction
+from processing_r.processing.actions.manage_result_cache import ManageResultCacheAction
+from processing_r.processing.actions.show_run_statistics import ShowRunStatisticsAction
 from processing_r.processing.algorithm import RAlgorithm
 from processing_r.processing.exceptions import InvalidScriptException
 from processing_r.processing.utils import RUtils, plugin_version
@@ -44,6 +47,8 @@ class RAlgorithmProvider(QgsProcessingProvider):
         self.actions = []
         create_script_action = CreateNewScriptAction()
         self.actions.append(create_script_action)
+        self.actions.append(ShowRunStatisticsAction())
+        self.actions.append(ManageResultCacheAction())
         self.contextMenuActions = [EditScriptAction(), DeleteScriptAction()]
 
         self.r_version = None
@@ -94,6 +99,135 @@ class RAlgorithmProvider(QgsProcessingProvider):
             )
         )
 
+        ProcessingConfig.addSetting(
+            Setting(self.name(), RUtils.R_PROFILE, self.tr("Profile R scripts and write a profiling report"), False)
+        )
+
+        ProcessingConfig.addSetting(
+            Setting(self.name(), RUtils.R_RUN_HISTORY, self.tr("Record R script executions in run history"), False)
+        )
+
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_MONITOR_INTERVAL,
+                self.tr("Sample R process resource usage every N seconds (0 disables)"),
+                0.0,
+                valuetype=Setting.FLOAT,
+            )
+        )
+
+        ProcessingConfig.addSetting(
+            Setting(self.name(), RUtils.R_CACHE_RESULTS, self.tr("Cache results of all R scripts"), False)
+        )
+
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_RESULT_CACHE_SIZE,
+                self.tr("Maximum size of R result cache (MB)"),
+                1024,
+                valuetype=Setting.INT,
+            )
+        )
+
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_CONVERSION_CACHE_SIZE,
+                self.tr("Maximum size of converted input layers cache (MB, 0 disables)"),
+                1024,
+                valuetype=Setting.INT,
+            )
+        )
+
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_CONVERSION_CACHE_MAX_AGE,
+                self.tr("Reuse converted database, memory and service layers for (seconds, 0 disables)"),
+                0,
+                valuetype=Setting.INT,
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_PARAMETER_BUNDLE_THRESHOLD,
+                self.tr("Pass parameter values longer than N characters in a JSON file (0 disables)"),
+                0,
+                valuetype=Setting.INT,
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(self.name(), RUtils.R_LAZY_INPUTS, self.tr("Read input layers of R scripts only when used"), False)
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_EXPORT_THREADS,
+                self.tr("Number of threads exporting input layers of multiple layer parameters"),
+                4,
+                valuetype=Setting.INT,
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_INTERCHANGE_FORMAT,
+                self.tr("Format of layers exported for R scripts (gpkg, fgb, parquet or auto)"),
+                "gpkg",
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_OUTPUT_FORMAT,
+                self.tr("Format of temporary vector outputs of R scripts (gpkg, fgb or parquet)"),
+                "gpkg",
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_RASTER_BACKEND,
+                self.tr("R package reading and writing raster layers (raster, terra or stars)"),
+                "raster",
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_RASTER_CREATION_OPTIONS,
+                self.tr("Default options of raster outputs (e.g. COG DEFLATE or COMPRESS=ZSTD PREDICTOR=2)"),
+                "",
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_RASTER_DATATYPE,
+                self.tr("Default data type of raster outputs (e.g. INT2S or FLT4S, empty for the R default)"),
+                "",
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_RASTER_NA_FLAG,
+                self.tr("Default no data value of raster outputs (empty for the R default)"),
+                "",
+            )
+        )
+        ProcessingConfig.addSetting(
+            Setting(
+                self.name(),
+                RUtils.R_GDAL_NUM_THREADS,
+                self.tr("Number of threads used by GDAL in R scripts (number or ALL_CPUS, empty for the GDAL default)"),
+                "",
+            )
+        )
+
         if RUtils.is_windows():
             ProcessingConfig.addSetting(Setting(self.name(), RUtils.R_USE64, self.tr("Use 64 bit version"), False))
 
@@ -111,6 +245,23 @@ class RAlgorithmProvider(QgsProcessingProvider):
         ProcessingConfig.removeSetting(RUtils.RSCRIPTS_FOLDER)
         ProcessingConfig.removeSetting(RUtils.R_LIBS_USER)
         ProcessingConfig.removeSetting(RUtils.R_FOLDER)
+        ProcessingConfig.removeSetting(RUtils.R_PROFILE)
+        ProcessingConfig.removeSetting(RUtils.R_RUN_HISTORY)
+        ProcessingConfig.removeSetting(RUtils.R_MONITOR_INTERVAL)
+        ProcessingConfig.removeSetting(RUtils.R_CACHE_RESULTS)
+        ProcessingConfig.removeSetting(RUtils.R_RESULT_CACHE_SIZE)
+        ProcessingConfig.removeSetting(RUtils.R_CONVERSION_CACHE_SIZE)
+        ProcessingConfig.removeSetting(RUtils.R_CONVERSION_CACHE_MAX_AGE)
+        ProcessingConfig.removeSetting(RUtils.R_PARAMETER_BUNDLE_THRESHOLD)
+        ProcessingConfig.removeSetting(RUtils.R_LAZY_INPUTS)
+        ProcessingConfig.removeSetting(RUtils.R_EXPORT_THREADS)
+        ProcessingConfig.removeSetting(RUtils.R_INTERCHANGE_FORMAT)
+        ProcessingConfig.removeSetting(RUtils.R_OUTPUT_FORMAT)
+        ProcessingConfig.removeSetting(RUtils.R_RASTER_BACKEND)
+        ProcessingConfig.removeSetting(RUtils.R_RASTER_CREATION_OPTIONS)
+        ProcessingConfig.removeSetting(RUtils.R_RASTER_DATATYPE)
+        ProcessingConfig.removeSetting(RUtils.R_RASTER_NA_FLAG)
+        ProcessingConfig.removeSetting(RUtils.R_GDAL_NUM_THREADS)
         if RUtils.is_windows():
             ProcessingConfig.removeSetting(RUtils.R_USE64)
         ProviderActions.deregisterProviderActions(self)
@@ -196,15 +347,20 @@ class RAlgorithmProvider(QgsProcessingProvider):
 
     def supportedOutputTableExtensions(self):
         """
-        Extensions for non-spatial vector outputs
+        Extensions for non-spatial vector outputs, Parquet if GDAL can read it
         """
+        if interchange.gdal_has_driver(interchange.DRIVERS["parquet"]):
+            return ["csv", "parquet"]
         return ["csv"]
 
     def defaultVectorFileExtension(self, hasGeometry=True):
         """
-        Default extension -- we use Geopackage for spatial layers, CSV for non-spatial layers
+        Default extension -- we use Geopackage for spatial layers and CSV for non-spatial layers, unless a fast
+        format is configured. This is called by the GUI, so R is never run to check which formats it supports.
         """
-        return "gpkg" if hasGeometry else "csv"
+        if hasGeometry:
+            return interchange.output_format()
+        return interchange.output_table_format()
 
     def supportsNonFileBasedOutput(self):
         """
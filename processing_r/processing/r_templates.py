@@ -12,7 +12,7 @@ __author__ = "(C) 2019 by Jan Caha"
 __date__ = "17/10/2019"
 __copyright__ = "Copyright 2018, North Road"
 
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from qgis.core import QgsCoordinateReferenceSystem, QgsGeometry, QgsPointXY
 from qgis.PyQt.QtCore import QDate, QDateTime, Qt, QTime
@@ -52,6 +52,27 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         """
         Variable that stores header lines with QGIS expressions
         """
+        self.bundle_threshold = 0
+        """
+        Length of R code from which values are passed in the parameter bundle file instead of being written into
+        the script, 0 to always write values into the script.
+        """
+        self.parameter_bundle = {}
+        """
+        Variable that stores values passed in the parameter bundle file.
+        """
+        self.lazy_inputs = False
+        """
+        Read input layers only when the script uses them, layers with the same source are read only once.
+        """
+        self._input_reads = {}
+        """
+        Keys of the shared reads of lazily read input layers.
+        """
+        self.raster_backend = RUtils.RASTER_BACKENDS[0]
+        """
+        R package used to read and write raster layers, one of RUtils.RASTER_BACKENDS.
+        """
 
     @property
     def auto_load_packages(self):
@@ -112,7 +133,7 @@ class RTemplates:  # pylint: disable=too-many-public-methods
 
         if self.auto_load_packages:
             packages.append("sf")
-            packages.append("raster")
+            packages.append(self.raster_backend)
 
         if self._use_lubridate:
             packages.append("lubridate")
@@ -122,24 +143,44 @@ class RTemplates:  # pylint: disable=too-many-public-methods
 
         return packages
 
-    def set_variable_vector(self, variable: str, path: str, layer: str = None) -> str:
+    def set_variable_vector(
+        self,
+        variable: str,
+        path: str,
+        layer: str = None,
+        *,
+        wkt_filter: str = None,
+        query: str = None,
+        drop_geometry: bool = False,
+    ) -> str:
         """
         Function that produces R code to read vector data.
 
         :param variable: string. Name of the variable.
         :param path: string. Path to read data from.
         :param layer: string. Name of the layer, if necessary.
+        :param wkt_filter: string. WKT of geometry to read only intersecting features, if necessary.
+        :param query: string. SQL query selecting the features to read, if necessary.
+        :param drop_geometry: bool. Whether to drop the geometries and keep only the attribute table.
         :return: string. R code to read vector data.
         """
+        options = ""
+        if query is not None:
+            options += ", query = {0}".format(self._r_string(query.replace("\\", "\\\\")))
+        if wkt_filter is not None:
+            options += ', wkt_filter = "{0}"'.format(wkt_filter)
 
         if layer is not None:
-            command = '{0} <- st_read("{1}", layer = "{2}", quiet = TRUE, stringsAsFactors = FALSE)'.format(
-                variable, path, layer
+            read = 'st_read("{0}", layer = "{1}"{2}, quiet = TRUE, stringsAsFactors = FALSE)'.format(
+                path, layer, options
             )
         else:
-            command = '{0} <- st_read("{1}", quiet = TRUE, stringsAsFactors = FALSE)'.format(variable, path)
+            read = 'st_read("{0}"{1}, quiet = TRUE, stringsAsFactors = FALSE)'.format(path, options)
 
-        return command
+        if drop_geometry:
+            read = "sf::st_drop_geometry({0})".format(read)
+
+        return self._read_input(variable, read)
 
     def set_variable_raster(self, variable: str, path: str) -> str:
         """
@@ -147,10 +188,68 @@ class RTemplates:  # pylint: disable=too-many-public-methods
 
         :param variable: string. Name of the variable.
         :param path: string. Path to read data from.
-        :return: string. R code to read raster data.
+        :return: string. R code to read raster data with the raster backend, stars objects are proxies.
+        """
+        if self.raster_backend == "terra":
+            read = 'terra::rast("{0}")'.format(path)
+        elif self.raster_backend == "stars":
+            read = 'stars::read_stars("{0}", proxy = TRUE)'.format(path)
+        else:
+            read = 'brick("{0}")'.format(path)
+
+        return self._read_input(variable, read)
+
+    def set_variable_parquet(self, variable: str, path: str) -> str:
+        """
+        Function that produces R code to read attribute table from Parquet file.
+
+        :param variable: string. Name of the variable.
+        :param path: string. Path to read data from.
+        :return: string. R code to read the table as data frame.
+        """
+
+        return self._read_input(variable, 'as.data.frame(arrow::read_parquet("{0}"))'.format(path))
+
+    def _read_input(self, variable: str, read: str) -> str:
         """
+        Produces R code that assigns the result of reading an input to a variable, or that binds the variable
+        to a shared read of the input performed on first use of the variable if inputs are read lazily.
+        """
+        if not self.lazy_inputs:
+            return "{0} <- {1}".format(variable, read)
 
-        return '{0} <- brick("{1}")'.format(variable, path)
+        key = self._input_reads.setdefault(read, len(self._input_reads) + 1)
+        return 'delayedAssign("{0}", .qgis_read_input("{1}", {2}))'.format(variable, key, read)
+
+    def set_variable_layer_list(self, variable: str, layer_variables: List[str]) -> str:
+        """
+        Function that produces R code to create list of layers. If inputs are read lazily, the list is created
+        on first use of the variable, so the layers are read only if the list is used.
+
+        :param variable: string. Name of the variable.
+        :param layer_variables: list. Names of the variables holding the layers.
+        :return: string. R code to create list of layers.
+        """
+        if self.lazy_inputs:
+            return 'delayedAssign("{0}", list({1}))'.format(variable, ",".join(layer_variables))
+
+        return "{0} = list({1})".format(variable, ",".join(layer_variables))
+
+    def read_input_function(self) -> List[str]:
+        """
+        Produces R code defining the function used by lazily read inputs, which evaluates the read only for
+        the first variable using it and keeps the result for other variables with the same source.
+
+        :return: list. R code defining the function.
+        """
+        commands = []
+        commands.append(".qgis_inputs <- new.env()")
+        commands.append(
+            ".qgis_read_input <- function(key, read) {"
+            " if (!exists(key, envir = .qgis_inputs, inherits = FALSE)) assign(key, read, envir = .qgis_inputs);"
+            " get(key, envir = .qgis_inputs, inherits = FALSE) }"
+        )
+        return commands
 
     def set_variable_extent(self, variable: str, x_min: float, x_max: float, y_min: float, y_max: float):
         """
@@ -161,8 +260,14 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         :param x_max: float. Maximal x coordinate.
         :param y_min: float. Minimal y coordinate.
         :param y_max: float. Maximal y coordinate.
-        :return: string. R code to produce extent variable.
+        :return: string. R code to produce extent variable, of the type used by the raster backend.
         """
+        if self.raster_backend == "terra":
+            return "{0} <- terra::ext({1},{2},{3},{4})".format(variable, x_min, x_max, y_min, y_max)
+        if self.raster_backend == "stars":
+            return "{0} <- sf::st_bbox(c(xmin = {1}, xmax = {2}, ymin = {3}, ymax = {4}))".format(
+                variable, x_min, x_max, y_min, y_max
+            )
         return "{0} <- extent({1},{2},{3},{4})".format(variable, x_min, x_max, y_min, y_max)
 
     def set_variable_string(self, variable: str, value: str) -> str:
@@ -200,7 +305,12 @@ class RTemplates:  # pylint: disable=too-many-public-methods
                 v = v.replace('"', '\\"')
             escaped_values.append('"{0}"'.format(v))
 
-        return "{0} <- c({1})".format(variable, ",".join(escaped_values))
+        command = "{0} <- c({1})".format(variable, ",".join(escaped_values))
+        if self._use_bundle(command):
+            self.parameter_bundle[variable] = list(value)
+            return "{0} <- as.character(unlist({1}))".format(variable, self._r_bundle_value(variable))
+
+        return command
 
     def set_variable_directly(self, variable: str, value) -> str:
         """
@@ -229,7 +339,53 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         :param geom_wkt_value: string. WKT of geometry.
         :return: string. R code to creating variable of classes sfg.
         """
-        return "{0} <- {1}".format(variable, self._r_geom(geom_wkt_value))
+        command = "{0} <- {1}".format(variable, self._r_geom(geom_wkt_value))
+        if self._use_bundle(command):
+            self.parameter_bundle[variable] = self._wkb_hex(geom_wkt_value)
+            return '{0} <- sf::st_as_sfc(structure({1}, class = "WKB"))[[1]]'.format(
+                variable, self._r_bundle_value(variable)
+            )
+
+        return command
+
+    def _wkb_hex(self, geom_wkt_value: str) -> str:
+        """
+        Converts WKT to hex encoded WKB.
+        """
+        return bytes(QgsGeometry.fromWkt(geom_wkt_value).asWkb()).hex()
+
+    def _use_bundle(self, command: str) -> bool:
+        """
+        Checks if the value in the command should be passed in the parameter bundle file.
+        """
+        return 0 < self.bundle_threshold < len(command)
+
+    def _r_bundle_value(self, variable: str) -> str:
+        """
+        Generate R code referencing value from parameter bundle.
+        """
+        return '.qgis_parameters[["{}"]]'.format(variable)
+
+    def load_parameter_bundle(self, path: str) -> List[str]:
+        """
+        Produces R code that reads the parameter bundle file, and defines function converting typed values of
+        lists stored in the bundle to R values.
+
+        :param path: string. Path to the JSON file with the values.
+        :return: list. R code to read the parameter bundle.
+        """
+        commands = []
+        commands.append(self.check_package_availability("jsonlite"))
+        commands.append('.qgis_parameters <- jsonlite::read_json("{0}", simplifyVector = FALSE)'.format(path))
+        commands.append(
+            ".qgis_value <- function(x) switch(x$type, "
+            'datetime = as.POSIXct(x$value, format = "%Y-%m-%dT%H:%M:%S"), '
+            'date = as.POSIXct(x$value, format = "%Y-%m-%d"), '
+            "time = lubridate::hms(x$value), "
+            'geometry = sf::st_as_sfc(structure(x$value, class = "WKB"))[[1]], '
+            "x$value)"
+        )
+        return commands
 
     def _r_geom(self, geom_wkt_value: str) -> str:
         """
@@ -255,32 +411,100 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         """
         return "dev.off()"
 
-    def write_vector_output(self, variable: str, path: str, layer_name: str = None) -> str:
+    def write_vector_output(
+        self,
+        variable: str,
+        path: str,
+        layer_name: str = None,
+        driver: str = None,
+        *,
+        layer_options: List[str] = None,
+        config_options: Dict[str, str] = None,
+        fallback_path: str = None,
+    ) -> str:
         """
         Functions that produces R code to write vector data.
 
         :param variable: string. Name of the variable to write.
         :param path: string. Path to write the data to.
         :param layer_name: string. Name of the layer if necessary.
-        :param driver: string. GDAL driver name to use. Default value "GPKG" - geopackage.
+        :param driver: string. GDAL driver name to use, if it can not be guessed from the file extension.
+        :param layer_options: list. Layer creation options as KEY=VALUE strings, if necessary.
+        :param config_options: dict. GDAL configuration options used while writing, if necessary.
+        :param fallback_path: string. Path of a GeoPackage written instead if sf lacks the driver, if any.
         :return: string. R code to write vector data to disc.
         """
+        options = ""
         if layer_name is not None:
-            command = 'st_write({0}, "{1}", layer = "{2}", quiet = TRUE)'.format(variable, path, layer_name)
-        else:
-            command = 'st_write({0}, "{1}", quiet = TRUE)'.format(variable, path)
+            options += ', layer = "{0}"'.format(layer_name)
+        if driver is not None:
+            options += ', driver = "{0}"'.format(driver)
+        if layer_options:
+            options += ", layer_options = c({0})".format(", ".join(self._r_string(o) for o in layer_options))
+        if config_options:
+            options += ", config_options = c({0})".format(
+                ", ".join("{0} = {1}".format(key, self._r_string(value)) for key, value in config_options.items())
+            )
 
-        return command
+        command = 'st_write({0}, "{1}"{2}, quiet = TRUE)'.format(variable, path, options)
+        if driver is None or fallback_path is None:
+            return command
+        return 'if (with(sf::st_drivers("vector"), any(name == "{0}" & write))) {{ {1} }} else {{ {2} }}'.format(
+            driver, command, self.write_vector_output(variable, fallback_path, layer_name)
+        )
 
-    def write_raster_output(self, variable: str, path: str) -> str:
+    def write_raster_output(self, variable: str, path: str, options: Optional[Dict] = None) -> str:
         """
         Functions that produces R code to write raster data.
 
         :param variable: string. Name of the variable to write.
         :param path: string. Path to write the data to.
-        :return: string. R code to write raster data to disc.
+        :param options: dict. Options of the output, as returned by RUtils.parse_raster_output_options, if any.
+        :return: string. R code to write raster data to disc with the raster backend.
+        """
+        options = options or {}
+        file_format = options.get("format")
+        datatype = options.get("datatype")
+        na_flag = options.get("na_flag")
+        creation_options = options.get("creation_options")
+
+        arguments = ""
+        if self.raster_backend == "stars":
+            if file_format:
+                arguments += ', driver = "{0}"'.format(file_format)
+            if datatype:
+                arguments += ', type = "{0}"'.format(RUtils.RASTER_DATATYPES[datatype])
+            if na_flag is not None:
+                arguments += ", NA_value = {0}".format(self._r_number(na_flag))
+            if creation_options:
+                arguments += ", options = {0}".format(self._r_vector(creation_options))
+            return 'stars::write_stars({0}, "{1}"{2})'.format(variable, path, arguments)
+
+        if file_format:
+            arguments += ', {0} = "{1}"'.format("filetype" if self.raster_backend == "terra" else "format", file_format)
+        if datatype:
+            arguments += ', datatype = "{0}"'.format(datatype)
+        if na_flag is not None:
+            arguments += ", NAflag = {0}".format(self._r_number(na_flag))
+        if creation_options:
+            arguments += ", {0} = {1}".format(
+                "gdal" if self.raster_backend == "terra" else "options", self._r_vector(creation_options)
+            )
+        if self.raster_backend == "terra":
+            return 'terra::writeRaster({0}, "{1}"{2}, overwrite = TRUE)'.format(variable, path, arguments)
+        return 'writeRaster({0}, "{1}"{2}, overwrite = TRUE)'.format(variable, path, arguments)
+
+    def _r_number(self, value: float) -> str:
+        """
+        Converts number to R number, integral values are written without decimals.
+        """
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+    def _r_vector(self, values: List[str]) -> str:
+        """
+        Converts list of strings to R character vector.
         """
-        return 'writeRaster({0}, "{1}", overwrite = TRUE)'.format(variable, path)
+        return "c({0})".format(", ".join(self._r_string(value) for value in values))
 
     def write_csv_output(self, variable: str, path: str) -> str:
         """
@@ -292,6 +516,57 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         """
         return 'write.csv({0}, "{1}", row.names = FALSE)'.format(variable, path)
 
+    def write_parquet_output(self, variable: str, path: str, fallback_path: str = None) -> str:
+        """
+        Functions that produces R code to write table data to Parquet file, geometries are dropped.
+
+        :param variable: string. Name of the variable to write.
+        :param path: string. Path to write the data to.
+        :param fallback_path: string. Path of a CSV file written instead if arrow is not installed, if any.
+        :return: string. R code to write table data to disc.
+        """
+        table = 'if (inherits({0}, "sf")) sf::st_drop_geometry({0}) else {0}'.format(variable)
+        command = 'arrow::write_parquet({0}, "{1}")'.format(table, path)
+        if fallback_path is None:
+            return command
+        return 'if (requireNamespace("arrow", quietly = TRUE)) {{ {0} }} else {{ {1} }}'.format(
+            command, self.write_csv_output(table, fallback_path)
+        )
+
+    def profile_script(self, source_path: str, rprof_path: str, summary_path: str) -> List[str]:
+        """
+        Produces R code that runs the script body stored in a separate file under Rprof, with line
+        and memory profiling, and writes a tab separated summary of the results.
+
+        The summary starts with `#name<tab>value` lines holding the totals, followed by the per line
+        table produced by `summaryRprof`.
+
+        :param source_path: string. Path to the file with the body of the script.
+        :param rprof_path: string. Path where Rprof stores the raw samples.
+        :param summary_path: string. Path to write the summary to.
+        :return: list. R code to profile the script.
+        """
+        commands = []
+        commands.append("invisible(gc(reset = TRUE))")
+        commands.append(
+            'Rprof("{0}", memory.profiling = TRUE, line.profiling = TRUE, interval = 0.01)'.format(rprof_path)
+        )
+        commands.append(
+            'source("{0}", local = TRUE, echo = FALSE, print.eval = TRUE, keep.source = TRUE)'.format(source_path)
+        )
+        commands.append("Rprof(NULL)")
+        commands.append(".qgis_gc <- gc()")
+        commands.append('.qgis_profile <- summaryRprof("{0}", lines = "show", memory = "both")'.format(rprof_path))
+        commands.append(
+            'cat(sprintf("#sampling_time\\t%f\\n#max_memory_mb\\t%f\\n", .qgis_profile$sampling.time, '
+            'sum(.qgis_gc[, 6])), file = "{0}")'.format(summary_path)
+        )
+        commands.append(
+            "write.table(data.frame(line = rownames(.qgis_profile$by.line), .qgis_profile$by.line), "
+            'file = "{0}", sep = "\\t", quote = FALSE, row.names = FALSE, append = TRUE)'.format(summary_path)
+        )
+        return commands
+
     def install_package_github(self, repo: str) -> str:
         """
         Function that produces R code to install
@@ -400,6 +675,16 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         """
         return self.set_option("repos", value)
 
+    def set_gdal_num_threads(self, value: str) -> str:
+        """
+        Function that produces R code to set the number of threads used by GDAL, for compression and
+        for reading and writing rasters.
+
+        :param value: string. Number of threads or ALL_CPUS.
+        :return: string. R code to set GDAL_NUM_THREADS.
+        """
+        return "Sys.setenv(GDAL_NUM_THREADS = {0})".format(self._r_string(value))
+
     def build_script_header_commands(self, script) -> List[str]:
         """
         Builds the set of script startup commands for the algorithm, based on necessary packages,
@@ -414,6 +699,10 @@ class RTemplates:  # pylint: disable=too-many-public-methods
         # Just use main mirror
         commands.append(self.set_option_repos(RUtils.package_repo()))
 
+        gdal_num_threads = RUtils.gdal_num_threads()
+        if gdal_num_threads:
+            commands.append(self.set_gdal_num_threads(gdal_num_threads))
+
         # Try to install packages if needed
         if RUtils.use_user_library():
             path_to_use = str(RUtils.r_library_folder()).replace("\\", "/")
@@ -435,6 +724,9 @@ class RTemplates:  # pylint: disable=too-many-public-methods
             commands.append(self.check_package_availability(p))
             commands.append(self.load_package(p))
 
+        if self.lazy_inputs:
+            commands.extend(self.read_input_function())
+
         return commands
 
     # set of functions related to enum creation
@@ -617,4 +909,37 @@ class RTemplates:  # pylint: disable=too-many-public-methods
             elif isinstance(value, QColor):
                 values.append(self._r_color(value))
 
-        return "{0} <- list({1})".format(variable, ", ".join(values))
+        command = "{0} <- list({1})".format(variable, ", ".join(values))
+        if self._use_bundle(command):
+            self.parameter_bundle[variable] = [
+                typed_value for typed_value in map(self._bundle_list_value, values_list) if typed_value is not None
+            ]
+            return "{0} <- lapply({1}, .qgis_value)".format(variable, self._r_bundle_value(variable))
+
+        return command
+
+    def _bundle_list_value(self, value: Any) -> Optional[dict]:
+        """
+        Converts a value of a list to a typed value for the parameter bundle.
+        """
+        if isinstance(value, (str, int, float)):
+            return {"type": "value", "value": value}
+
+        if isinstance(value, (QDateTime, QDate)):
+            value_type = "datetime" if isinstance(value, QDateTime) else "date"
+            return {"type": value_type, "value": value.toString(format=Qt.ISODate)}
+
+        if isinstance(value, QTime):
+            self._use_lubridate = True
+            return {"type": "time", "value": value.toString(Qt.TextDate)}
+
+        if isinstance(value, QgsGeometry):
+            return {"type": "geometry", "value": bytes(value.asWkb()).hex()}
+
+        if isinstance(value, QColor):
+            return {
+                "type": "value",
+                "value": "#{:02X}{:02X}{:02X}{:02X}".format(value.red(), value.green(), value.blue(), value.alpha()),
+            }
+
+        return None
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    raster_inputs.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from typing import List, Optional
+
+from osgeo import gdal
+from qgis.core import (
+    QgsProcessingException,
+    QgsProcessingUtils,
+    QgsProviderRegistry,
+    QgsRasterLayer,
+    QgsRectangle,
+)
+from qgis.PyQt.QtCore import QDir
+
+from processing_r.processing.utils import RUtils
+
+# GDAL resampling methods of raster inputs read at a coarser resolution, the first is the default
+RESAMPLING = ["average", "nearest", "bilinear", "cubic", "mode"]
+
+
+def _write_vrt(dataset, vrt_filename: str, error: str, band_names: Optional[List[str]] = None) -> str:
+    """
+    Writes a VRT dataset created by GDAL, naming its bands by band_names if given, and returns the path of the
+    VRT. Raises a QgsProcessingException with the error message if GDAL could not create the dataset.
+    """
+    if dataset is None:
+        raise QgsProcessingException(error)
+    for band, name in enumerate(band_names or [], start=1):
+        dataset.GetRasterBand(band).SetDescription(name)
+    # flushing the dataset writes the VRT, without waiting for the dataset to be closed
+    dataset.FlushCache()
+    return QDir.fromNativeSeparators(vrt_filename)
+
+
+def can_stack_rasters(layers: List[QgsRasterLayer]) -> bool:
+    """
+    Returns True if raster layers can be stacked as bands of a VRT without resampling: single band GDAL
+    rasters with the same CRS and the same grid, which is the same extent and size in cells
+    """
+    first = layers[0]
+    # extents may differ by rounding errors, far below the size of a cell
+    tolerance = min(first.rasterUnitsPerPixelX(), first.rasterUnitsPerPixelY()) / 1000
+    for layer in layers:
+        if layer.dataProvider().name() != "gdal" or layer.bandCount() != 1 or layer.crs() != first.crs():
+            return False
+        if (layer.width(), layer.height()) != (first.width(), first.height()):
+            return False
+        extent, first_extent = layer.extent(), first.extent()
+        corners = [
+            (extent.xMinimum(), first_extent.xMinimum()),
+            (extent.yMinimum(), first_extent.yMinimum()),
+            (extent.xMaximum(), first_extent.xMaximum()),
+            (extent.yMaximum(), first_extent.yMaximum()),
+        ]
+        if any(abs(a - b) > tolerance for a, b in corners):
+            return False
+    return True
+
+
+def stacked_raster_path(variable_name: str, layers: List[QgsRasterLayer]) -> str:
+    """
+    Returns the path of a VRT stacking raster layers as its bands, named by the layers. The layers must be
+    stackable, see can_stack_rasters.
+    """
+    paths = [QgsProviderRegistry.instance().decodeUri("gdal", layer.source())["path"] for layer in layers]
+    vrt_filename = QgsProcessingUtils.generateTempFilename(variable_name + ".vrt")
+    return _write_vrt(
+        gdal.BuildVRT(vrt_filename, paths, separate=True),
+        vrt_filename,
+        RUtils.tr("Could not stack layers of {}.").format(variable_name),
+        [layer.name() for layer in layers],
+    )
+
+
+def mosaic_raster_path(variable_name: str, vrt_filename: str, paths: List[str]) -> str:
+    """
+    Returns the path of a VRT mosaic of the rasters written for the blocks of an exported layer
+    """
+    return _write_vrt(
+        gdal.BuildVRT(vrt_filename, paths), vrt_filename, RUtils.tr("Could not export layer {}.").format(variable_name)
+    )
+
+
+def band_subset_raster_path(variable_name: str, path: str, bands: List[int]) -> str:
+    """
+    Returns the path of a VRT reading only the given bands of a raster
+    """
+    vrt_filename = QgsProcessingUtils.generateTempFilename(variable_name + "_bands.vrt")
+    return _write_vrt(
+        gdal.Translate(vrt_filename, path, format="VRT", bandList=bands),
+        vrt_filename,
+        RUtils.tr("Could not read bands {0} of layer {1}.").format(
+            ", ".join(str(band) for band in bands), variable_name
+        ),
+    )
+
+
+def resampled_raster_path(variable_name: str, path: str, cell_size: float, resampling: str) -> str:
+    """
+    Returns the path of a VRT reading a raster at a coarser cell size. GDAL reads from the overviews of the
+    raster closest to the cell size when the raster has overviews.
+    """
+    vrt_filename = QgsProcessingUtils.generateTempFilename(variable_name + "_resampled.vrt")
+    return _write_vrt(
+        gdal.Translate(vrt_filename, path, format="VRT", xRes=cell_size, yRes=cell_size, resampleAlg=resampling),
+        vrt_filename,
+        RUtils.tr("Could not read layer {0} at resolution {1}.").format(variable_name, cell_size),
+    )
+
+
+def clipped_raster_path(variable_name: str, path: str, rectangle: QgsRectangle, extent_name: str) -> str:
+    """
+    Returns the path of a VRT reading only the window of a raster within a rectangle in the CRS of the raster,
+    the extent parameter named extent_name
+    """
+    vrt_filename = QgsProcessingUtils.generateTempFilename(variable_name + "_clipped.vrt")
+    return _write_vrt(
+        gdal.Translate(
+            vrt_filename,
+            path,
+            format="VRT",
+            projWin=[rectangle.xMinimum(), rectangle.yMaximum(), rectangle.xMaximum(), rectangle.yMinimum()],
+        ),
+        vrt_filename,
+        RUtils.tr("Layer {0} does not intersect the extent {1}.").format(variable_name, extent_name),
+    )
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    run_history.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import json
+import math
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from processing.tools.system import userFolder
+
+
+class RunHistory:
+    """
+    Persistent history of R algorithm executions, stored in a SQLite database
+    """
+
+    COLUMNS = (
+        "timestamp",
+        "algorithm_id",
+        "script_hash",
+        "parameters_fingerprint",
+        "input_size",
+        "input_sizes",
+        "duration",
+        "phase_durations",
+        "peak_rss",
+        "exit_status",
+        "output_size",
+        "output_sizes",
+        "cache_hit",
+    )
+
+    JSON_COLUMNS = ("input_sizes", "phase_durations", "output_sizes")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path else RunHistory.default_path()
+
+    @staticmethod
+    def default_path() -> str:
+        """
+        Returns the path of the history database in the user profile folder
+        """
+        return os.path.join(userFolder(), "r_run_history.sqlite")
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens the database, creating the table if necessary
+        """
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp TEXT NOT NULL, "
+            "algorithm_id TEXT NOT NULL, "
+            "script_hash TEXT, "
+            "parameters_fingerprint TEXT, "
+            "input_size INTEGER, "
+            "input_sizes TEXT, "
+            "duration REAL, "
+            "phase_durations TEXT, "
+            "peak_rss INTEGER, "
+            "exit_status INTEGER, "
+            "output_size INTEGER, "
+            "output_sizes TEXT, "
+            "cache_hit INTEGER)"
+        )
+        columns = [row["name"] for row in connection.execute("PRAGMA table_info(runs)")]
+        if "cache_hit" not in columns:
+            # databases created before results were cached
+            try:
+                connection.execute("ALTER TABLE runs ADD COLUMN cache_hit INTEGER")
+            except sqlite3.OperationalError:
+                # added meanwhile by a concurrent run
+                pass
+        connection.execute("CREATE INDEX IF NOT EXISTS runs_algorithm_id ON runs (algorithm_id)")
+        return connection
+
+    def record(self, run: Dict):
+        """
+        Stores a single execution. Keys of the run dict match the COLUMNS, missing keys are stored as NULL
+        and the timestamp defaults to the current time.
+
+        :param run: dict with the execution details
+        """
+        values = dict(run)
+        values.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+        for column in RunHistory.JSON_COLUMNS:
+            if values.get(column) is not None:
+                values[column] = json.dumps(values[column])
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT INTO runs ({0}) VALUES ({1})".format(
+                        ", ".join(RunHistory.COLUMNS), ", ".join("?" for _ in RunHistory.COLUMNS)
+                    ),
+                    [values.get(column) for column in RunHistory.COLUMNS],
+                )
+        finally:
+            connection.close()
+
+    def runs(self, algorithm_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Returns the recorded executions, newest first
+
+        :param algorithm_id: only return executions of this algorithm
+        :param limit: maximum number of executions to return
+        """
+        query = "SELECT * FROM runs"
+        arguments = []
+        if algorithm_id is not None:
+            query += " WHERE algorithm_id = ?"
+            arguments.append(algorithm_id)
+        query += " ORDER BY id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            arguments.append(limit)
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(query, arguments).fetchall()
+        finally:
+            connection.close()
+
+        result = []
+        for row in rows:
+            run = dict(row)
+            for column in RunHistory.JSON_COLUMNS:
+                if run[column] is not None:
+                    run[column] = json.loads(run[column])
+            result.append(run)
+        return result
+
+    def statistics(self, algorithm_id: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Returns duration statistics per algorithm, as a dict of algorithm id to a dict with the number of runs,
+        failed runs, median (p50) and 95th percentile (p95) durations and the time of the last run. Runs without
+        a duration are counted but not part of the percentiles. Results restored from the result cache are not
+        runs of R and are left out.
+        """
+        query = "SELECT algorithm_id, duration, exit_status, timestamp FROM runs WHERE NOT COALESCE(cache_hit, 0)"
+        arguments = []
+        if algorithm_id is not None:
+            query += " AND algorithm_id = ?"
+            arguments.append(algorithm_id)
+        query += " ORDER BY id"
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(query, arguments).fetchall()
+        finally:
+            connection.close()
+
+        grouped = {}
+        for row in rows:
+            stats = grouped.setdefault(row["algorithm_id"], {"runs": 0, "durations": [], "failed": 0, "last_run": None})
+            stats["runs"] += 1
+            if row["duration"] is not None:
+                stats["durations"].append(row["duration"])
+            if row["exit_status"] != 0:
+                stats["failed"] += 1
+            stats["last_run"] = row["timestamp"]
+
+        result = {}
+        for alg_id, stats in grouped.items():
+            durations = sorted(stats["durations"])
+            result[alg_id] = {
+                "runs": stats["runs"],
+                "failed": stats["failed"],
+                "p50": RunHistory.percentile(durations, 50),
+                "p95": RunHistory.percentile(durations, 95),
+                "last_run": stats["last_run"],
+            }
+        return result
+
+    def clear(self):
+        """
+        Removes all recorded executions
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM runs")
+        finally:
+            connection.close()
+
+    @staticmethod
+    def percentile(values: List[float], percent: float) -> Optional[float]:
+        """
+        Returns the percentile of sorted values, using linear interpolation between the closest ranks
+        """
+        if not values:
+            return None
+        rank = (len(values) - 1) * percent / 100
+        lower = math.floor(rank)
+        upper = math.ceil(rank)
+        return values[lower] + (values[upper] - values[lower]) * (rank - lower)
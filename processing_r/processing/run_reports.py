@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    run_reports.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from typing import List, Optional
+
+from qgis.core import (
+    QgsMapLayer,
+    QgsProcessingFeatureSourceDefinition,
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterMultipleLayers,
+    QgsProcessingParameterRasterLayer,
+    QgsProcessingParameterVectorLayer,
+    QgsProcessingUtils,
+    QgsProviderRegistry,
+)
+from qgis.PyQt.QtCore import QDir, QUrl
+
+from processing_r.processing.run_history import RunHistory
+from processing_r.processing.utils import RUtils, log
+
+
+def parameter_layers(alg, param: QgsProcessingParameterDefinition, parameters, context) -> Optional[List[QgsMapLayer]]:
+    """
+    Returns the list of layers of a layer type parameter, or None if the parameter is not a layer parameter
+    """
+    if isinstance(param, QgsProcessingParameterMultipleLayers):
+        return alg.parameterAsLayerList(parameters, param.name(), context)
+    if isinstance(
+        param,
+        (QgsProcessingParameterRasterLayer, QgsProcessingParameterVectorLayer, QgsProcessingParameterFeatureSource),
+    ):
+        layer = alg.parameterAsLayer(parameters, param.name(), context)
+        return [layer] if layer is not None else []
+    return None
+
+
+def parameter_source_paths(alg, param: QgsProcessingParameterDefinition, parameters, context) -> List[str]:
+    """
+    Returns the paths of files used by an input parameter
+    """
+    if param.name() not in parameters or parameters[param.name()] is None:
+        return []
+
+    if isinstance(param, QgsProcessingParameterFile):
+        path = alg.parameterAsFile(parameters, param.name(), context)
+        return [path] if path else []
+
+    paths = []
+    for layer in parameter_layers(alg, param, parameters, context) or []:
+        path = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source()).get("path")
+        if path:
+            paths.append(path)
+    return paths
+
+
+def parameters_fingerprint(alg, parameters, context) -> str:
+    """
+    Returns a hash of the normalised values of the input parameters of an algorithm
+    """
+    values = {}
+    for param in alg.parameterDefinitions():
+        if param.isDestination():
+            continue
+        value = parameters.get(param.name())
+        if value is None:
+            values[param.name()] = None
+            continue
+        layers = parameter_layers(alg, param, parameters, context)
+        if layers is not None:
+            values[param.name()] = [[layer.providerType(), layer.source()] for layer in layers]
+            if isinstance(value, QgsProcessingFeatureSourceDefinition) and value.selectedFeaturesOnly:
+                values[param.name()].append(sorted(layers[0].selectedFeatureIds()) if layers else [])
+        else:
+            values[param.name()] = param.valueAsPythonString(value, context)
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode("utf8")).hexdigest()
+
+
+def record_run(alg, parameters, context):
+    """
+    Stores statistics about the finished execution of an R script algorithm in the run history
+    """
+    try:
+        input_sizes = {}
+        for param in alg.parameterDefinitions():
+            if param.isDestination():
+                continue
+            paths = parameter_source_paths(alg, param, parameters, context)
+            if paths:
+                input_sizes[param.name()] = sum(RUtils.file_size(path) for path in paths)
+
+        output_sizes = {}
+        for name, value in alg.results.items():
+            if isinstance(value, str) and os.path.exists(value):
+                output_sizes[name] = RUtils.file_size(value)
+
+        RunHistory().record(
+            {
+                "algorithm_id": alg.id(),
+                "script_hash": hashlib.sha256(alg.script.encode("utf8")).hexdigest(),
+                "parameters_fingerprint": parameters_fingerprint(alg, parameters, context),
+                "input_size": sum(input_sizes.values()),
+                "input_sizes": input_sizes,
+                "duration": alg.phase_durations.get("total"),
+                "phase_durations": alg.phase_durations,
+                "peak_rss": alg.r_peak_rss,
+                "exit_status": alg.r_exit_status,
+                "output_size": sum(output_sizes.values()),
+                "output_sizes": output_sizes,
+                "cache_hit": alg.cache_hit,
+            }
+        )
+    except (OSError, sqlite3.Error, TypeError, ValueError) as e:
+        # the history must never break the execution itself
+        log(RUtils.tr("Could not record R script execution in the run history: {}").format(e))
+
+
+def add_profile_report_parameter(alg):
+    """
+    Enables profiling of the script of an algorithm and adds the parameter for the profiling report
+    """
+    alg.profile_script = True
+    if alg.parameterDefinition(alg.R_PROFILE_REPORT) is None:
+        alg.addParameter(
+            QgsProcessingParameterFileDestination(
+                alg.R_PROFILE_REPORT, RUtils.tr("R Profile Report"), RUtils.tr("HTML files (*.html)"), optional=True
+            )
+        )
+
+
+def profiled_r_commands(alg, parameters, context, feedback):
+    """
+    Returns the body of the R script of an algorithm wrapped in profiling commands. The body is written to a
+    separate file, so that line numbers reported by Rprof match the script commands.
+    """
+    alg.profile_body_filename = RUtils.create_r_script_from_commands(
+        alg.build_r_commands(parameters, context, feedback)
+    )
+    rprof_filename = QgsProcessingUtils.generateTempFilename("processing_profile.out")
+    alg.profile_summary_filename = QgsProcessingUtils.generateTempFilename("processing_profile.tsv")
+    return alg.r_templates.profile_script(
+        QDir.fromNativeSeparators(alg.profile_body_filename),
+        QDir.fromNativeSeparators(rprof_filename),
+        QDir.fromNativeSeparators(alg.profile_summary_filename),
+    )
+
+
+def write_resource_usage(alg, feedback):
+    """
+    Writes the resource usage of the R process sampled during an execution as a CSV file, and reports
+    the peak values
+    """
+    peaks = alg.resource_monitor.peaks()
+    feedback.pushInfo(
+        RUtils.tr(
+            "R process peak usage: memory {0:.1f} MB, CPU time {1:.2f} s, {2} threads, "
+            "{3:.1f} MB read, {4:.1f} MB written"
+        ).format(
+            peaks["rss_kb"] / 1024,
+            peaks["cpu_time"],
+            peaks["threads"],
+            peaks["read_bytes"] / 1024 / 1024,
+            peaks["write_bytes"] / 1024 / 1024,
+        )
+    )
+
+    filename = QgsProcessingUtils.generateTempFilename("processing_resources.csv")
+    alg.resource_monitor.write_csv(filename)
+    alg.results[alg.R_RESOURCE_USAGE] = filename
+
+
+def write_profile_report(alg, parameters, context, feedback):
+    """
+    Writes the HTML profiling report of an execution, based on the summary written by the profiled R script
+    """
+    if not alg.profile_summary_filename or not os.path.exists(alg.profile_summary_filename):
+        feedback.reportError(RUtils.tr("R profiling summary was not created, no profile report is available."))
+        return
+
+    with open(alg.profile_summary_filename, "r", encoding="utf8") as f:
+        totals, rows = RUtils.parse_profile_summary(f, os.path.basename(alg.profile_body_filename))
+
+    html_filename = alg.parameterAsFileOutput(parameters, alg.R_PROFILE_REPORT, context)
+    if not html_filename:
+        html_filename = QgsProcessingUtils.generateTempFilename("processing_profile.html")
+    with open(html_filename, "w", encoding="utf8") as f:
+        f.write(RUtils.html_formatted_profile_report(totals, rows, alg.commands, alg.command_line_numbers))
+    feedback.pushInfo(RUtils.tr("R profile report written to {}").format(html_filename))
+    alg.results[alg.R_PROFILE_REPORT] = html_filename
+
+
+def write_plots_html(alg, parameters, context):
+    """
+    Writes the HTML output showing the plots of the script of an algorithm
+    """
+    html_filename = alg.parameterAsFileOutput(parameters, alg.RPLOTS, context)
+    if html_filename:
+        with open(html_filename, "w", encoding="utf8") as f:
+            f.write('<html><img src="{}"/></html>'.format(QUrl.fromLocalFile(alg.plots_filename).toString()))
+        alg.results[alg.RPLOTS] = html_filename
+
+
+def write_console_output_html(alg, parameters, context, output):
+    """
+    Writes the HTML output showing the R console output of the script of an algorithm
+    """
+    html_filename = alg.parameterAsFileOutput(parameters, alg.R_CONSOLE_OUTPUT, context)
+    if html_filename:
+        with open(html_filename, "w", encoding="utf8") as f:
+            f.write(RUtils.html_formatted_console_output(output))
+        alg.results[alg.R_CONSOLE_OUTPUT] = html_filename
@@ -23,16 +23,25 @@ import platform
 import re
 import subprocess
 import sys
+import threading
+import time
 from ctypes import cdll
-from typing import Optional
+from html import escape
+from typing import Dict, List, Optional
 
 from processing.core.ProcessingConfig import ProcessingConfig
 from processing.tools.system import mkdir, userFolder
 from qgis.core import Qgis, QgsMessageLog, QgsProcessingUtils
 from qgis.PyQt.QtCore import QCoreApplication
 
+from processing_r.processing.process_monitor import ProcessMonitor
+
 DEBUG = True
 
+# outputs of the R code run by RUtils.r_probe, by R executable, library folder and code
+_r_probes = {}
+_r_probes_lock = threading.Lock()
+
 
 class RUtils:  # pylint: disable=too-many-public-methods
     """
@@ -45,6 +54,41 @@ class RUtils:  # pylint: disable=too-many-public-methods
     R_LIBS_USER = "R_LIBS_USER"
     R_USE_USER_LIB = "R_USE_USER_LIB"
     R_REPO = "R_REPO"
+    R_PROFILE = "R_PROFILE"
+    R_RUN_HISTORY = "R_RUN_HISTORY"
+    R_MONITOR_INTERVAL = "R_MONITOR_INTERVAL"
+    R_CACHE_RESULTS = "R_CACHE_RESULTS"
+    R_RESULT_CACHE_SIZE = "R_RESULT_CACHE_SIZE"
+    R_CONVERSION_CACHE_SIZE = "R_CONVERSION_CACHE_SIZE"
+    R_CONVERSION_CACHE_MAX_AGE = "R_CONVERSION_CACHE_MAX_AGE"
+    R_PARAMETER_BUNDLE_THRESHOLD = "R_PARAMETER_BUNDLE_THRESHOLD"
+    R_LAZY_INPUTS = "R_LAZY_INPUTS"
+    R_EXPORT_THREADS = "R_EXPORT_THREADS"
+    R_INTERCHANGE_FORMAT = "R_INTERCHANGE_FORMAT"
+    R_OUTPUT_FORMAT = "R_OUTPUT_FORMAT"
+    R_RASTER_BACKEND = "R_RASTER_BACKEND"
+
+    R_RASTER_CREATION_OPTIONS = "R_RASTER_CREATION_OPTIONS"
+    R_RASTER_DATATYPE = "R_RASTER_DATATYPE"
+    R_RASTER_NA_FLAG = "R_RASTER_NA_FLAG"
+    R_GDAL_NUM_THREADS = "R_GDAL_NUM_THREADS"
+
+    # R packages which can read and write raster layers, the first is the default
+    RASTER_BACKENDS = ["raster", "terra", "stars"]
+
+    # data types of raster outputs, as named by raster and terra, with the matching GDAL data types
+    RASTER_DATATYPES = {
+        "INT1U": "Byte",
+        "INT2S": "Int16",
+        "INT2U": "UInt16",
+        "INT4S": "Int32",
+        "INT4U": "UInt32",
+        "FLT4S": "Float32",
+        "FLT8S": "Float64",
+    }
+
+    # compression methods of raster outputs
+    RASTER_COMPRESSIONS = ["NONE", "DEFLATE", "LZW", "ZSTD", "LZMA", "LERC", "LERC_DEFLATE", "LERC_ZSTD", "PACKBITS"]
 
     VALID_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
 
@@ -113,6 +157,208 @@ class RUtils:  # pylint: disable=too-many-public-methods
         """
         return ProcessingConfig.getSetting(RUtils.R_USE_USER_LIB)
 
+    @staticmethod
+    def profile_scripts() -> bool:
+        """
+        Returns True if all R scripts should be run with profiling enabled
+        """
+        return bool(ProcessingConfig.getSetting(RUtils.R_PROFILE))
+
+    @staticmethod
+    def record_run_history() -> bool:
+        """
+        Returns True if executions of R scripts should be recorded in the run history
+        """
+        return bool(ProcessingConfig.getSetting(RUtils.R_RUN_HISTORY))
+
+    @staticmethod
+    def monitor_interval() -> float:
+        """
+        Returns the interval in seconds for sampling resource usage of R processes, 0 if monitoring is disabled
+        """
+        try:
+            return max(float(ProcessingConfig.getSetting(RUtils.R_MONITOR_INTERVAL) or 0), 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def cache_results() -> bool:
+        """
+        Returns True if results of all R scripts should be cached, not only those marked as cacheable
+        """
+        return bool(ProcessingConfig.getSetting(RUtils.R_CACHE_RESULTS))
+
+    @staticmethod
+    def result_cache_size() -> int:
+        """
+        Returns the maximum size of the result cache in bytes
+        """
+        try:
+            return max(int(ProcessingConfig.getSetting(RUtils.R_RESULT_CACHE_SIZE) or 0), 0) * 1024 * 1024
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def conversion_cache_size() -> int:
+        """
+        Returns the maximum size of the cache of converted input layers in bytes, 0 if the cache is disabled
+        """
+        try:
+            return max(int(ProcessingConfig.getSetting(RUtils.R_CONVERSION_CACHE_SIZE) or 0), 0) * 1024 * 1024
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def conversion_cache_max_age() -> int:
+        """
+        Returns the time in seconds after which converted layers which are not stored in files are exported again,
+        0 if such layers are not cached
+        """
+        try:
+            return max(int(ProcessingConfig.getSetting(RUtils.R_CONVERSION_CACHE_MAX_AGE) or 0), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def parameter_bundle_threshold() -> int:
+        """
+        Returns the length of R code in characters from which parameter values are passed in a JSON file
+        instead of being written into the script, 0 if values are always written into the script
+        """
+        try:
+            return max(int(ProcessingConfig.getSetting(RUtils.R_PARAMETER_BUNDLE_THRESHOLD) or 0), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    @staticmethod
+    def lazy_inputs() -> bool:
+        """
+        Returns True if input layers of all scripts should be read only when the script uses them
+        """
+        return bool(ProcessingConfig.getSetting(RUtils.R_LAZY_INPUTS))
+
+    @staticmethod
+    def export_threads() -> int:
+        """
+        Returns the number of threads exporting input layers which R can not read directly
+        """
+        try:
+            return max(int(ProcessingConfig.getSetting(RUtils.R_EXPORT_THREADS) or 1), 1)
+        except (TypeError, ValueError):
+            return 1
+
+    @staticmethod
+    def raster_backend() -> str:
+        """
+        Returns the R package used to read and write raster layers of scripts which do not set one
+        """
+        value = str(ProcessingConfig.getSetting(RUtils.R_RASTER_BACKEND) or "").strip().lower()
+        return value if value in RUtils.RASTER_BACKENDS else RUtils.RASTER_BACKENDS[0]
+
+    @staticmethod
+    def default_raster_output_options() -> Dict:
+        """
+        Returns the options of raster outputs set in the provider settings, see parse_raster_output_options.
+        Invalid settings are ignored.
+        """
+        options = {"format": None, "datatype": None, "na_flag": None, "creation_options": []}
+        creation_options = str(ProcessingConfig.getSetting(RUtils.R_RASTER_CREATION_OPTIONS) or "")
+        for token in creation_options.replace(",", " ").split():
+            try:
+                parsed = RUtils.parse_raster_output_options([token])
+            except ValueError:
+                continue
+            options["format"] = parsed["format"] or options["format"]
+            options["creation_options"].extend(parsed["creation_options"])
+
+        datatype = str(ProcessingConfig.getSetting(RUtils.R_RASTER_DATATYPE) or "").strip()
+        if datatype:
+            try:
+                options["datatype"] = RUtils.parse_raster_output_options([datatype])["datatype"]
+            except ValueError:
+                pass
+
+        na_flag = str(ProcessingConfig.getSetting(RUtils.R_RASTER_NA_FLAG) or "").strip()
+        if na_flag:
+            try:
+                options["na_flag"] = float(na_flag)
+            except ValueError:
+                pass
+        return options
+
+    @staticmethod
+    def parse_raster_output_options(tokens: List[str]) -> Dict:
+        """
+        Parses the options of a raster output, given after the output type as in
+        ##out=output raster COG DEFLATE INT2S NAflag=-9999 PREDICTOR=2
+
+        Tokens are the COG format, a compression method, TILED, a data type as named by raster and terra
+        or by GDAL, NAflag=value and any other GDAL creation option as KEY=VALUE.
+
+        :return: dict with "format", "datatype" (raster/terra name), "na_flag" (None if not set) and
+            "creation_options" (list of KEY=VALUE strings)
+        """
+        gdal_datatypes = {gdal.upper(): datatype for datatype, gdal in RUtils.RASTER_DATATYPES.items()}
+        options = {"format": None, "datatype": None, "na_flag": None, "creation_options": []}
+        for token in tokens:
+            upper = token.upper()
+            if upper == "COG":
+                options["format"] = "COG"
+            elif upper == "TILED":
+                options["creation_options"].append("TILED=YES")
+            elif upper in RUtils.RASTER_COMPRESSIONS:
+                options["creation_options"].append("COMPRESS={}".format(upper))
+            elif upper in RUtils.RASTER_DATATYPES:
+                options["datatype"] = upper
+            elif upper in gdal_datatypes:
+                options["datatype"] = gdal_datatypes[upper]
+            elif upper.startswith("NAFLAG="):
+                options["na_flag"] = float(token.split("=", 1)[1])
+            elif "=" in token and not token.startswith("="):
+                options["creation_options"].append(token)
+            else:
+                raise ValueError("Unknown raster output option {}".format(token))
+        return options
+
+    @staticmethod
+    def merge_raster_output_options(defaults: Dict, options: Optional[Dict]) -> Dict:
+        """
+        Returns the default raster output options overridden by the options of an output
+        """
+        if options is None:
+            return defaults
+
+        merged = {key: options[key] if options[key] is not None else defaults[key] for key in defaults}
+        keys = {option.split("=", 1)[0].upper() for option in options["creation_options"]}
+        merged["creation_options"] = [
+            option for option in defaults["creation_options"] if option.split("=", 1)[0].upper() not in keys
+        ] + options["creation_options"]
+        return merged
+
+    @staticmethod
+    def gdal_num_threads() -> Optional[str]:
+        """
+        Returns the GDAL_NUM_THREADS value used by R scripts, or None to keep the GDAL default
+        """
+        value = str(ProcessingConfig.getSetting(RUtils.R_GDAL_NUM_THREADS) or "").strip()
+        return value if value else None
+
+    @staticmethod
+    def interchange_format() -> str:
+        """
+        Returns the configured format of layers exported for R, "auto" to choose a format supported by QGIS and R
+        """
+        value = ProcessingConfig.getSetting(RUtils.R_INTERCHANGE_FORMAT)
+        return str(value).strip().lower() if value else "gpkg"
+
+    @staticmethod
+    def output_format() -> str:
+        """
+        Returns the configured format of temporary vector outputs
+        """
+        value = ProcessingConfig.getSetting(RUtils.R_OUTPUT_FORMAT)
+        return str(value).strip().lower() if value else "gpkg"
+
     @staticmethod
     def r_library_folder():
         """
@@ -207,6 +453,54 @@ class RUtils:  # pylint: disable=too-many-public-methods
                 f.write(command + "\n")
         return script_file
 
+    @staticmethod
+    def file_size(path: str) -> int:
+        """
+        Returns the size of a file in bytes, or total size of all files for a folder
+        """
+        if os.path.isdir(path):
+            return sum(
+                os.path.getsize(os.path.join(folder, name)) for folder, _, files in os.walk(path) for name in files
+            )
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        return 0
+
+    @staticmethod
+    def dataset_files(path: str) -> List[str]:
+        """
+        Returns the files of a dataset: the file itself and its sidecar files sharing the file name, such as
+        the .dbf and .shx files of a shapefile or .aux.xml files of rasters
+        """
+        folder, name = os.path.split(path)
+        stem = os.path.splitext(name)[0]
+        files = []
+        for sibling in sorted(os.listdir(folder or ".")):
+            sibling_stem, extension = os.path.splitext(sibling)
+            if sibling == name or sibling.startswith(name + ".") or (sibling_stem == stem and extension):
+                if os.path.isfile(os.path.join(folder, sibling)):
+                    files.append(os.path.join(folder, sibling))
+        return files
+
+    @staticmethod
+    def file_fingerprint(path: str) -> List:
+        """
+        Returns the names, sizes and modification times of the files of a dataset, or of all files in a folder
+        """
+        if os.path.isdir(path):
+            files = sorted(os.path.join(folder, name) for folder, _, names in os.walk(path) for name in names)
+        elif os.path.isfile(path):
+            files = RUtils.dataset_files(path)
+        else:
+            return []
+
+        fingerprint = []
+        for file in files:
+            stat = os.stat(file)
+            name = os.path.relpath(file, path) if os.path.isdir(path) else os.path.basename(file)
+            fingerprint.append([name, stat.st_size, stat.st_mtime_ns])
+        return fingerprint
+
     @staticmethod
     def is_error_line(line):
         """
@@ -253,14 +547,22 @@ class RUtils:  # pylint: disable=too-many-public-methods
     def execute_r_algorithm(alg, parameters, context, feedback):
         """
         Runs a prepared algorithm in R, and returns a list of the output received from R
+
+        Durations of the script building and R execution phases are stored in the phase_durations
+        dict of the algorithm, the exit status and peak memory (in kB, if known) of the R process
+        in its r_exit_status and r_peak_rss attributes. The peak memory of the R process tree is
+        polled from /proc while R runs, so it is only known where /proc is available. If resource
+        monitoring is enabled, the finished ProcessMonitor is stored in the resource_monitor attribute.
         """
         # generate new R script file name in a temp folder
 
+        start = time.perf_counter()
         script_lines = alg.build_r_script(parameters, context, feedback)
         for line in script_lines:
             feedback.pushCommandInfo(line)
 
         script_filename = RUtils.create_r_script_from_commands(script_lines)
+        alg.phase_durations["build_script"] = time.perf_counter() - start
 
         # run commands
         command = [RUtils.path_to_r_executable(script_executable=True), script_filename]
@@ -269,6 +571,7 @@ class RUtils:  # pylint: disable=too-many-public-methods
 
         console_results = []
 
+        start = time.perf_counter()
         with subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
@@ -277,6 +580,11 @@ class RUtils:  # pylint: disable=too-many-public-methods
             universal_newlines=True,
             **RUtils.get_process_keywords()
         ) as proc:
+            monitor = None
+            if ProcessMonitor.is_supported() and (RUtils.monitor_interval() > 0 or RUtils.record_run_history()):
+                monitor = ProcessMonitor(proc.pid, RUtils.monitor_interval() or ProcessMonitor.PEAK_RSS_INTERVAL)
+                monitor.start()
+
             for line in iter(proc.stdout.readline, ""):
                 if feedback.isCanceled():
                     proc.terminate()
@@ -286,6 +594,15 @@ class RUtils:  # pylint: disable=too-many-public-methods
                 else:
                     feedback.pushConsoleInfo(line.strip())
                 console_results.append(line.strip())
+
+            if monitor is not None:
+                monitor.stop()
+                alg.r_peak_rss = monitor.peak_rss()
+                if RUtils.monitor_interval() > 0:
+                    alg.resource_monitor = monitor
+
+        alg.r_exit_status = proc.returncode
+        alg.phase_durations["r_execution"] = time.perf_counter() - start
         return console_results
 
     @staticmethod
@@ -300,6 +617,80 @@ class RUtils:  # pylint: disable=too-many-public-methods
         s += "</code>"
         return s
 
+    @staticmethod
+    def parse_profile_summary(lines, source_name=None):
+        """
+        Parses the summary file written by a profiled R script run.
+
+        Returns a tuple of (totals dict, list of per line dicts). The per line dicts contain the
+        line number within the profiled source file (or None if the samples had no location, or
+        belong to a file other than source_name), self and total time in seconds and the memory
+        allocated in MB.
+        """
+        totals = {}
+        rows = []
+        header = None
+        for line in lines:
+            line = line.rstrip("\n").rstrip("\r")
+            if not line:
+                continue
+            if line.startswith("#"):
+                key, _, value = line[1:].partition("\t")
+                totals[key] = float(value) if value else 0.0
+                continue
+            values = line.split("\t")
+            if header is None:
+                header = values
+                continue
+            row = dict(zip(header, values))
+            location = row.get("line", "")
+            source_line = None
+            if "#" in location and (source_name is None or location.rsplit("#", 1)[0] == source_name):
+                try:
+                    source_line = int(location.rsplit("#", 1)[1])
+                except ValueError:
+                    source_line = None
+            rows.append(
+                {
+                    "line": source_line,
+                    "self_time": float(row.get("self.time", 0) or 0),
+                    "total_time": float(row.get("total.time", 0) or 0),
+                    "memory": float(row.get("mem.total", 0) or 0),
+                }
+            )
+        return totals, rows
+
+    @staticmethod
+    def html_formatted_profile_report(totals, rows, commands, line_numbers):
+        """
+        Returns a HTML formatted profiling report. The profiled lines are mapped back to
+        the line numbers of the original script file using line_numbers, which holds the
+        source line number for each of the profiled commands.
+        """
+        s = "<h2>{}</h2>\n".format(RUtils.tr("R Profile"))
+        s += "<p>{}: {:.2f} s<br />\n".format(RUtils.tr("Sampled time"), totals.get("sampling_time", 0))
+        s += "{}: {:.1f} MB</p>\n".format(RUtils.tr("Maximum memory used"), totals.get("max_memory_mb", 0))
+        s += "<table>\n<tr><th>{}</th><th>{}</th><th>{}</th><th>{}</th><th>{}</th></tr>\n".format(
+            RUtils.tr("Line"),
+            RUtils.tr("Code"),
+            RUtils.tr("Self time (s)"),
+            RUtils.tr("Total time (s)"),
+            RUtils.tr("Memory (MB)"),
+        )
+        for row in sorted(rows, key=lambda r: r["total_time"], reverse=True):
+            index = row["line"] - 1 if row["line"] is not None else -1
+            if 0 <= index < len(commands):
+                line_number = line_numbers[index] if index < len(line_numbers) else row["line"]
+                code = escape(commands[index])
+            else:
+                line_number = ""
+                code = RUtils.tr("(no source location)")
+            s += "<tr><td>{}</td><td><code>{}</code></td><td>{:.2f}</td><td>{:.2f}</td><td>{:.1f}</td></tr>\n".format(
+                line_number, code, row["self_time"], row["total_time"], row["memory"]
+            )
+        s += "</table>"
+        return s
+
     @staticmethod
     def path_to_r_executable(script_executable=False) -> str:
         """
@@ -386,6 +777,56 @@ class RUtils:  # pylint: disable=too-many-public-methods
 
         return None
 
+    @staticmethod
+    def r_probe(code: str) -> str:
+        """
+        Runs R code with Rscript and returns what it printed, or an empty string if R could not be run.
+        Starting R takes a while, so the code is only run once for the configured R executable and library.
+        """
+        library = str(RUtils.r_library_folder()).replace("\\", "/") if RUtils.use_user_library() else None
+        key = (RUtils.path_to_r_executable(script_executable=True), library, code)
+        with _r_probes_lock:
+            if key in _r_probes:
+                return _r_probes[key]
+
+        if library is not None:
+            code = '.libPaths("{0}"); {1}'.format(library, code)
+
+        output = ""
+        try:
+            with subprocess.Popen(
+                [key[0], "-e", code],
+                stdout=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True,
+                **RUtils.get_process_keywords()
+            ) as proc:
+                output = proc.stdout.read().strip()
+        except OSError:
+            pass
+
+        with _r_probes_lock:
+            _r_probes[key] = output
+        return output
+
+    @staticmethod
+    def is_r_package_installed(package: str) -> bool:
+        """
+        Returns True if an R package is installed, in the user library if used
+        """
+        return RUtils.r_probe('cat(requireNamespace("{}", quietly = TRUE))'.format(package)).endswith("TRUE")
+
+    @staticmethod
+    def r_vector_drivers() -> List[str]:
+        """
+        Returns the names of the GDAL vector drivers available to the sf package in R
+        """
+        output = RUtils.r_probe(
+            'if (requireNamespace("sf", quietly = TRUE)) cat(sf::st_drivers("vector")$name, sep = ",")'
+        )
+        return [driver for driver in output.split(",") if driver]
+
     @staticmethod
     def get_required_packages(code):
         """
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+***************************************************************************
+    vector_inputs.py
+    ---------------------
+    Date                 : October 2026
+    Copyright            : (C) 2026 by North Road
+***************************************************************************
+*                                                                         *
+*   This program is free software; you can redistribute it and/or modify  *
+*   it under the terms of the GNU General Public License as published by  *
+*   the Free Software Foundation; either version 2 of the License, or     *
+*   (at your option) any later version.                                   *
+*                                                                         *
+***************************************************************************
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from osgeo import ogr
+from qgis.core import QgsProviderRegistry, QgsVectorLayer
+
+# longer selections are exported, as parsing huge SQL statements is slower than the export
+MAX_FID_FILTER_LENGTH = 100000
+
+
+def is_ogr_disk_based_layer(layer: QgsVectorLayer) -> bool:
+    """
+    Returns True if the layer is a disk based OGR layer, which can be read directly by R
+    """
+    if layer.dataProvider().name() != "ogr":
+        return False
+
+    # we only support direct reading of disk based ogr layers -- not ogr postgres layers, etc
+    source_parts = QgsProviderRegistry.instance().decodeUri("ogr", layer.source())
+    if not source_parts.get("path"):
+        return False
+    # no support for directly reading layers by id in R
+    return not source_parts.get("layerId")
+
+
+def quote_sql_identifier(identifier: str) -> str:
+    """
+    Returns a layer or field name quoted for an SQL query, with double quotes escaped
+    """
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+def fid_filter(fid_column: str, fids: List[int]) -> str:
+    """
+    Returns an SQL condition matching features by their ids, runs of consecutive ids are matched as ranges
+    """
+    runs = []
+    for fid in sorted(fids):
+        if runs and fid == runs[-1][1] + 1:
+            runs[-1][1] = fid
+        else:
+            runs.append([fid, fid])
+
+    if not runs:
+        return "0 = 1"
+
+    single_ids = []
+    conditions = []
+    for first, last in runs:
+        if last - first < 2:
+            single_ids.extend(range(first, last + 1))
+        else:
+            conditions.append("{0} BETWEEN {1} AND {2}".format(fid_column, first, last))
+    if single_ids:
+        conditions.append("{0} IN ({1})".format(fid_column, ",".join(str(fid) for fid in single_ids)))
+    return "({})".format(" OR ".join(conditions))
+
+
+def ogr_sql_query(
+    layer: QgsVectorLayer, selected_only: bool, fields: Optional[List[str]] = None, geometry: bool = True
+) -> Tuple[Optional[str], bool]:
+    """
+    Returns an SQL query reading the features of the subset of an OGR layer, and only the selected features,
+    the given fields and no geometries if requested, from the layer file, or None if the subset or the
+    selection can not be expressed in SQL. The query is returned with whether it reads the geometries.
+    """
+    source_parts = QgsProviderRegistry.instance().decodeUri("ogr", layer.source())
+    layer_name = source_parts.get("layerName") or Path(source_parts["path"]).stem
+    subset = layer.subsetString().strip()
+    if subset.lower().startswith("select"):
+        # subset is a complete OGR SQL statement
+        return None, True
+
+    columns = "*"
+    reads_geometry = True
+    conditions = []
+    if subset:
+        conditions.append("({})".format(subset))
+    if selected_only or fields is not None or not geometry:
+        dataset = ogr.Open(source_parts["path"])
+        ogr_layer = dataset.GetLayerByName(layer_name) if dataset is not None else None
+        if ogr_layer is None:
+            return None, True
+        fid_column = ogr_layer.GetFIDColumn()
+        geometry_column = ogr_layer.GetGeometryColumn()
+        definition = ogr_layer.GetLayerDefn()
+        all_fields = [definition.GetFieldDefn(i).GetName() for i in range(definition.GetFieldCount())]
+        ogr_layer = None
+        dataset = None
+
+        selected_columns = (fields if fields is not None else all_fields) + (
+            [geometry_column] if geometry_column and geometry else []
+        )
+        # with no column left to select, such as no used fields of a shapefile, all columns are read
+        if (fields is not None or not geometry) and selected_columns:
+            # formats with no geometry column name use the OGR SQL dialect, which always reads the geometry
+            reads_geometry = geometry or not geometry_column
+            columns = ",".join(quote_sql_identifier(column) for column in selected_columns)
+        if selected_only:
+            # FID is the special field of the OGR SQL dialect, used when the format has no FID column
+            condition = fid_filter(
+                quote_sql_identifier(fid_column) if fid_column else "FID", layer.selectedFeatureIds()
+            )
+            if len(condition) > MAX_FID_FILTER_LENGTH:
+                return None, True
+            conditions.append(condition)
+
+    query = "SELECT {0} FROM {1}".format(columns, quote_sql_identifier(layer_name))
+    if conditions:
+        query += " WHERE {}".format(" AND ".join(conditions))
+    return query, reads_geometry
@@ -0,0 +1,71 @@
+"""
+Shared fixtures for the benchmark suite.
+
+The benchmarks need pytest-benchmark and are only run when pytest is called with
+`--benchmark-only` (see the `benchmark` target of the Makefile), regular test runs skip them.
+"""
+
+from pathlib import Path
+
+import pytest
+from corpus import CORPUS_FILES, huge_body_script, huge_header_script, small_script
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from processing_r.processing.utils import RUtils
+
+try:
+    import pytest_benchmark  # pylint: disable=unused-import
+except ImportError:
+    collect_ignore_glob = ["test_*.py"]
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Skip benchmarks unless pytest-benchmark is asked to run benchmarks only
+    """
+    if config.getoption("benchmark_only", default=False):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark-only")
+    for item in items:
+        if BENCHMARKS_FOLDER in Path(str(item.fspath)).parents:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def rsx_corpus(tmp_path_factory) -> dict:
+    """
+    Generates the synthetic script corpora, returns a dict with paths to the single scripts
+    and to the folder with many scripts
+    """
+    root = tmp_path_factory.mktemp("rsx_corpus")
+
+    corpus = {}
+    for name, script in (
+        ("small", small_script()),
+        ("huge_header", huge_header_script()),
+        ("huge_body", huge_body_script()),
+    ):
+        path = root / "{}.rsx".format(name)
+        path.write_text(script, encoding="utf8")
+        corpus[name] = path.as_posix()
+
+    many = root / "many"
+    many.mkdir()
+    for i in range(CORPUS_FILES):
+        (many / "benchmark_{}.rsx".format(i)).write_text(small_script(i), encoding="utf8")
+    corpus["many"] = many.as_posix()
+
+    return corpus
+
+
+@pytest.fixture
+def scripts_folder_setting():
+    """
+    Restores the scripts folder setting after the test changes it
+    """
+    original = ProcessingConfig.getSetting(RUtils.RSCRIPTS_FOLDER)
+    yield
+    ProcessingConfig.setSettingValue(RUtils.RSCRIPTS_FOLDER, original)
@@ -0,0 +1,163 @@
+"""
+Generators of synthetic R scripts used by the benchmarks.
+
+Sizes of the generated corpora can be changed with environment variables.
+"""
+
+import os
+
+CORPUS_FILES = int(os.environ.get("R_BENCHMARK_CORPUS_FILES", "2000"))
+HUGE_HEADER_PARAMETERS = int(os.environ.get("R_BENCHMARK_HEADER_PARAMETERS", "500"))
+HUGE_BODY_LINES = int(os.environ.get("R_BENCHMARK_BODY_LINES", "50000"))
+LIST_LENGTH = int(os.environ.get("R_BENCHMARK_LIST_LENGTH", "1000"))
+STRESS_JOBS = int(os.environ.get("R_STRESS_JOBS", "64"))
+STRESS_WORKERS = [int(workers) for workers in os.environ.get("R_STRESS_WORKERS", "1,8,32").split(",")]
+STRESS_FEATURES = int(os.environ.get("R_STRESS_FEATURES", "1000"))
+TABLE_ROWS = int(os.environ.get("R_BENCHMARK_TABLE_ROWS", "2000000"))
+INTERCHANGE_FEATURES = [
+    int(features) for features in os.environ.get("R_BENCHMARK_INTERCHANGE_FEATURES", "1000,100000,1000000").split(",")
+]
+
+
+def small_script(index: int = 0) -> str:
+    """
+    Returns a small script, similar to the usual user script
+    """
+    return "\n".join(
+        [
+            "##Benchmark small {}=name".format(index),
+            "##Benchmarks=group",
+            "##Layer=vector",
+            "##Field=Field Layer",
+            "##Size=number 10",
+            "##Method=enum literal mean;median;sum",
+            "##Output=output vector",
+            "Output <- Layer[1:Size, ]",
+            ">summary(Output[[Field]])",
+        ]
+    )
+
+
+def huge_header_script(parameters: int = HUGE_HEADER_PARAMETERS, list_length: int = LIST_LENGTH) -> str:
+    """
+    Returns a script with a large number of parameters, including long enum option lists
+    """
+    options = ";".join("option_{}".format(i) for i in range(list_length))
+    lines = ["##Benchmark huge header=name", "##Benchmarks=group", "##Layer=vector"]
+    for i in range(parameters):
+        kind = i % 5
+        if kind == 0:
+            lines.append("##number_{0}=number {0}".format(i))
+        elif kind == 1:
+            lines.append("##string_{0}=string value {0}".format(i))
+        elif kind == 2:
+            lines.append("##enum_{0}=enum literal multiple {1}".format(i, options))
+        elif kind == 3:
+            lines.append("##field_{0}=Field multiple Layer".format(i))
+        else:
+            lines.append("##bool_{0}=boolean True".format(i))
+    lines.append("##Output=output vector")
+    lines.append("Output <- Layer")
+    return "\n".join(lines)
+
+
+def huge_body_script(lines_count: int = HUGE_BODY_LINES) -> str:
+    """
+    Returns a script with a small header and a large body
+    """
+    lines = ["##Benchmark huge body=name", "##Benchmarks=group", "##Layer=vector", "##Output=output vector"]
+    for i in range(lines_count):
+        if i % 100 == 0:
+            lines.append(">print({})".format(i))
+        else:
+            lines.append("x_{0} <- nrow(Layer) + {0}".format(i))
+    lines.append("Output <- Layer")
+    return "\n".join(lines)
+
+
+def huge_header_parameters(parameters: int = HUGE_HEADER_PARAMETERS, list_length: int = LIST_LENGTH) -> dict:
+    """
+    Returns parameter values matching huge_header_script
+    """
+    values = {}
+    fields = ["field_{}".format(i) for i in range(list_length)]
+    for i in range(parameters):
+        kind = i % 5
+        if kind == 0:
+            values["number_{}".format(i)] = i
+        elif kind == 1:
+            values["string_{}".format(i)] = "value {}".format(i)
+        elif kind == 2:
+            values["enum_{}".format(i)] = list(range(list_length))
+        elif kind == 3:
+            values["field_{}".format(i)] = fields
+        else:
+            values["bool_{}".format(i)] = bool(i % 2)
+    return values
+
+
+def stress_script() -> str:
+    """
+    Returns the script run by the concurrency stress test, the job number is passed back as
+    an output value to check that results do not get mixed between concurrent executions
+    """
+    return "\n".join(
+        [
+            "##Benchmark stress=name",
+            "##Benchmarks=group",
+            "##Layer=vector",
+            "##Job=number 0",
+            "##Output=output vector",
+            "##Job_id=output number",
+            "Output <- Layer",
+            "Job_id <- Job",
+        ]
+    )
+
+
+def write_points_layer(path: str, features: int = STRESS_FEATURES):
+    """
+    Writes a GeoPackage layer with a grid of points
+    """
+    from osgeo import ogr, osr  # pylint: disable=import-outside-toplevel
+
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    layer = dataset.CreateLayer("points", srs, ogr.wkbPoint)
+    layer.CreateField(ogr.FieldDefn("value", ogr.OFTReal))
+    layer.StartTransaction()
+    for i in range(features):
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetField("value", i / 10)
+        feature.SetGeometry(ogr.CreateGeometryFromWkt("POINT ({} {})".format(i % 100, i // 100)))
+        layer.CreateFeature(feature)
+    layer.CommitTransaction()
+    dataset = None
+
+
+def write_table_layer(path: str, rows: int = TABLE_ROWS):
+    """
+    Writes a GeoPackage attribute table with integer, real, string and date columns
+    """
+    from osgeo import ogr  # pylint: disable=import-outside-toplevel
+
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(path)
+    layer = dataset.CreateLayer("table", None, ogr.wkbNone)
+    for name, kind in (
+        ("count", ogr.OFTInteger64),
+        ("value", ogr.OFTReal),
+        ("name", ogr.OFTString),
+        ("day", ogr.OFTDate),
+    ):
+        layer.CreateField(ogr.FieldDefn(name, kind))
+    layer.StartTransaction()
+    for i in range(rows):
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetField("count", i)
+        feature.SetField("value", i / 10)
+        feature.SetField("name", "name {}".format(i % 1000))
+        feature.SetField("day", 2000 + i % 20, 1 + i % 12, 1 + i % 28, 0, 0, 0, 0)
+        layer.CreateFeature(feature)
+    layer.CommitTransaction()
+    dataset = None
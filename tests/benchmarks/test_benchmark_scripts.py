@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+from corpus import huge_header_parameters
+from processing.core.ProcessingConfig import ProcessingConfig
+from qgis.core import QgsProcessingContext, QgsProcessingFeedback
+
+from processing_r.processing.algorithm import RAlgorithm
+from processing_r.processing.provider import RAlgorithmProvider
+from processing_r.processing.utils import RUtils
+
+SINGLE_SCRIPTS = ["small", "huge_header", "huge_body"]
+
+
+@pytest.mark.parametrize("corpus_name", SINGLE_SCRIPTS)
+def test_load_from_file(benchmark, rsx_corpus, corpus_name):
+    """
+    Benchmark loading a script file, including parsing and creating the parameters
+    """
+    alg = benchmark(RAlgorithm, description_file=rsx_corpus[corpus_name])
+    assert alg.error is None
+
+
+@pytest.mark.parametrize("corpus_name", SINGLE_SCRIPTS)
+def test_parse_script(benchmark, rsx_corpus, corpus_name):
+    """
+    Benchmark parsing a script from string
+    """
+    script = Path(rsx_corpus[corpus_name]).read_text(encoding="utf8")
+    alg = benchmark(RAlgorithm, description_file=None, script=script)
+    assert alg.error is None
+
+
+@pytest.mark.parametrize("corpus_name", SINGLE_SCRIPTS)
+def test_create_instance(benchmark, rsx_corpus, corpus_name):
+    """
+    Benchmark creating a new instance of an algorithm, as done by Processing for each execution
+    """
+    alg = RAlgorithm(description_file=rsx_corpus[corpus_name])
+    instance = benchmark(alg.createInstance)
+    assert instance.name() == alg.name()
+
+
+def test_load_scripts_from_folder(benchmark, rsx_corpus):
+    """
+    Benchmark discovering a folder with thousands of scripts
+    """
+    provider = RAlgorithmProvider()
+    algs = benchmark(provider.load_scripts_from_folder, rsx_corpus["many"])
+    assert algs
+
+
+def test_load_algorithms(benchmark, rsx_corpus, scripts_folder_setting):  # pylint: disable=unused-argument
+    """
+    Benchmark the provider populating its algorithms from a folder with thousands of scripts
+    """
+    ProcessingConfig.setSettingValue(RUtils.RSCRIPTS_FOLDER, rsx_corpus["many"])
+    provider = RAlgorithmProvider()
+    benchmark(provider.refreshAlgorithms)
+    assert provider.algorithms()
+
+
+@pytest.mark.parametrize("corpus_name", ["small", "huge_body"])
+def test_build_r_script(benchmark, rsx_corpus, data_folder, corpus_name):
+    """
+    Benchmark generating the R script for small and long scripts
+    """
+    alg = RAlgorithm(description_file=rsx_corpus[corpus_name])
+    parameters = {"Layer": (data_folder / "lines.shp").as_posix(), "Output": "/tmp/benchmark_output.gpkg"}
+
+    script = benchmark(alg.build_r_script, parameters, QgsProcessingContext(), QgsProcessingFeedback())
+    assert script
+
+
+def test_build_r_script_huge_header(benchmark, rsx_corpus, data_folder):
+    """
+    Benchmark generating the R script for hundreds of parameters with long field and enum lists
+    """
+    alg = RAlgorithm(description_file=rsx_corpus["huge_header"])
+    parameters = huge_header_parameters()
+    parameters["Layer"] = (data_folder / "lines.shp").as_posix()
+    parameters["Output"] = "/tmp/benchmark_output.gpkg"
+
+    script = benchmark(alg.build_r_script, parameters, QgsProcessingContext(), QgsProcessingFeedback())
+    assert script
@@ -0,0 +1,136 @@
+"""
+Stress test of concurrent executions of an R algorithm.
+
+Many executions are started at once on background threads, each with its own algorithm instance,
+context and feedback as Processing does. The run is measured as a benchmark and the throughput,
+latencies and leaked file handles and temporary files are stored in the benchmark extra info.
+
+By default the fake Rscript backend is used, its latency can be set with the FAKE_R_* environment
+variables (see tests/fake_r/Rscript). Set R_STRESS_BACKEND=r to run the jobs with the configured R.
+The load is configured with R_STRESS_JOBS, R_STRESS_WORKERS (comma separated list of pool sizes)
+and R_STRESS_FEATURES (size of the input layer).
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from corpus import STRESS_JOBS, STRESS_WORKERS, stress_script, write_points_layer
+from qgis.core import QgsProcessingContext, QgsProcessingFeedback, QgsProcessingUtils
+
+from processing_r.processing.algorithm import RAlgorithm
+from processing_r.processing.run_history import RunHistory
+
+FD_FOLDER = Path("/proc/self/fd")
+
+
+@pytest.fixture
+def r_backend(request):
+    """
+    Selects the backend used to run the jobs
+    """
+    if os.environ.get("R_STRESS_BACKEND", "fake") == "fake":
+        request.getfixturevalue("fake_r")
+
+
+@pytest.fixture(scope="module")
+def stress_input(tmp_path_factory) -> dict:
+    """
+    Writes the stress test script and its input layer
+    """
+    root = tmp_path_factory.mktemp("stress")
+    script = root / "stress.rsx"
+    script.write_text(stress_script(), encoding="utf8")
+    layer = root / "points.gpkg"
+    write_points_layer(layer.as_posix())
+    return {"script": script.as_posix(), "layer": layer.as_posix()}
+
+
+def open_files() -> int:
+    """
+    Returns the number of file descriptors open by this process
+    """
+    return len(os.listdir(FD_FOLDER))
+
+
+def temp_files() -> int:
+    """
+    Returns the number of files in the Processing temporary folder
+    """
+    return sum(len(files) for _, _, files in os.walk(QgsProcessingUtils.tempFolder()))
+
+
+def run_job(alg: RAlgorithm, layer: str, output_folder: Path, job: int) -> dict:
+    """
+    Runs a single execution on a new instance of the algorithm, returns its results and latency
+    """
+    instance = alg.createInstance()
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    output = (output_folder / "output_{}.gpkg".format(job)).as_posix()
+
+    start = time.perf_counter()
+    results, ok = instance.run({"Layer": layer, "Job": job, "Output": output}, context, feedback)
+    return {"job": job, "ok": ok, "results": results, "output": output, "latency": time.perf_counter() - start}
+
+
+def run_jobs(alg: RAlgorithm, layer: str, output_folder: Path, workers: int, jobs: int) -> list:
+    """
+    Runs the jobs on a pool of worker threads
+    """
+    output_folder.mkdir(exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda job: run_job(alg, layer, output_folder, job), range(jobs)))
+
+
+@pytest.mark.skipif(not FD_FOLDER.is_dir(), reason="counting open files needs /proc")
+@pytest.mark.parametrize("workers", STRESS_WORKERS)
+def test_concurrent_executions(
+    benchmark, r_backend, stress_input, tmp_path, workers
+):  # pylint: disable=unused-argument
+    """
+    Benchmark many concurrent executions, checking their results and leaked resources
+    """
+    alg = RAlgorithm(description_file=stress_input["script"])
+    assert alg.error is None
+
+    # warm up, so that connection pools and caches filled by the first executions are not counted as leaks
+    run_jobs(alg, stress_input["layer"], tmp_path / "warmup", workers, workers)
+
+    files_before = open_files()
+    temp_before = temp_files()
+    start = time.perf_counter()
+    jobs = benchmark.pedantic(
+        run_jobs, args=(alg, stress_input["layer"], tmp_path / "jobs", workers, STRESS_JOBS), rounds=1, iterations=1
+    )
+    duration = time.perf_counter() - start
+    leaked_files = open_files() - files_before
+    temp_per_job = (temp_files() - temp_before) / STRESS_JOBS
+
+    latencies = sorted(job["latency"] for job in jobs)
+    benchmark.extra_info.update(
+        {
+            "jobs": STRESS_JOBS,
+            "workers": workers,
+            "throughput": STRESS_JOBS / duration,
+            "latency_p50": RunHistory.percentile(latencies, 50),
+            "latency_p95": RunHistory.percentile(latencies, 95),
+            "latency_max": latencies[-1],
+            "leaked_file_descriptors": leaked_files,
+            "temp_files_per_job": temp_per_job,
+        }
+    )
+
+    failed = [job["job"] for job in jobs if not job["ok"]]
+    assert not failed, "failed jobs: {}".format(failed)
+    for job in jobs:
+        assert job["results"]["Output"] == job["output"]
+        assert Path(job["output"]).exists()
+        assert float(job["results"]["Job_id"]) == job["job"]
+
+    # descriptors leaked by each execution grow with the number of jobs, pooled connections do not
+    assert leaked_files < STRESS_JOBS
+    # the generated script and the output values file
+    assert temp_per_job <= 2
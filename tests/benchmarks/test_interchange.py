@@ -0,0 +1,158 @@
+"""
+Benchmarks of the formats used to exchange layers with R.
+
+Tables are exported from QGIS as done for inputs which R can not read directly, and read back
+as done by QGIS when loading outputs written by R. The number of rows is set with
+R_BENCHMARK_TABLE_ROWS.
+
+Spatial layers are measured over a matrix of formats and feature counts (R_BENCHMARK_INTERCHANGE_FEATURES,
+comma separated), for the round trip of an input: written once by QGIS and read once. Layers are read
+with OGR, or with sf in the configured R with R_BENCHMARK_BACKEND=r.
+"""
+
+import os
+import subprocess
+
+import pytest
+from corpus import INTERCHANGE_FEATURES, TABLE_ROWS, write_points_layer, write_table_layer
+from qgis.core import QgsFeatureRequest, QgsProcessingContext, QgsProcessingFeedback, QgsVectorLayer
+
+from processing_r.processing import interchange
+from processing_r.processing.layer_export import VectorLayerExport
+from processing_r.processing.utils import RUtils
+
+TABLE_FORMATS = {"csv": "CSV", "gpkg": "GPKG", "parquet": "Parquet"}
+
+
+@pytest.fixture(scope="module")
+def table_layer(tmp_path_factory) -> QgsVectorLayer:
+    """
+    Writes the benchmark table and returns it as layer
+    """
+    path = tmp_path_factory.mktemp("interchange") / "table.gpkg"
+    write_table_layer(path.as_posix())
+    layer = QgsVectorLayer(path.as_posix(), "table", "ogr")
+    assert layer.featureCount() == TABLE_ROWS
+    return layer
+
+
+def export_table(layer: QgsVectorLayer, path: str, file_format: str) -> str:
+    """
+    Exports the table in the given format
+    """
+    return VectorLayerExport(
+        layer, False, path, QgsProcessingContext(), geometry=False, driver_name=TABLE_FORMATS[file_format]
+    ).run(QgsProcessingFeedback())
+
+
+def read_table(path: str) -> int:
+    """
+    Reads all rows of an exported table, returns the number of rows
+    """
+    layer = QgsVectorLayer(path, "", "ogr")
+    return sum(1 for _ in layer.getFeatures(QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)))
+
+
+def skip_missing_driver(file_format: str):
+    """
+    Skips the benchmark if GDAL can not write the format
+    """
+    if not interchange.gdal_has_driver(TABLE_FORMATS[file_format]):
+        pytest.skip("GDAL was built without the {} driver".format(TABLE_FORMATS[file_format]))
+
+
+@pytest.mark.parametrize("file_format", list(TABLE_FORMATS))
+def test_export_table(benchmark, table_layer, tmp_path, file_format):
+    """
+    Benchmark exporting a table as input of a script
+    """
+    skip_missing_driver(file_format)
+    paths = iter(tmp_path / "table_{0}.{1}".format(i, file_format) for i in range(1000))
+    path = benchmark.pedantic(
+        lambda: export_table(table_layer, next(paths).as_posix(), file_format), rounds=3, iterations=1
+    )
+    assert QgsVectorLayer(path, "", "ogr").featureCount() == TABLE_ROWS
+
+
+@pytest.mark.parametrize("file_format", list(TABLE_FORMATS))
+def test_read_table(benchmark, table_layer, tmp_path, file_format):
+    """
+    Benchmark reading a table written by a script
+    """
+    skip_missing_driver(file_format)
+    path = export_table(table_layer, (tmp_path / "table.{}".format(file_format)).as_posix(), file_format)
+    benchmark.extra_info["file_size"] = (tmp_path / "table.{}".format(file_format)).stat().st_size
+    assert benchmark(read_table, path) == TABLE_ROWS
+
+
+@pytest.fixture(scope="module")
+def points_layers(tmp_path_factory) -> dict:
+    """
+    Writes the benchmark point layers, returns them by feature count
+    """
+    root = tmp_path_factory.mktemp("interchange_points")
+    layers = {}
+    for features in INTERCHANGE_FEATURES:
+        path = root / "points_{}.gpkg".format(features)
+        write_points_layer(path.as_posix(), features)
+        layers[features] = QgsVectorLayer(path.as_posix(), "points", "ogr")
+    return layers
+
+
+def read_layer(path: str) -> int:
+    """
+    Reads all features of an exported layer, with OGR or with sf in R, returns the number of features
+    """
+    if os.environ.get("R_BENCHMARK_BACKEND") == "r":
+        output = subprocess.run(
+            [
+                RUtils.path_to_r_executable(script_executable=True),
+                "-e",
+                'cat(nrow(sf::st_read("{}", quiet = TRUE)))'.format(path),
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+        return int(output.strip().split()[-1])
+
+    from osgeo import ogr  # pylint: disable=import-outside-toplevel
+
+    dataset = ogr.Open(path)
+    layer = dataset.GetLayer(0)
+    count = 0
+    for feature in layer:
+        if feature.GetGeometryRef() is not None:
+            count += 1
+    return count
+
+
+def round_trip(layer: QgsVectorLayer, path: str, file_format: str) -> int:
+    """
+    Exports a layer in the given interchange format and reads it back
+    """
+    VectorLayerExport(
+        layer,
+        False,
+        path,
+        QgsProcessingContext(),
+        driver_name=interchange.DRIVERS[file_format],
+        layer_options=interchange.LAYER_OPTIONS.get(file_format),
+    ).run(QgsProcessingFeedback())
+    return read_layer(path)
+
+
+@pytest.mark.parametrize("features", INTERCHANGE_FEATURES)
+@pytest.mark.parametrize("file_format", interchange.VECTOR_FORMATS)
+def test_vector_round_trip(benchmark, points_layers, tmp_path, file_format, features):
+    """
+    Benchmark the round trip of a spatial input in each interchange format
+    """
+    if not interchange.gdal_has_driver(interchange.DRIVERS[file_format]):
+        pytest.skip("GDAL was built without the {} driver".format(interchange.DRIVERS[file_format]))
+    paths = iter(tmp_path / "points_{0}.{1}".format(i, file_format) for i in range(1000))
+    count = benchmark.pedantic(
+        lambda: round_trip(points_layers[features], next(paths).as_posix(), file_format), rounds=3, iterations=1
+    )
+    benchmark.extra_info.update({"format": file_format, "features": features})
+    assert count == features
@@ -8,12 +8,26 @@ from qgis.PyQt.QtCore import QCoreApplication, QSettings
 from processing_r.processing.provider import RAlgorithmProvider
 from processing_r.processing.utils import RUtils
 
+FAKE_R_FOLDER = Path(__file__).parent / "fake_r"
+
 
 @pytest.fixture
 def data_folder() -> Path:
     return Path(__file__).parent / "data"
 
 
+@pytest.fixture
+def fake_r(monkeypatch):
+    """
+    Uses the fake Rscript backend from tests/fake_r instead of R, the backend
+    is configured through environment variables set with the returned monkeypatch
+    """
+    original = ProcessingConfig.getSetting(RUtils.R_FOLDER)
+    ProcessingConfig.setSettingValue(RUtils.R_FOLDER, FAKE_R_FOLDER.as_posix())
+    yield monkeypatch
+    ProcessingConfig.setSettingValue(RUtils.R_FOLDER, original)
+
+
 @pytest.fixture(autouse=True, scope="session")
 def setup_plugin():
     QCoreApplication.setOrganizationName("North Road")
@@ -1,15 +1,30 @@
+import json
+import shutil
+
 import pytest
+from osgeo import gdal
+from processing.core.ProcessingConfig import ProcessingConfig
 from qgis.core import (
     QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
     QgsProcessing,
     QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeatureSourceDefinition,
     QgsProcessingFeedback,
+    QgsRasterLayer,
     QgsVectorLayer,
 )
 from qgis.PyQt.QtCore import QDate, QDateTime, QTime
 from qgis.PyQt.QtGui import QColor
 
+from processing_r.processing import interchange, utils
 from processing_r.processing.algorithm import RAlgorithm
+from processing_r.processing.raster_inputs import can_stack_rasters
+from processing_r.processing.utils import RUtils
+from processing_r.processing.vector_inputs import fid_filter, ogr_sql_query
 from tests.utils import IS_API_BELOW_31000, IS_API_BELOW_31400, USE_API_30900, data_path, script_path
 
 
@@ -132,6 +147,288 @@ def test_read_sf():
         assert 'Layer2 <- st_read("/tmp' == script[1]
 
 
+def test_read_sf_subset_and_selection():
+    """
+    Test reading subsets and selections of vector inputs with SQL queries
+    """
+    alg = RAlgorithm(description_file=script_path("test_vectorin.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    vl = QgsVectorLayer(data_path("test_gpkg.gpkg") + "|layername=points", "points", "ogr")
+    assert vl.isValid()
+    vl.selectByIds([1, 2, 3, 5])
+    context.temporaryLayerStore().addMapLayer(vl)
+
+    source = QgsProcessingFeatureSourceDefinition(vl.id(), True)
+    script = alg.build_import_commands({"Layer": source}, context, feedback)
+    assert script[0] == (
+        'Layer <- st_read("{}", query = "SELECT * FROM \\"points\\" WHERE (\\"fid\\" BETWEEN 1 AND 3 OR '
+        '\\"fid\\" IN (5))", quiet = TRUE, stringsAsFactors = FALSE)'.format(data_path("test_gpkg.gpkg"))
+    )
+
+    lines = QgsVectorLayer(data_path("lines.shp"), "lines", "ogr")
+    assert lines.isValid()
+    lines.setSubsetString('"Value" > 1')
+
+    script = alg.build_import_commands({"Layer": lines}, context, feedback)
+    assert script[0] == (
+        'Layer <- st_read("{}", query = "SELECT * FROM \\"lines\\" WHERE (\\"Value\\" > 1)", quiet = TRUE, '
+        "stringsAsFactors = FALSE)".format(data_path("lines.shp"))
+    )
+
+
+def test_ogr_sql_query_names(tmp_path):
+    """
+    Test SQL queries of OGR layers with no fields to select and with quotes in names
+    """
+    lines = QgsVectorLayer(data_path("lines.shp"), "lines", "ogr")
+    assert lines.isValid()
+
+    # shapefiles have no geometry column to select
+    assert ogr_sql_query(lines, False, []) == ('SELECT * FROM "lines"', True)
+    assert ogr_sql_query(lines, False, [], False) == ('SELECT * FROM "lines"', True)
+
+    for extension in ["shp", "shx", "dbf", "prj"]:
+        shutil.copy(data_path("lines.{}".format(extension)), str(tmp_path / 'li"nes.{}'.format(extension)))
+    quoted = QgsVectorLayer(str(tmp_path / 'li"nes.shp'), "lines", "ogr")
+    assert quoted.isValid()
+    quoted.setSubsetString('"Value" > 1')
+
+    assert ogr_sql_query(quoted, False, ["Name"]) == (
+        'SELECT "Name" FROM "li""nes" WHERE ("Value" > 1)',
+        True,
+    )
+
+
+def test_read_sf_fields():
+    """
+    Test reading only the fields of vector inputs used by the script
+    """
+    alg = RAlgorithm(description_file=script_path("test_layer_fields.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.input_fields == {"Layer": ["Name", "Value_field"]}
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    script = alg.build_import_commands({"Layer": data_path("lines.shp"), "Value_field": "Value"}, context, feedback)
+    assert script[0] == (
+        'Layer <- st_read("{}", query = "SELECT \\"Name\\",\\"Value\\" FROM \\"lines\\"", quiet = TRUE, '
+        "stringsAsFactors = FALSE)".format(data_path("lines.shp"))
+    )
+
+    uri = "Point?crs=epsg:4326&field=Name:string&field=Value:integer&field=Other:integer"
+    layer = QgsVectorLayer(uri, "", "memory")
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes(["a", 1, 2])
+    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(1, 2)))
+    layer.dataProvider().addFeatures([feature])
+
+    script = alg.build_import_commands({"Layer": layer, "Value_field": "Value"}, context, feedback)
+    exported = QgsVectorLayer(script[0].split('"')[1], "", "ogr")
+    assert exported.featureCount() == 1
+    assert exported.fields().lookupField("Name") >= 0
+    assert exported.fields().lookupField("Value") >= 0
+    assert exported.fields().lookupField("Other") < 0
+
+    layer = QgsVectorLayer("Point?crs=epsg:4326&field=Value:integer", "", "memory")
+    with pytest.raises(QgsProcessingException):
+        alg.build_import_commands({"Layer": layer, "Value_field": "Value"}, context, feedback)
+
+
+def test_read_sf_no_geometry(fake_r):  # pylint: disable=unused-argument
+    """
+    Test reading vector inputs without geometries, with R missing the arrow package
+    """
+    alg = RAlgorithm(description_file=script_path("test_no_geometry.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.no_geometry_inputs == {"Layer"}
+    assert alg.parameterDefinition("Layer") is not None
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    script = alg.build_import_commands(
+        {"Layer": data_path("lines.shp"), "Layer2": data_path("lines.shp")}, context, feedback
+    )
+    # shapefiles are read with the OGR SQL dialect, which always reads geometries
+    assert script[0] == (
+        'Layer <- sf::st_drop_geometry(st_read("{}", query = "SELECT \\"Name\\",\\"Value\\" FROM \\"lines\\"", '
+        "quiet = TRUE, stringsAsFactors = FALSE))".format(data_path("lines.shp"))
+    )
+    assert script[1] == 'Layer2 <- st_read("{}", quiet = TRUE, stringsAsFactors = FALSE)'.format(data_path("lines.shp"))
+
+    layer = QgsVectorLayer("Polygon?crs=epsg:4326&field=Value:integer", "", "memory")
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes([1])
+    feature.setGeometry(QgsGeometry.fromWkt("Polygon ((0 0, 1 0, 1 1, 0 0))"))
+    layer.dataProvider().addFeatures([feature])
+
+    script = alg.build_import_commands({"Layer": layer}, context, feedback)
+    assert script[0].startswith('Layer <- st_read("')
+    exported = QgsVectorLayer(script[0].split('"')[1], "", "ogr")
+    assert exported.featureCount() == 1
+    assert not exported.isSpatial()
+
+
+def test_read_table_parquet(fake_r):
+    """
+    Test exchanging attribute tables as Parquet files if both GDAL and R support it
+    """
+    if not interchange.gdal_has_driver("Parquet"):
+        pytest.skip("GDAL was built without the Parquet driver")
+    fake_r.setenv("FAKE_R_PACKAGES", "arrow")
+    fake_r.setattr(utils, "_r_probes", {})
+
+    alg = RAlgorithm(description_file=script_path("test_no_geometry.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    layer = QgsVectorLayer("Point?crs=epsg:4326&field=Value:integer", "", "memory")
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes([1])
+    feature.setGeometry(QgsGeometry.fromWkt("Point (0 0)"))
+    layer.dataProvider().addFeatures([feature])
+    table = QgsVectorLayer("None?field=Name:string", "", "memory")
+    feature = QgsFeature(table.fields())
+    feature.setAttributes(["a"])
+    table.dataProvider().addFeatures([feature])
+
+    script = alg.build_import_commands({"Layer": layer, "Layer2": table}, context, feedback)
+    for command, field in zip(script[:2], ("Value", "Name")):
+        assert command.startswith('as.data.frame(arrow::read_parquet("', command.index("<- ") + 3)
+        exported = QgsVectorLayer(command.split('"')[1], "", "ogr")
+        assert exported.featureCount() == 1
+        assert not exported.isSpatial()
+        assert exported.fields().names() == [field]
+
+    # spatial layers are still exchanged with their geometries
+    script = alg.build_import_commands({"Layer": table, "Layer2": layer}, context, feedback)
+    assert script[1].startswith('Layer2 <- st_read("')
+
+
+def test_interchange_format(fake_r):
+    """
+    Test choosing the format of exported spatial layers
+    """
+    fake_r.setattr(utils, "_r_probes", {})
+    original = ProcessingConfig.getSetting(RUtils.R_INTERCHANGE_FORMAT)
+
+    alg = RAlgorithm(description_file=script_path("test_field_names.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    layer = QgsVectorLayer("Point?crs=epsg:4326&field=id:integer", "", "memory")
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes([1])
+    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(1, 2)))
+    layer.dataProvider().addFeatures([feature])
+
+    try:
+        ProcessingConfig.setSettingValue(RUtils.R_INTERCHANGE_FORMAT, "auto")
+        assert interchange.vector_format() == "gpkg"
+
+        if interchange.gdal_has_driver("FlatGeobuf"):
+            fake_r.setenv("FAKE_R_SF_DRIVERS", "GPKG,FlatGeobuf")
+            fake_r.setattr(utils, "_r_probes", {})
+            assert interchange.vector_format() == "fgb"
+
+            script = alg.build_import_commands({"Layer": layer}, context, feedback)
+            assert script[0].endswith('Layer.fgb", quiet = TRUE, stringsAsFactors = FALSE)')
+            exported = QgsVectorLayer(script[0].split('"')[1], "", "ogr")
+            assert exported.featureCount() == 1
+
+        # a configured format is used even if R does not report it
+        ProcessingConfig.setSettingValue(RUtils.R_INTERCHANGE_FORMAT, "GPKG")
+        assert interchange.vector_format() == "gpkg"
+    finally:
+        ProcessingConfig.setSettingValue(RUtils.R_INTERCHANGE_FORMAT, original)
+
+
+def test_default_output_formats(plugin_provider, monkeypatch):
+    """
+    Test the default extensions of temporary outputs, which are chosen without running R
+    """
+
+    def r_probe(code):
+        raise AssertionError("R must not be run to choose the output format: {}".format(code))
+
+    monkeypatch.setattr(RUtils, "r_probe", r_probe)
+    original = ProcessingConfig.getSetting(RUtils.R_OUTPUT_FORMAT)
+
+    try:
+        assert plugin_provider.defaultVectorFileExtension(True) == "gpkg"
+        assert plugin_provider.defaultVectorFileExtension(False) == "csv"
+
+        if interchange.gdal_has_driver("FlatGeobuf"):
+            ProcessingConfig.setSettingValue(RUtils.R_OUTPUT_FORMAT, "fgb")
+            assert plugin_provider.defaultVectorFileExtension(True) == "fgb"
+            assert plugin_provider.defaultVectorFileExtension(False) == "csv"
+
+        if interchange.gdal_has_driver("Parquet"):
+            ProcessingConfig.setSettingValue(RUtils.R_OUTPUT_FORMAT, "parquet")
+            assert plugin_provider.defaultVectorFileExtension(True) == "parquet"
+            assert plugin_provider.defaultVectorFileExtension(False) == "parquet"
+    finally:
+        ProcessingConfig.setSettingValue(RUtils.R_OUTPUT_FORMAT, original)
+
+
+def test_raster_backend():
+    """
+    Test reading rasters and extents with the raster backend of the script
+    """
+    alg = RAlgorithm(description_file=script_path("test_raster_backend.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    script = alg.build_import_commands({"Layer": data_path("dem.tif"), "Area": "1,2,3,4"}, context, feedback)
+    assert 'Layer <- terra::rast("{}")'.format(data_path("dem.tif")) in script
+    assert "Area <- terra::ext(1.0,2.0,3.0,4.0)" in script
+
+    alg.r_templates.raster_backend = "stars"
+    script = alg.build_import_commands({"Layer": data_path("dem.tif"), "Area": "1,2,3,4"}, context, feedback)
+    assert 'Layer <- stars::read_stars("{}", proxy = TRUE)'.format(data_path("dem.tif")) in script
+    assert "Area <- sf::st_bbox(c(xmin = 1.0, xmax = 2.0, ymin = 3.0, ymax = 4.0))" in script
+
+    # scripts without the directive use the provider setting
+    original = ProcessingConfig.getSetting(RUtils.R_RASTER_BACKEND)
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_BACKEND, "terra")
+    try:
+        alg = RAlgorithm(description_file=script_path("test_raster_in_out.rsx"))
+        alg.initAlgorithm()
+        script = alg.build_r_script(
+            {"Layer": data_path("dem.tif"), "out_raster": "/tmp/raster.tif"}, context, feedback
+        )
+    finally:
+        ProcessingConfig.setSettingValue(RUtils.R_RASTER_BACKEND, original)
+    assert 'library("terra")' in script
+    assert 'library("raster")' not in script
+    assert 'Layer <- terra::rast("{}")'.format(data_path("dem.tif")) in script
+    assert 'terra::writeRaster(out_raster, "/tmp/raster.tif", overwrite = TRUE)' in script
+
+
+def test_fid_filter():
+    """
+    Test SQL conditions matching feature ids
+    """
+    assert fid_filter("FID", []) == "0 = 1"
+    assert fid_filter("FID", [4, 1, 2]) == "(FID IN (1,2,4))"
+    assert fid_filter('"fid"', [7, 1, 2, 3, 4, 9]) == '("fid" BETWEEN 1 AND 4 OR "fid" IN (7,9))'
+
+
 def test_read_raster():
     """
     Test reading raster inputs
@@ -190,6 +487,55 @@ def test_read_multi_raster():
     assert script == ["Layer = list()"]
 
 
+def test_read_multi_raster_stack():
+    """
+    Test raster multilayer input parameter stacked in a VRT
+    """
+    alg = RAlgorithm(description_file=script_path("test_stack_multiple_rasters.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.stack_multiple_rasters is True
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    script = alg.build_import_commands({"Layer": [data_path("dem.tif"), data_path("dem2.tif")]}, context, feedback)
+
+    assert len(script) == 1
+    assert script[0].startswith('Layer <- brick("')
+    assert script[0].endswith('Layer.vrt")')
+
+    stack = QgsRasterLayer(script[0].split('"')[1], "stack", "gdal")
+    assert stack.isValid()
+    assert stack.bandCount() == 2
+
+    script = alg.build_import_commands({"Layer": []}, context, feedback)
+    assert script == ["Layer <- NULL"]
+
+
+def test_read_multi_raster_stack_different_grids(tmp_path):
+    """
+    Test raster multilayer input parameter with layers on different grids passed as a list
+    """
+    alg = RAlgorithm(description_file=script_path("test_stack_multiple_rasters.rsx"))
+    alg.initAlgorithm()
+
+    window = str(tmp_path / "window.tif")
+    gdal.Translate(window, data_path("dem.tif"), srcWin=[0, 0, 100, 100]).FlushCache()
+
+    dem = QgsRasterLayer(data_path("dem.tif"), "dem", "gdal")
+    assert can_stack_rasters([dem, QgsRasterLayer(data_path("dem2.tif"), "dem2", "gdal")])
+    assert not can_stack_rasters([dem, QgsRasterLayer(window, "window", "gdal")])
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    script = alg.build_import_commands({"Layer": [data_path("dem.tif"), window]}, context, feedback)
+
+    assert len(script) == 3
+    assert script[0].startswith('tempvar0 <- brick("')
+    assert script[1].startswith('tempvar1 <- brick("')
+    assert script[2] == "Layer = list(tempvar0,tempvar1)"
+
+
 def test_read_multi_vector():
     """
     Test vector multilayer input parameter
@@ -220,6 +566,114 @@ def test_read_multi_vector():
     assert script == ["Layer = list()"]
 
 
+def test_lazy_inputs():
+    """
+    Test inputs read only when used, with layers of the same source read once
+    """
+    alg = RAlgorithm(description_file=script_path("test_lazy_inputs.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    script = alg.build_r_script(
+        {"Layer": data_path("lines.shp"), "Layer2": data_path("lines.shp"), "Raster": data_path("dem.tif")},
+        context,
+        feedback,
+    )
+
+    assert ".qgis_inputs <- new.env()" in script
+    assert (
+        'delayedAssign("Layer", .qgis_read_input("1", st_read("{}", quiet = TRUE, stringsAsFactors = FALSE)))'.format(
+            data_path("lines.shp")
+        )
+        in script
+    )
+    assert (
+        'delayedAssign("Layer2", .qgis_read_input("1", st_read("{}", quiet = TRUE, stringsAsFactors = FALSE)))'.format(
+            data_path("lines.shp")
+        )
+        in script
+    )
+    assert 'delayedAssign("Raster", .qgis_read_input("2", brick("{}")))'.format(data_path("dem.tif")) in script
+    assert "Optional <- NULL" in script
+    assert script.index(".qgis_inputs <- new.env()") < script.index("Count <- nrow(Layer)")
+
+
+def test_read_multi_vector_parallel_export():
+    """
+    Test layers of vector multilayer input parameter exported on worker threads
+    """
+    alg = RAlgorithm(description_file=script_path("test_multivectorin.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    layers = []
+    for i in range(5):
+        layer = QgsVectorLayer("Point?crs=epsg:4326&field=id:integer", "points_{}".format(i), "memory")
+        features = []
+        for j in range(i + 1):
+            feature = QgsFeature(layer.fields())
+            feature.setAttributes([j])
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(i, j)))
+            features.append(feature)
+        layer.dataProvider().addFeatures(features)
+        layers.append(layer)
+
+    script = alg.build_import_commands({"Layer": layers + [data_path("lines.shp")]}, context, feedback)
+
+    assert script[-1] == "Layer = list(tempvar0,tempvar1,tempvar2,tempvar3,tempvar4,tempvar5)"
+    assert script[5] == 'tempvar5 <- st_read("{}", quiet = TRUE, stringsAsFactors = FALSE)'.format(
+        data_path("lines.shp")
+    )
+    for i in range(5):
+        assert script[i].startswith('tempvar{} <- st_read("'.format(i))
+        exported = QgsVectorLayer(script[i].split('"')[1], "", "ogr")
+        assert exported.featureCount() == i + 1
+
+
+def test_clip_inputs():
+    """
+    Test inputs clipped to an extent parameter
+    """
+    alg = RAlgorithm(description_file=script_path("test_clip_inputs.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.clip_inputs_to == "Area"
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    raster = QgsRasterLayer(data_path("dem.tif"), "dem", "gdal")
+    extent = raster.extent()
+    extent.scale(0.5)
+    area = "{},{},{},{} [{}]".format(
+        extent.xMinimum(), extent.xMaximum(), extent.yMinimum(), extent.yMaximum(), raster.crs().authid()
+    )
+
+    script = alg.build_import_commands(
+        {"Area": area, "Layer": data_path("lines.shp"), "Raster": data_path("dem.tif")}, context, feedback
+    )
+
+    assert script[1].startswith('Layer <- st_read("{}", wkt_filter = "Polygon (('.format(data_path("lines.shp")))
+    assert script[2].startswith('Raster <- brick("')
+    assert script[2].endswith('Raster_clipped.vrt")')
+
+    clipped = QgsRasterLayer(script[2].split('"')[1], "clipped", "gdal")
+    assert clipped.isValid()
+    assert clipped.width() < raster.width()
+    assert clipped.height() < raster.height()
+
+    script = alg.build_import_commands(
+        {"Layer": data_path("lines.shp"), "Raster": data_path("dem.tif")}, context, feedback
+    )
+    assert script[1] == 'Layer <- st_read("{}", quiet = TRUE, stringsAsFactors = FALSE)'.format(data_path("lines.shp"))
+    assert script[2] == 'Raster <- brick("{}")'.format(data_path("dem.tif"))
+
+
 def test_field():
     alg = RAlgorithm(description_file=script_path("test_algorithm_2.rsx"))
     alg.initAlgorithm()
@@ -419,6 +873,50 @@ def test_expressions():
     assert 'time_a <- lubridate::hms("13:45:30")' in script
 
 
+def test_expression_parameter_values():
+    """
+    Test that expressions reading parameter values are evaluated again for each run
+    """
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    alg = RAlgorithm(description_file=script_path("test_expression_parameter.rsx"))
+    alg.initAlgorithm()
+
+    for value in (1, 5):
+        alg.alg_context = alg.createExpressionContext({"Value": value}, context)
+        script = alg.build_expressions({"Value": value}, context, feedback)
+        assert script[0].startswith("doubled <- {}".format(value * 2))
+
+
+def test_expressions_parameter_bundle():
+    """
+    Test Expression parameters passed in the parameter bundle
+    """
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    alg = RAlgorithm(description_file=script_path("test_input_expression.rsx"))
+    alg.initAlgorithm()
+
+    original = ProcessingConfig.getSetting(RUtils.R_PARAMETER_BUNDLE_THRESHOLD)
+    ProcessingConfig.setSettingValue(RUtils.R_PARAMETER_BUNDLE_THRESHOLD, 500)
+    try:
+        script = alg.build_r_script({}, context, feedback)
+    finally:
+        ProcessingConfig.setSettingValue(RUtils.R_PARAMETER_BUNDLE_THRESHOLD, original)
+
+    assert "number <- 6" in script
+    assert 'geometry <- sf::st_as_sfc(structure(.qgis_parameters[["geometry"]], class = "WKB"))[[1]]' in script
+    assert all(len(line) <= 500 for line in script)
+
+    load_line = next(line for line in script if line.startswith(".qgis_parameters <- "))
+    assert script.index(load_line) < script.index("number <- 6")
+    bundle_filename = load_line.split('"')[1]
+    with open(bundle_filename, encoding="utf8") as f:
+        assert set(json.load(f)) == {"geometry"}
+
+
 def test_raster_band():
     """
     Test datetime parameter
@@ -434,6 +932,84 @@ def test_raster_band():
     assert "Band <- 1" in script
 
 
+def test_read_selected_bands(tmp_path):
+    """
+    Test reading only the bands of a raster input chosen by its band parameters
+    """
+    alg = RAlgorithm(description_file=script_path("test_selected_bands.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.selected_bands_inputs == {"Image"}
+    assert alg.parameterDefinition("Image") is not None
+
+    image = (tmp_path / "image.vrt").as_posix()
+    sources = [data_path("dem.tif"), data_path("dem2.tif"), data_path("dem.tif")]
+    gdal.BuildVRT(image, sources, separate=True).FlushCache()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    script = alg.build_import_commands({"Image": image, "Red": 3, "Nir": 2, "Other": image}, context, feedback)
+
+    assert script[0].startswith('Image <- brick("')
+    assert script[0].endswith('Image_bands.vrt")')
+    subset = QgsRasterLayer(script[0].split('"')[1], "subset", "gdal")
+    assert subset.isValid()
+    assert subset.bandCount() == 2
+    assert "Red <- 2" in script
+    assert "Nir <- 1" in script
+    assert 'Other <- brick("{}")'.format(image) in script
+
+    script = alg.build_import_commands({"Image": image, "Red": 3, "Other": image}, context, feedback)
+    assert "Red <- 1" in script
+    assert "Nir <- NULL" in script
+
+    script = alg.build_import_commands({"Image": image, "Other": image}, context, feedback)
+    assert script[0] == 'Image <- brick("{}")'.format(image)
+
+
+def test_read_raster_resolution():
+    """
+    Test reading raster inputs at a coarser resolution
+    """
+    alg = RAlgorithm(description_file=script_path("test_raster_resolution.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.input_resolutions == {"Layer": ("Cell_size", "average"), "Classes": ("1000", "mode")}
+    assert alg.parameterDefinition("Layer_resolution") is None
+
+    layer = QgsRasterLayer(data_path("dem.tif"), "dem", "gdal")
+    cell_size = layer.rasterUnitsPerPixelX() * 4
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    script = alg.build_import_commands(
+        {"Layer": data_path("dem.tif"), "Cell_size": cell_size, "Classes": data_path("dem.tif")}, context, feedback
+    )
+
+    assert script[0].startswith('Layer <- brick("')
+    assert script[0].endswith('Layer_resampled.vrt")')
+    resampled = QgsRasterLayer(script[0].split('"')[1], "resampled", "gdal")
+    assert resampled.isValid()
+    assert resampled.rasterUnitsPerPixelX() == pytest.approx(cell_size)
+    assert resampled.width() < layer.width()
+
+    # inputs are never read at a finer resolution
+    script = alg.build_import_commands(
+        {"Layer": data_path("dem.tif"), "Cell_size": layer.rasterUnitsPerPixelX() / 2, "Classes": None},
+        context,
+        feedback,
+    )
+    assert script[0] == 'Layer <- brick("{}")'.format(data_path("dem.tif"))
+
+    script = alg.build_import_commands({"Layer": data_path("dem.tif"), "Classes": None}, context, feedback)
+    assert script[0] == 'Layer <- brick("{}")'.format(data_path("dem.tif"))
+
+    alg = RAlgorithm(description_file=None, script="##Layer=raster\n##Layer_resolution=10 cubicspline\nLayer")
+    assert alg.error is not None
+
+
 def test_plot_outputs():
     """
     Test plot outputs
@@ -464,9 +1040,9 @@ def test_crs():
     assert "in_crs <- NULL" in script
 
 
-def test_convert_memory_layer_to_gpkg():
+def test_convert_memory_layer_to_gpkg(fake_r):  # pylint: disable=unused-argument
     """
-    Test reading vector inputs
+    Test reading vector inputs, with sf in R reporting no driver of the faster interchange formats
     """
     alg = RAlgorithm(description_file=script_path("test_field_names.rsx"))
     alg.initAlgorithm()
@@ -484,3 +1060,24 @@ def test_convert_memory_layer_to_gpkg():
     # test that default format is GPKG saved in tmp directory
     assert first_line.startswith('Layer <- st_read("/tmp')
     assert first_line.endswith('Layer.gpkg", quiet = TRUE, stringsAsFactors = FALSE)')
+
+
+def test_profile_commands():
+    """
+    Test that the script body is wrapped in profiling commands
+    """
+    alg = RAlgorithm(description_file=script_path("test_profile.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    script = alg.build_r_script({"Layer": data_path("lines.shp")}, context, feedback)
+
+    assert "nrow(Layer)" not in script
+    assert any(line.startswith('Rprof("') for line in script)
+    assert any(line.startswith('source("') for line in script)
+    assert "Rprof(NULL)" in script
+
+    with open(alg.profile_body_filename, encoding="utf8") as f:
+        assert f.read().splitlines() == alg.commands
@@ -1,7 +1,11 @@
+import pytest
 from qgis.core import (
     QgsProcessing,
     QgsProcessingContext,
+    QgsProcessingException,
     QgsProcessingFeedback,
+    QgsProcessingOutputLayerDefinition,
+    QgsProcessingUtils,
     QgsRasterLayer,
     QgsVectorLayer,
 )
@@ -36,6 +40,58 @@ def test_vector_outputs():
         'write.csv(OutputCSV, "/home/test/tab.csv", row.names = FALSE)',
     ]
 
+    script = alg.build_export_commands(
+        {"Output": "/home/test/lines.parquet", "OutputCSV": "/home/test/tab.parquet"}, context, feedback
+    )
+    assert script == [
+        'if (with(sf::st_drivers("vector"), any(name == "Parquet" & write))) { '
+        'st_write(Output, "/home/test/lines.parquet", layer = "lines", driver = "Parquet", quiet = TRUE) } else { '
+        'st_write(Output, "/home/test/lines.gpkg", layer = "lines", quiet = TRUE) }',
+        'if (requireNamespace("arrow", quietly = TRUE)) { '
+        'arrow::write_parquet(if (inherits(OutputCSV, "sf")) sf::st_drop_geometry(OutputCSV) else OutputCSV, '
+        '"/home/test/tab.parquet") } else { '
+        'write.csv(if (inherits(OutputCSV, "sf")) sf::st_drop_geometry(OutputCSV) else OutputCSV, '
+        '"/home/test/tab.csv", row.names = FALSE) }',
+    ]
+
+
+def test_vector_output_options():
+    """
+    Test writing vector outputs with layer creation options, and temporary outputs written for speed
+    """
+    alg = RAlgorithm(description_file=script_path("test_vectorout.rsx"))
+    alg.initAlgorithm()
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    output = QgsProcessingOutputLayerDefinition("/home/test/lines.gpkg")
+    output.createOptions = {"layerOptions": ["SPATIAL_INDEX=NO", "FID=id"]}
+    script = alg.build_export_commands({"Output": output, "OutputCSV": "/home/test/tab.csv"}, context, feedback)
+    assert script[0] == (
+        'st_write(Output, "/home/test/lines.gpkg", layer = "lines", '
+        'layer_options = c("SPATIAL_INDEX=NO", "FID=id"), quiet = TRUE)'
+    )
+
+    output.createOptions = {"layerOptions": ["SPATIAL_INDEX"]}
+    with pytest.raises(QgsProcessingException):
+        alg.build_export_commands({"Output": output, "OutputCSV": "/home/test/tab.csv"}, context, feedback)
+
+    temporary = QgsProcessingUtils.generateTempFilename("Output.gpkg")
+    script = alg.build_export_commands({"Output": temporary, "OutputCSV": "/home/test/tab.csv"}, context, feedback)
+    assert script[0] == (
+        'st_write(Output, "{}", layer = "Output", layer_options = c("SPATIAL_INDEX=NO"), '
+        'config_options = c(OGR_SQLITE_SYNCHRONOUS = "OFF", OGR_SQLITE_CACHE = "512"), quiet = TRUE)'.format(temporary)
+    )
+
+    temporary = QgsProcessingUtils.generateTempFilename("Output.fgb")
+    script = alg.build_export_commands({"Output": temporary, "OutputCSV": "/home/test/tab.csv"}, context, feedback)
+    assert script[0] == (
+        'if (with(sf::st_drivers("vector"), any(name == "FlatGeobuf" & write))) {{ '
+        'st_write(Output, "{0}", layer = "Output", driver = "FlatGeobuf", quiet = TRUE) }} else {{ '
+        'st_write(Output, "{1}", layer = "Output", quiet = TRUE) }}'.format(temporary, temporary[:-4] + ".gpkg")
+    )
+
 
 def test_multi_outputs():
     """
@@ -81,3 +137,38 @@ def test_raster_output():
     )
 
     assert 'writeRaster(out_raster, "/tmp/raster.tif", overwrite = TRUE)' in script
+
+
+def test_raster_output_options():
+    """
+    Test writing raster outputs with format, creation options, data type and no data value
+    """
+    alg = RAlgorithm(description_file=script_path("test_raster_output_options.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.raster_output_options["Compressed"] == {
+        "format": "COG",
+        "datatype": "INT2S",
+        "na_flag": -9999,
+        "creation_options": ["COMPRESS=DEFLATE", "PREDICTOR=2"],
+    }
+    assert "Plain" not in alg.raster_output_options
+    assert alg.parameterDefinition("Compressed").description() == "Compressed"
+
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+
+    script = alg.build_export_commands(
+        {"Layer": data_path("dem.tif"), "Compressed": "/tmp/compressed.tif", "Plain": "/tmp/plain.tif"},
+        context,
+        feedback,
+    )
+    assert script[0] == (
+        'writeRaster(Compressed, "/tmp/compressed.tif", format = "COG", datatype = "INT2S", NAflag = -9999, '
+        'options = c("COMPRESS=DEFLATE", "PREDICTOR=2"), overwrite = TRUE)'
+    )
+    assert script[1] == 'writeRaster(Plain, "/tmp/plain.tif", overwrite = TRUE)'
+
+    alg = RAlgorithm(description_file=None, script="##Layer=raster\n##Output=output raster GZIP\nOutput <- Layer")
+    assert alg.error is not None
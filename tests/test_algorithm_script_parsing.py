@@ -281,3 +281,49 @@ def test_console_output():
     alg.initAlgorithm()
 
     assert alg.show_console_output is True
+
+
+def test_profile():
+    alg = RAlgorithm(description_file=script_path("test_profile.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.profile_script is True
+    assert alg.parameterDefinition("R_PROFILE_REPORT").type() == "fileDestination"
+
+    # commands keep the line numbers of the source file
+    assert alg.commands[0] == "nrow(Layer)"
+    assert alg.command_line_numbers[0] == 4
+    assert alg.commands[1] == "x <- sapply(1:1000, function(i) i^2)"
+    assert alg.command_line_numbers[1] == 5
+
+
+def test_cacheable():
+    alg = RAlgorithm(description_file=script_path("test_cacheable.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.cacheable is True
+    assert alg.commands == ["Output <- Layer", "Size_out <- Size"]
+
+
+def test_lazy_inputs():
+    alg = RAlgorithm(description_file=script_path("test_lazy_inputs.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.lazy_inputs is True
+    assert alg.commands == ["Count <- nrow(Layer)"]
+
+
+def test_raster_backend():
+    alg = RAlgorithm(description_file=script_path("test_raster_backend.rsx"))
+    alg.initAlgorithm()
+
+    assert alg.error is None
+    assert alg.raster_backend == "terra"
+    assert alg.r_templates.raster_backend == "terra"
+    assert alg.parameterDefinition("Layer") is not None
+
+    alg = RAlgorithm(description_file=None, script="##raster_backend=rgdal\n##Layer=raster\nx <- Layer")
+    assert alg.error is not None
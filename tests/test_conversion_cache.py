@@ -0,0 +1,189 @@
+import pytest
+from processing.core.ProcessingConfig import ProcessingConfig
+from qgis.core import (
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProviderRegistry,
+    QgsRasterDataProvider,
+    QgsRasterLayer,
+    QgsVectorLayer,
+)
+
+from processing_r.processing.algorithm import RAlgorithm
+from processing_r.processing.cache import ConversionCache
+from processing_r.processing.utils import RUtils
+from tests.utils import data_path, script_path
+
+
+def memory_layer() -> QgsVectorLayer:
+    layer = QgsVectorLayer("point?crs=epsg:4326&field=id:integer", "layer", "memory")
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes([1])
+    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(1, 2)))
+    layer.dataProvider().addFeatures([feature])
+    return layer
+
+
+def test_layer_key():
+    """
+    Test that the key changes with the layer state
+    """
+    layer = memory_layer()
+    key = ConversionCache.layer_key(layer, False)
+    assert key == ConversionCache.layer_key(layer, False)
+
+    layer.selectByIds([1])
+    assert ConversionCache.layer_key(layer, True) != key
+
+    layer.setSubsetString("id = 1")
+    assert ConversionCache.layer_key(layer, False) != key
+    layer.setSubsetString("")
+
+    # uncommitted edits can not be cached
+    layer.startEditing()
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes([2])
+    feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(3, 4)))
+    layer.addFeature(feature)
+    assert ConversionCache.layer_key(layer, False) is None
+    layer.commitChanges()
+    assert ConversionCache.layer_key(layer, False) not in (None, key)
+
+    # file based layers
+    shapefile = QgsVectorLayer(data_path("lines.shp"), "lines", "ogr")
+    assert ConversionCache.layer_file(shapefile) == data_path("lines.shp")
+    assert ConversionCache.layer_file(layer) is None
+
+
+def test_expiry(tmp_path):
+    """
+    Test that exports of layers which are not files expire
+    """
+    source = tmp_path / "Layer.gpkg"
+    source.write_bytes(b"x" * 10)
+
+    layer = memory_layer()
+    cache = ConversionCache((tmp_path / "cache").as_posix(), 1000, 0)
+    key = ConversionCache.layer_key(layer, False)
+    cache.store(key, layer, source.as_posix())
+    assert cache.read_entry(key)["file"] == "Layer.gpkg"
+    assert cache.get(key) is None
+
+
+def test_layers_not_files_opt_in(tmp_path):
+    """
+    Test that layers which are not files are only cached with a maximum age
+    """
+    shapefile = QgsVectorLayer(data_path("lines.shp"), "lines", "ogr")
+    assert not ConversionCache((tmp_path / "cache").as_posix(), 1000, 0).caches(memory_layer())
+    assert ConversionCache((tmp_path / "cache").as_posix(), 1000, 0).caches(shapefile)
+    assert ConversionCache((tmp_path / "cache").as_posix(), 1000, 600).caches(memory_layer())
+    assert not ConversionCache((tmp_path / "cache").as_posix(), 0, 600).caches(shapefile)
+
+
+def test_deleted_layer_released():
+    """
+    Test that the data changes of a deleted layer are forgotten
+    """
+    layer = memory_layer()
+    ConversionCache.layer_generation(layer)
+    layer.dataChanged.emit()
+    assert ConversionCache.layer_generation(layer) == 1
+
+    layer.willBeDeleted.emit()
+    # disconnected from the data changes, the count starts again
+    layer.dataChanged.emit()
+    assert ConversionCache.layer_generation(layer) == 0
+
+
+@pytest.fixture
+def conversion_cache(monkeypatch, tmp_path) -> ConversionCache:
+    """
+    Conversion cache in a temporary folder instead of the user profile, caching layers which are not files
+    """
+    monkeypatch.setattr(ConversionCache, "default_folder", staticmethod(lambda: (tmp_path / "conversions").as_posix()))
+    monkeypatch.setattr(RUtils, "conversion_cache_max_age", staticmethod(lambda: 600))
+    return ConversionCache()
+
+
+def test_converted_layer_reused(fake_r, conversion_cache):  # pylint: disable=unused-argument
+    """
+    Test that a converted layer is reused by the next run
+    """
+    alg = RAlgorithm(description_file=script_path("test_field_names.rsx"))
+    alg.initAlgorithm()
+    layer = memory_layer()
+
+    feedback = QgsProcessingFeedback()
+    first = alg.build_import_commands({"Layer": layer}, QgsProcessingContext(), feedback)[0]
+    assert len(conversion_cache.entries()) == 1
+
+    second = alg.build_import_commands({"Layer": layer}, QgsProcessingContext(), feedback)[0]
+    assert second != first
+    assert second.endswith('Layer.gpkg", quiet = TRUE, stringsAsFactors = FALSE)')
+    assert len(conversion_cache.entries()) == 1
+
+
+def test_canceled_conversion_not_cached(fake_r, conversion_cache):  # pylint: disable=unused-argument
+    """
+    Test that the incomplete export of a canceled run is not cached
+    """
+    alg = RAlgorithm(description_file=script_path("test_field_names.rsx"))
+    alg.initAlgorithm()
+
+    feedback = QgsProcessingFeedback()
+    feedback.cancel()
+    with pytest.raises(QgsProcessingException):
+        alg.build_import_commands({"Layer": memory_layer()}, QgsProcessingContext(), feedback)
+    assert conversion_cache.entries() == []
+
+
+def virtual_raster_layer() -> QgsRasterLayer:
+    dem = QgsRasterLayer(data_path("dem.tif"), "dem", "gdal")
+    parameters = QgsRasterDataProvider.VirtualRasterParameters()
+    parameters.crs = dem.crs()
+    parameters.extent = dem.extent()
+    parameters.width = dem.width()
+    parameters.height = dem.height()
+    parameters.formula = '"dem@1" * 2'
+    source = QgsRasterDataProvider.VirtualRasterInputLayers()
+    source.name = "dem"
+    source.uri = data_path("dem.tif")
+    source.provider = "gdal"
+    parameters.rInputLayers = [source]
+    return QgsRasterLayer(QgsRasterDataProvider.encodeVirtualRasterProviderUri(parameters), "calc", "virtualraster")
+
+
+@pytest.mark.skipif(
+    "virtualraster" not in QgsProviderRegistry.instance().providerList(), reason="needs the virtual raster provider"
+)
+def test_raster_layer_exported(conversion_cache):
+    """
+    Test that raster layers which GDAL can not read are exported in blocks, and reused by the next run
+    """
+    threads = ProcessingConfig.getSetting(RUtils.R_EXPORT_THREADS)
+    ProcessingConfig.setSettingValue(RUtils.R_EXPORT_THREADS, 3)
+    alg = RAlgorithm(description_file=script_path("test_raster_in_out.rsx"))
+    alg.initAlgorithm()
+    layer = virtual_raster_layer()
+    assert layer.isValid()
+
+    feedback = QgsProcessingFeedback()
+    first = alg.build_import_commands({"Layer": layer}, QgsProcessingContext(), feedback)[0]
+    assert first.endswith('Layer_export.vrt")')
+    exported = QgsRasterLayer(first.split('"')[1], "exported", "gdal")
+    assert exported.isValid()
+    assert (exported.width(), exported.height()) == (layer.width(), layer.height())
+    assert exported.extent().toString(3) == layer.extent().toString(3)
+    assert len(conversion_cache.entries()) == 1
+
+    second = alg.build_import_commands({"Layer": layer}, QgsProcessingContext(), feedback)[0]
+    assert second != first
+    assert QgsRasterLayer(second.split('"')[1], "reused", "gdal").isValid()
+    assert len(conversion_cache.entries()) == 1
+
+    ProcessingConfig.setSettingValue(RUtils.R_EXPORT_THREADS, threads)
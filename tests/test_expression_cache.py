@@ -0,0 +1,80 @@
+from qgis.core import QgsExpression, QgsExpressionContext, QgsExpressionContextScope, qgsfunction
+
+from processing_r.processing.expression_cache import compiled_expression
+
+
+def context_with(variable: str, value) -> QgsExpressionContext:
+    scope = QgsExpressionContextScope()
+    scope.setVariable(variable, value)
+    context = QgsExpressionContext()
+    context.appendScope(scope)
+    return context
+
+
+def test_compiled_once():
+    """
+    Test that expression lines are parsed only once
+    """
+    compiled = compiled_expression("cached_number=expression 1+2+3")
+    assert compiled_expression("cached_number=expression 1+2+3") is compiled
+    assert compiled.name == "cached_number"
+    assert compiled.variables == []
+    assert not compiled.volatile
+
+
+def test_result_reused_until_variables_change():
+    """
+    Test that results are reused while the variables used by the expression do not change
+    """
+    compiled = compiled_expression("doubled=expression @cache_test_value * 2")
+    assert compiled.variables == ["cache_test_value"]
+
+    context = context_with("cache_test_value", 2)
+    assert compiled.cached_result(context) == (False, None)
+    compiled.store_result(context, 4)
+    assert compiled.cached_result(context_with("cache_test_value", 2)) == (True, 4)
+
+    # unrelated variables do not matter
+    context.lastScope().setVariable("other", 1)
+    assert compiled.cached_result(context) == (True, 4)
+
+    assert compiled.cached_result(context_with("cache_test_value", 3)) == (False, None)
+
+
+def test_volatile_expression():
+    """
+    Test that results of volatile functions are never reused
+    """
+    compiled = compiled_expression("timestamp=expression now()")
+    assert compiled.volatile
+
+    context = QgsExpressionContext()
+    compiled.store_result(context, 1)
+    assert compiled.cached_result(context) == (False, None)
+
+
+def test_data_dependent_expressions():
+    """
+    Test that results of functions reading parameters, files or layers are never reused
+    """
+    assert compiled_expression("from_parameter=expression parameter('Value') * 2").volatile
+    assert compiled_expression("from_file=expression file_exists('/tmp/x')").volatile
+    assert compiled_expression("from_layer=expression overlay_intersects('layer')").volatile
+
+
+def test_unknown_functions_volatile():
+    """
+    Test that only results of built-in functions known to be pure are reused
+    """
+    assert not compiled_expression("pure_text=expression upper(concat('a', to_string(round(1.5))))").volatile
+    assert not compiled_expression("pure_geometry=expression area(buffer(make_point(0, 0), 1))").volatile
+    assert compiled_expression("feature_area=expression $area").volatile
+
+    @qgsfunction(args="auto", group="Custom")
+    def cache_test_function(value, feature, parent):  # pylint: disable=unused-argument
+        return value
+
+    try:
+        assert compiled_expression("custom=expression cache_test_function(1)").volatile
+    finally:
+        QgsExpression.unregisterFunction("cache_test_function")
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import processing
+from utils import data_path
+
+from processing_r.processing.utils import RUtils
+
+
+def test_fake_r_is_installed(fake_r):  # pylint: disable=unused-argument
+    """
+    Test that the fake backend is picked up from the R folder setting
+    """
+    assert RUtils.path_to_r_executable(script_executable=True).endswith("fake_r/Rscript")
+    assert RUtils.check_r_is_installed() is None
+
+
+def test_fake_r_console_output(fake_r):
+    """
+    Test running a script against the fake backend, with emulated console output
+    """
+    fake_r.setenv("FAKE_R_OUTPUT_LINES", "5")
+
+    result = processing.run(
+        "r:testenumstypemultiple", {"enum_normal": 0, "enum_string": 1, "R_CONSOLE_OUTPUT": "TEMPORARY_OUTPUT"}
+    )
+
+    console = Path(result["R_CONSOLE_OUTPUT"]).read_text(encoding="utf8")
+    assert "fake output line 5" in console
+    assert "fake output line 6" not in console
+
+
+def test_fake_r_outputs(fake_r):  # pylint: disable=unused-argument
+    """
+    Test that the fake backend writes declared outputs
+    """
+    result = processing.run("r:rasterinout", {"Layer": data_path("dem.tif"), "out_raster": "TEMPORARY_OUTPUT"})
+
+    assert Path(result["out_raster"]).exists()
+
+
+def test_fake_r_fallback_outputs(fake_r, tmp_path):
+    """
+    Test that outputs are written as GeoPackage and CSV when R lacks the drivers or packages of their formats
+    """
+    parameters = {"Output": (tmp_path / "lines.fgb").as_posix(), "OutputCSV": (tmp_path / "tab.parquet").as_posix()}
+
+    result = processing.run("r:test_vectorout", parameters)
+    assert result["Output"] == (tmp_path / "lines.gpkg").as_posix()
+    assert result["OutputCSV"] == (tmp_path / "tab.csv").as_posix()
+    assert Path(result["Output"]).exists()
+    assert Path(result["OutputCSV"]).exists()
+
+    fake_r.setenv("FAKE_R_PACKAGES", "arrow")
+    fake_r.setenv("FAKE_R_SF_DRIVERS", "GPKG,FlatGeobuf")
+    result = processing.run("r:test_vectorout", parameters)
+    assert result == parameters
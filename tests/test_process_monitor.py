@@ -0,0 +1,86 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import processing
+import pytest
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from processing_r.processing.process_monitor import ProcessMonitor
+from processing_r.processing.utils import RUtils
+
+pytestmark = pytest.mark.skipif(not ProcessMonitor.is_supported(), reason="process monitoring needs /proc")
+
+
+def test_monitor_process_tree(tmp_path):
+    """
+    Test sampling a process with a child process
+    """
+    code = (
+        "import subprocess, sys, time; "
+        "c = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(1)']); "
+        "time.sleep(0.5); c.wait()"
+    )
+    with subprocess.Popen([sys.executable, "-c", code]) as proc:
+        monitor = ProcessMonitor(proc.pid, 0.05)
+        monitor.start()
+        proc.wait()
+        monitor.stop()
+
+    assert len(monitor.samples) > 2
+    assert max(len(s) for s in monitor.samples) == len(ProcessMonitor.FIELDS)
+
+    peaks = monitor.peaks()
+    assert peaks["rss_kb"] > 0
+    assert peaks["threads"] >= 2
+    assert peaks["elapsed"] > 0.5
+
+    csv_file = tmp_path / "resources.csv"
+    monitor.write_csv(csv_file.as_posix())
+    lines = csv_file.read_text(encoding="utf8").splitlines()
+    assert lines[0] == ",".join(ProcessMonitor.FIELDS)
+    assert len(lines) == len(monitor.samples) + 1
+
+
+def test_monitor_peak_rss():
+    """
+    Test that the peak memory of the process tree is kept after the memory is released
+    """
+    code = "import time; b = bytearray(64 * 1024 * 1024); time.sleep(0.3); del b; time.sleep(0.5)"
+    with subprocess.Popen([sys.executable, "-c", code]) as proc:
+        monitor = ProcessMonitor(proc.pid, 0.05)
+        monitor.start()
+        proc.wait()
+        monitor.stop()
+
+    assert monitor.peak_rss() >= 64 * 1024
+    assert monitor.peak_rss() >= monitor.peaks()["rss_kb"]
+
+
+def test_monitor_finished_process():
+    """
+    Test that sampling a finished process does not record anything
+    """
+    with subprocess.Popen([sys.executable, "-c", "pass"]) as proc:
+        proc.wait()
+
+    monitor = ProcessMonitor(proc.pid, 0.05)
+    assert monitor.sample() is None
+    assert monitor.peaks()["rss_kb"] == 0
+    assert monitor.peak_rss() is None
+
+
+def test_resource_usage_output(fake_r):  # pylint: disable=unused-argument
+    """
+    Test the resource usage output of an algorithm run with monitoring enabled
+    """
+    fake_r.setenv("FAKE_R_RUNTIME", "0.5")
+    ProcessingConfig.setSettingValue(RUtils.R_MONITOR_INTERVAL, 0.1)
+    try:
+        result = processing.run("r:testenumstypemultiple", {"enum_normal": 0, "enum_string": 1})
+    finally:
+        ProcessingConfig.setSettingValue(RUtils.R_MONITOR_INTERVAL, 0.0)
+
+    lines = Path(result["R_RESOURCE_USAGE"]).read_text(encoding="utf8").splitlines()
+    assert lines[0].startswith("elapsed,rss_kb")
+    assert len(lines) > 2
@@ -1,3 +1,5 @@
+from qgis.PyQt.QtCore import QDate
+
 from processing_r.processing.r_templates import RTemplates
 
 
@@ -34,3 +36,146 @@ def test_string_list_variable():  # pylint: disable=too-many-locals,too-many-sta
     assert templates.set_variable_string_list("var", []) == "var <- c()"
     assert templates.set_variable_string_list("var", ["aaaa"]) == 'var <- c("aaaa")'
     assert templates.set_variable_string_list("var", ["aaaa", 'va"l']) == 'var <- c("aaaa","va\\"l")'
+
+
+def test_parameter_bundle():
+    """
+    Test values passed in the parameter bundle
+    """
+    templates = RTemplates()
+    templates.bundle_threshold = 20
+    assert templates.set_variable_string_list("var", ["a"]) == 'var <- c("a")'
+    assert not templates.parameter_bundle
+
+    values = ["field_{}".format(i) for i in range(10)]
+    assert templates.set_variable_string_list("var", values) == 'var <- as.character(unlist(.qgis_parameters[["var"]]))'
+    assert templates.parameter_bundle == {"var": values}
+
+    assert templates.set_variable_geom("geom", "Point (1 2)") == (
+        'geom <- sf::st_as_sfc(structure(.qgis_parameters[["geom"]], class = "WKB"))[[1]]'
+    )
+    assert templates.parameter_bundle["geom"] == "0101000000000000000000f03f0000000000000040"
+
+    assert templates.set_variable_list("list", [1, "text", QDate(2020, 5, 4)]) == (
+        'list <- lapply(.qgis_parameters[["list"]], .qgis_value)'
+    )
+    assert templates.parameter_bundle["list"] == [
+        {"type": "value", "value": 1},
+        {"type": "value", "value": "text"},
+        {"type": "date", "value": "2020-05-04"},
+    ]
+
+    commands = templates.load_parameter_bundle("/tmp/parameters.json")
+    assert '.qgis_parameters <- jsonlite::read_json("/tmp/parameters.json", simplifyVector = FALSE)' in commands
+
+
+def test_lazy_layer_list():
+    """
+    Test list of layers created on first use
+    """
+    templates = RTemplates()
+    assert templates.set_variable_layer_list("var", ["tempvar0", "tempvar1"]) == "var = list(tempvar0,tempvar1)"
+    templates.lazy_inputs = True
+    assert templates.set_variable_layer_list("var", ["tempvar0", "tempvar1"]) == (
+        'delayedAssign("var", list(tempvar0,tempvar1))'
+    )
+
+
+def test_parquet():
+    """
+    Test reading and writing attribute tables as Parquet files
+    """
+    templates = RTemplates()
+    assert templates.set_variable_parquet("var", "/tmp/table.parquet") == (
+        'var <- as.data.frame(arrow::read_parquet("/tmp/table.parquet"))'
+    )
+    assert templates.write_parquet_output("var", "/tmp/table.parquet") == (
+        'arrow::write_parquet(if (inherits(var, "sf")) sf::st_drop_geometry(var) else var, "/tmp/table.parquet")'
+    )
+    # written as CSV if R lacks the arrow package
+    assert templates.write_parquet_output("var", "/tmp/table.parquet", "/tmp/table.csv") == (
+        'if (requireNamespace("arrow", quietly = TRUE)) { '
+        'arrow::write_parquet(if (inherits(var, "sf")) sf::st_drop_geometry(var) else var, "/tmp/table.parquet") '
+        '} else { write.csv(if (inherits(var, "sf")) sf::st_drop_geometry(var) else var, "/tmp/table.csv", '
+        "row.names = FALSE) }"
+    )
+
+
+def test_write_vector_output():
+    """
+    Test writing vector outputs with a driver and options
+    """
+    templates = RTemplates()
+    assert templates.write_vector_output("var", "/tmp/out.gpkg", "out") == (
+        'st_write(var, "/tmp/out.gpkg", layer = "out", quiet = TRUE)'
+    )
+    assert templates.write_vector_output(
+        "var",
+        "/tmp/out.fgb",
+        "out",
+        "FlatGeobuf",
+        layer_options=["SPATIAL_INDEX=NO"],
+        config_options={"OGR_SQLITE_SYNCHRONOUS": "OFF"},
+    ) == (
+        'st_write(var, "/tmp/out.fgb", layer = "out", driver = "FlatGeobuf", layer_options = c("SPATIAL_INDEX=NO"), '
+        'config_options = c(OGR_SQLITE_SYNCHRONOUS = "OFF"), quiet = TRUE)'
+    )
+    # written as GeoPackage if sf lacks the driver
+    assert templates.write_vector_output("var", "/tmp/out.fgb", "out", "FlatGeobuf", fallback_path="/tmp/out.gpkg") == (
+        'if (with(sf::st_drivers("vector"), any(name == "FlatGeobuf" & write))) { '
+        'st_write(var, "/tmp/out.fgb", layer = "out", driver = "FlatGeobuf", quiet = TRUE) } else { '
+        'st_write(var, "/tmp/out.gpkg", layer = "out", quiet = TRUE) }'
+    )
+
+
+def test_raster_backend():
+    """
+    Test reading and writing rasters with each raster backend
+    """
+    templates = RTemplates()
+    assert templates.get_necessary_packages() == ["sf", "raster"]
+    assert templates.set_variable_raster("r", "/tmp/dem.tif") == 'r <- brick("/tmp/dem.tif")'
+    assert templates.write_raster_output("r", "/tmp/out.tif") == 'writeRaster(r, "/tmp/out.tif", overwrite = TRUE)'
+
+    templates.raster_backend = "terra"
+    assert templates.get_necessary_packages() == ["sf", "terra"]
+    assert templates.set_variable_raster("r", "/tmp/dem.tif") == 'r <- terra::rast("/tmp/dem.tif")'
+    assert templates.write_raster_output("r", "/tmp/out.tif") == (
+        'terra::writeRaster(r, "/tmp/out.tif", overwrite = TRUE)'
+    )
+
+    templates.raster_backend = "stars"
+    assert templates.get_necessary_packages() == ["sf", "stars"]
+    assert templates.set_variable_raster("r", "/tmp/dem.tif") == 'r <- stars::read_stars("/tmp/dem.tif", proxy = TRUE)'
+    assert templates.write_raster_output("r", "/tmp/out.tif") == 'stars::write_stars(r, "/tmp/out.tif")'
+
+
+def test_raster_output_options():
+    """
+    Test writing rasters with output options with each raster backend
+    """
+    options = {
+        "format": "COG",
+        "datatype": "FLT4S",
+        "na_flag": -3.5,
+        "creation_options": ["COMPRESS=ZSTD", "TILED=YES"],
+    }
+    templates = RTemplates()
+    assert templates.write_raster_output("r", "/tmp/out.tif", options) == (
+        'writeRaster(r, "/tmp/out.tif", format = "COG", datatype = "FLT4S", NAflag = -3.5, '
+        'options = c("COMPRESS=ZSTD", "TILED=YES"), overwrite = TRUE)'
+    )
+
+    templates.raster_backend = "terra"
+    assert templates.write_raster_output("r", "/tmp/out.tif", options) == (
+        'terra::writeRaster(r, "/tmp/out.tif", filetype = "COG", datatype = "FLT4S", NAflag = -3.5, '
+        'gdal = c("COMPRESS=ZSTD", "TILED=YES"), overwrite = TRUE)'
+    )
+
+    templates.raster_backend = "stars"
+    assert templates.write_raster_output("r", "/tmp/out.tif", options) == (
+        'stars::write_stars(r, "/tmp/out.tif", driver = "COG", type = "Float32", NA_value = -3.5, '
+        'options = c("COMPRESS=ZSTD", "TILED=YES"))'
+    )
+
+    assert templates.set_gdal_num_threads("ALL_CPUS") == 'Sys.setenv(GDAL_NUM_THREADS = "ALL_CPUS")'
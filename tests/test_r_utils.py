@@ -1,8 +1,10 @@
 from pathlib import Path
 
+import pytest
 from processing.core.ProcessingConfig import ProcessingConfig
 from qgis.PyQt.QtCore import QCoreApplication, QSettings
 
+from processing_r.processing import utils
 from processing_r.processing.provider import RAlgorithmProvider
 from processing_r.processing.utils import RUtils
 
@@ -22,6 +24,80 @@ def test_r_is_installed():
     assert RUtils.check_r_is_installed() is None
 
 
+def test_is_r_package_installed(fake_r):
+    """
+    Test checking if R packages are installed, each package is checked only once
+    """
+    fake_r.setattr(utils, "_r_probes", {})
+    fake_r.setenv("FAKE_R_PACKAGES", "arrow")
+    assert RUtils.is_r_package_installed("arrow")
+    assert not RUtils.is_r_package_installed("nanoarrow")
+
+    fake_r.setenv("FAKE_R_PACKAGES", "")
+    assert RUtils.is_r_package_installed("arrow")
+
+
+def test_r_vector_drivers(fake_r):
+    """
+    Test listing the vector drivers of sf
+    """
+    fake_r.setattr(utils, "_r_probes", {})
+    assert RUtils.r_vector_drivers() == []
+
+    fake_r.setattr(utils, "_r_probes", {})
+    fake_r.setenv("FAKE_R_SF_DRIVERS", "GPKG,FlatGeobuf")
+    assert RUtils.r_vector_drivers() == ["GPKG", "FlatGeobuf"]
+
+
+def test_raster_output_options():
+    """
+    Test parsing and merging the options of raster outputs
+    """
+    options = RUtils.parse_raster_output_options(["COG", "zstd", "Float32", "NAflag=-3.5", "TILED"])
+    assert options == {
+        "format": "COG",
+        "datatype": "FLT4S",
+        "na_flag": -3.5,
+        "creation_options": ["COMPRESS=ZSTD", "TILED=YES"],
+    }
+    with pytest.raises(ValueError):
+        RUtils.parse_raster_output_options(["GZIP"])
+
+    assert RUtils.default_raster_output_options() == {
+        "format": None,
+        "datatype": None,
+        "na_flag": None,
+        "creation_options": [],
+    }
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_CREATION_OPTIONS, "DEFLATE, BIGTIFF=YES")
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_DATATYPE, "INT1U")
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_NA_FLAG, "255")
+    defaults = RUtils.default_raster_output_options()
+    assert defaults == {
+        "format": None,
+        "datatype": "INT1U",
+        "na_flag": 255,
+        "creation_options": ["COMPRESS=DEFLATE", "BIGTIFF=YES"],
+    }
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_CREATION_OPTIONS, "")
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_DATATYPE, "")
+    ProcessingConfig.setSettingValue(RUtils.R_RASTER_NA_FLAG, "")
+
+    assert RUtils.merge_raster_output_options(defaults, None) == defaults
+    assert RUtils.merge_raster_output_options(defaults, options) == {
+        "format": "COG",
+        "datatype": "FLT4S",
+        "na_flag": -3.5,
+        "creation_options": ["BIGTIFF=YES", "COMPRESS=ZSTD", "TILED=YES"],
+    }
+
+    # GDAL picks its own number of threads unless configured
+    assert RUtils.gdal_num_threads() is None
+    ProcessingConfig.setSettingValue(RUtils.R_GDAL_NUM_THREADS, "ALL_CPUS")
+    assert RUtils.gdal_num_threads() == "ALL_CPUS"
+    ProcessingConfig.setSettingValue(RUtils.R_GDAL_NUM_THREADS, "")
+
+
 def test_guess_r_binary_folder():
     """
     Test guessing the R binary folder -- not much to do here, all the logic is Windows specific
@@ -173,3 +249,27 @@ def test_default_scripts_folder():
     assert RUtils.default_scripts_folder()
     assert "rscripts" in RUtils.default_scripts_folder()
     assert Path(RUtils.default_scripts_folder()).exists()
+
+
+def test_profile_report():
+    """
+    Test parsing of the profiling summary and creating the HTML report
+    """
+    summary = [
+        "#sampling_time\t1.500000\n",
+        "#max_memory_mb\t42.000000\n",
+        "line\tself.time\tself.pct\ttotal.time\ttotal.pct\tmem.total\n",
+        "body.r#2\t1.2\t80\t1.2\t80\t30.5\n",
+        "other.r#7\t0.1\t6\t0.1\t6\t0\n",
+        "<no location>\t0.2\t14\t0.3\t20\t1\n",
+    ]
+    totals, rows = RUtils.parse_profile_summary(summary, "body.r")
+
+    assert totals == {"sampling_time": 1.5, "max_memory_mb": 42.0}
+    assert rows[0] == {"line": 2, "self_time": 1.2, "total_time": 1.2, "memory": 30.5}
+    assert rows[1]["line"] is None
+    assert rows[2]["line"] is None
+
+    report = RUtils.html_formatted_profile_report(totals, rows, ["a <- 1", "b <- a < 2"], [10, 12])
+    assert "<td>12</td><td><code>b &lt;- a &lt; 2</code></td><td>1.20</td>" in report
+    assert "1.50 s" in report
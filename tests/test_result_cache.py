@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import processing
+import pytest
+from qgis.core import QgsProcessingException
+from utils import data_path
+
+from processing_r.processing.cache import DiskCache, ResultCache
+
+
+def test_disk_cache_put_get(tmp_path):
+    """
+    Test storing and reading cache entries
+    """
+    source = tmp_path / "result.shp"
+    source.write_bytes(b"x" * 100)
+    (tmp_path / "result.dbf").write_bytes(b"x" * 10)
+
+    cache = DiskCache((tmp_path / "cache").as_posix(), 1000)
+    assert cache.get("a") is None
+
+    entry = cache.put("a", {"Output/result.shp": source.as_posix()}, {"values": {"n": "1"}})
+    assert entry["size"] == 100
+    assert cache.get("a")["values"] == {"n": "1"}
+    assert (Path(cache.entry_folder("a")) / "Output" / "result.shp").exists()
+    assert cache.total_size() == 100
+
+    # storing the same key again keeps the existing entry
+    assert cache.put("a", {"Output/result.shp": source.as_posix()}, {"values": {"n": "2"}})["values"] == {"n": "1"}
+
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_disk_cache_eviction(tmp_path):
+    """
+    Test that least recently used entries are evicted first
+    """
+    source = tmp_path / "data.bin"
+    source.write_bytes(b"x" * 400)
+
+    cache = DiskCache((tmp_path / "cache").as_posix(), 1000)
+    cache.put("a", {"data.bin": source.as_posix()}, {})
+    cache.put("b", {"data.bin": source.as_posix()}, {})
+    # a was used more recently than b
+    assert cache.get("a") is not None
+    cache.put("c", {"data.bin": source.as_posix()}, {})
+
+    assert [entry["key"] for entry in cache.entries()] == ["c", "a"]
+
+    # entries larger than the cache are not stored
+    source.write_bytes(b"x" * 2000)
+    assert cache.put("d", {"data.bin": source.as_posix()}, {}) is None
+    assert cache.get("d") is None
+
+
+def test_disk_cache_put_failure(tmp_path):
+    """
+    Test that entries which can not be stored are skipped without raising
+    """
+    source = tmp_path / "data.bin"
+    source.write_bytes(b"x" * 10)
+
+    # the cache folder can not be created over a file
+    cache = DiskCache(source.as_posix(), 1000)
+    assert cache.put("a", {"data.bin": source.as_posix()}, {}) is None
+    assert cache.get("a") is None
+
+
+def test_result_cache_hit(fake_r, tmp_path):
+    """
+    Test that a cacheable script is not run again for the same inputs
+    """
+    fake_r.setattr(ResultCache, "default_folder", staticmethod(lambda: (tmp_path / "results").as_posix()))
+    parameters = {"Layer": data_path("lines.shp"), "Size": 5, "Output": (tmp_path / "first.gpkg").as_posix()}
+    result = processing.run("r:testcacheable", parameters)
+    assert Path(result["Output"]).exists()
+    assert float(result["Size_out"]) == 5
+
+    # R fails from now on, so results can only come from the cache
+    fake_r.setenv("FAKE_R_FAIL", "1")
+    parameters["Output"] = (tmp_path / "second.gpkg").as_posix()
+    result = processing.run("r:testcacheable", parameters)
+    assert result["Output"] == parameters["Output"]
+    assert Path(result["Output"]).exists()
+    assert float(result["Size_out"]) == 5
+
+    # different parameter values or output formats are not cached
+    with pytest.raises(QgsProcessingException):
+        processing.run("r:testcacheable", {**parameters, "Size": 6})
+    with pytest.raises(QgsProcessingException):
+        processing.run("r:testcacheable", {**parameters, "Output": (tmp_path / "third.shp").as_posix()})
@@ -0,0 +1,92 @@
+import processing
+import pytest
+from processing.core.ProcessingConfig import ProcessingConfig
+
+from processing_r.processing.run_history import RunHistory
+from processing_r.processing.utils import RUtils
+
+
+def test_record_and_query(tmp_path):
+    """
+    Test storing and reading executions
+    """
+    history = RunHistory((tmp_path / "history.sqlite").as_posix())
+    assert history.runs() == []
+
+    history.record(
+        {
+            "algorithm_id": "r:test",
+            "script_hash": "abc",
+            "duration": 1.5,
+            "phase_durations": {"build_script": 0.1, "r_execution": 1.3},
+            "input_sizes": {"Layer": 100},
+            "exit_status": 0,
+        }
+    )
+    history.record({"algorithm_id": "r:other", "duration": 3.0, "exit_status": 1})
+
+    runs = history.runs()
+    assert len(runs) == 2
+    assert runs[0]["algorithm_id"] == "r:other"
+    assert runs[1]["phase_durations"] == {"build_script": 0.1, "r_execution": 1.3}
+    assert runs[1]["input_sizes"] == {"Layer": 100}
+    assert runs[1]["output_sizes"] is None
+    assert runs[1]["timestamp"]
+
+    assert len(history.runs(algorithm_id="r:test")) == 1
+    assert len(history.runs(limit=1)) == 1
+
+    history.clear()
+    assert history.runs() == []
+
+
+def test_statistics(tmp_path):
+    """
+    Test duration percentiles per algorithm
+    """
+    history = RunHistory((tmp_path / "history.sqlite").as_posix())
+    for duration in range(1, 101):
+        history.record({"algorithm_id": "r:test", "duration": float(duration), "exit_status": 0})
+    history.record({"algorithm_id": "r:test", "duration": None, "exit_status": 1})
+    # results restored from the result cache are not runs of R
+    history.record({"algorithm_id": "r:test", "duration": 0.01, "exit_status": 0, "cache_hit": True})
+    history.record({"algorithm_id": "r:cached", "duration": 0.01, "exit_status": 0, "cache_hit": True})
+
+    statistics = history.statistics()
+    assert statistics["r:test"]["runs"] == 101
+    assert statistics["r:test"]["failed"] == 1
+    assert statistics["r:test"]["p50"] == pytest.approx(50.5)
+    assert statistics["r:test"]["p95"] == pytest.approx(95.05)
+
+    assert "r:cached" not in statistics
+    assert history.statistics(algorithm_id="r:missing") == {}
+    assert len(history.runs(algorithm_id="r:cached")) == 1
+
+
+def test_percentile():
+    assert RunHistory.percentile([], 50) is None
+    assert RunHistory.percentile([2.0], 95) == 2.0
+    assert RunHistory.percentile([1.0, 2.0, 3.0], 50) == 2.0
+
+
+def test_execution_is_recorded(fake_r):  # pylint: disable=unused-argument
+    """
+    Test that running an algorithm stores it in the history
+    """
+    history = RunHistory()
+    count = len(history.runs(algorithm_id="r:testenumstypemultiple"))
+
+    # the history is only recorded when enabled
+    processing.run("r:testenumstypemultiple", {"enum_normal": 0, "enum_string": 1})
+    assert len(history.runs(algorithm_id="r:testenumstypemultiple")) == count
+
+    ProcessingConfig.setSettingValue(RUtils.R_RUN_HISTORY, True)
+    processing.run("r:testenumstypemultiple", {"enum_normal": 0, "enum_string": 1})
+    ProcessingConfig.setSettingValue(RUtils.R_RUN_HISTORY, False)
+
+    runs = history.runs(algorithm_id="r:testenumstypemultiple")
+    assert len(runs) == count + 1
+    assert runs[0]["exit_status"] == 0
+    assert runs[0]["script_hash"]
+    assert runs[0]["parameters_fingerprint"]
+    assert set(runs[0]["phase_durations"]) == {"build_script", "r_execution", "outputs", "total"}